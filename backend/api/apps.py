@@ -1,6 +1,14 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class ApiConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "api"
+
+    def ready(self):
+        # Models load lazily on first use; opt in to paying that cost at startup
+        if getattr(settings, "ML_WARMUP_ON_START", False):
+            from utils import ml_model
+
+            ml_model.warmup()
@@ -0,0 +1,31 @@
+"""
+Helpers for loading the Content Filtering datasets used to train the MH classifier.
+The spreadsheets live in AI/Datasets at the repo root, next to the backend folder.
+"""
+
+import os
+import random
+
+from django.conf import settings
+
+DATASETS_DIR = os.path.join(settings.BASE_DIR.parent, "AI", "Datasets")
+YES_DATASET = "Content Filtering Yes dataset.xlsx"
+NO_DATASET = "Content Filtering No dataset.xlsx"
+
+
+def load_content_filtering(datasets_dir=DATASETS_DIR, limit=None, seed=42):
+    """
+    Return a list of (content, is_mental_health) pairs from both datasets,
+    shuffled deterministically and optionally capped at `limit` rows.
+    """
+    import pandas as pd
+
+    rows = []
+    for name in (YES_DATASET, NO_DATASET):
+        df = pd.read_excel(os.path.join(datasets_dir, name))
+        df = df.dropna(subset=["content"])
+        for content, label in zip(df["content"], df["is_mental_health"]):
+            rows.append((str(content), bool(label)))
+
+    random.Random(seed).shuffle(rows)
+    return rows[:limit] if limit else rows
@@ -0,0 +1,59 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from theramind_backend.config import db
+from utils.content_summary import summary_fields
+from utils.pagination import iter_pages
+
+BATCH_LIMIT = 500  # Firestore's maximum writes per batch
+
+
+class Command(BaseCommand):
+    help = (
+        "Add snippet and reading_time to existing articles and patient stories, "
+        "streaming each collection page by page."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--collections", nargs="+", default=["articles", "patient_stories"]
+        )
+        parser.add_argument("--page-size", type=int, default=200)
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Recompute documents that already have a snippet.",
+        )
+        parser.add_argument("--dry-run", action="store_true")
+
+    def handle(self, *args, **opts):
+        started = time.perf_counter()
+        for name in opts["collections"]:
+            scanned = updated = 0
+            for page in iter_pages(db, name, ["content", "snippet"], opts["page_size"]):
+                scanned += len(page)
+
+                batch, pending = db.batch(), 0
+                for doc in page:
+                    data = doc.to_dict() or {}
+                    if "snippet" in data and not opts["force"]:
+                        continue
+                    updated += 1
+                    if opts["dry_run"]:
+                        continue
+                    batch.update(doc.reference, summary_fields(data.get("content")))
+                    pending += 1
+                    if pending == BATCH_LIMIT:
+                        batch.commit()
+                        batch, pending = db.batch(), 0
+                if pending:
+                    batch.commit()
+                self.stdout.write(f"{name}: {updated}/{scanned} documents updated")
+
+        verb = "would be updated" if opts["dry_run"] else "updated"
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Done in {time.perf_counter() - started:.1f} s ({verb} as listed above)"
+            )
+        )
@@ -0,0 +1,65 @@
+import os
+import sys
+import json
+import subprocess
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+# Each stage runs in a fresh interpreter so nothing is already imported
+STAGE_SCRIPT = """
+import os, sys, json, time
+t0 = time.perf_counter()
+import django
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "theramind_backend.settings")
+django.setup()
+t_setup = time.perf_counter()
+import theramind_backend.urls  # pulls in api.views, as the first request would
+t_urls = time.perf_counter()
+out = {"django_setup": t_setup - t0, "urlconf": t_urls - t_setup}
+if "{stage}" in ("ml_import", "warmup"):
+    from utils import ml_model
+    t_ml = time.perf_counter()
+    out["ml_import"] = t_ml - t_urls
+    if "{stage}" == "warmup":
+        ml_model.warmup()
+        out["warmup"] = time.perf_counter() - t_ml
+out["loaded_tensorflow"] = "tensorflow" in sys.modules
+out["loaded_torch"] = "torch" in sys.modules
+out["loaded_vertexai"] = "vertexai" in sys.modules
+print(json.dumps(out))
+"""
+
+
+class Command(BaseCommand):
+    help = "Measure cold-start import time of the web app with and without the ML stack."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--runs", type=int, default=3)
+        parser.add_argument("--with-warmup", action="store_true")
+
+    def handle(self, *args, **opts):
+        stages = ["web", "ml_import"] + (["warmup"] if opts["with_warmup"] else [])
+        for stage in stages:
+            runs = [self._run(stage) for _ in range(opts["runs"])]
+            timings = [k for k in runs[0] if not k.startswith("loaded_")]
+            best = {k: min(r[k] for r in runs) for k in timings}
+            flags = {k: v for k, v in runs[0].items() if k.startswith("loaded_")}
+            total = sum(best.values())
+            self.stdout.write(
+                f"{stage:>10}: total {total:.2f}s  "
+                + "  ".join(f"{k} {v:.2f}s" for k, v in best.items())
+                + f"  {flags}"
+            )
+            if stage == "web":
+                style = self.style.SUCCESS if total < 1.0 else self.style.WARNING
+                self.stdout.write(style(f"Non-ML startup: {total:.2f}s (target < 1s)"))
+
+    def _run(self, stage):
+        env = os.environ.copy()
+        env["ML_WARMUP_ON_START"] = "False"
+        out = subprocess.run(
+            [sys.executable, "-c", STAGE_SCRIPT.replace("{stage}", stage)],
+            cwd=settings.BASE_DIR, env=env, capture_output=True, text=True, check=True,
+        ).stdout
+        return json.loads(out.strip().splitlines()[-1])
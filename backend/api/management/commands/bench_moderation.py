@@ -0,0 +1,304 @@
+import os
+import json
+import time
+import resource
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+
+from utils import ml_model
+from utils.moderation_cache import model_fingerprint
+from ._datasets import DATASETS_DIR, load_content_filtering
+
+STAGES = ("clean", "encode", "predict", "tta", "keyword")
+VOTES = ("valid", "confidence_pass", "tta_pass", "override_pass")
+
+
+# Times and memory regress upwards; accuracy, F1 and req/s regress downwards
+def _lower_is_better(path):
+    return any(k.endswith(("_ms", "_mb")) or k == "load_s" for k in path)
+
+
+class Command(BaseCommand):
+    help = (
+        "Latency per stage (cold and warm), throughput under concurrency, peak RSS "
+        "and accuracy/F1 of the moderation ensemble on the Content Filtering "
+        "datasets. Saves JSON and compares against an earlier run."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", type=int, default=200)
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8, 16])
+        parser.add_argument("--datasets-dir", default=DATASETS_DIR)
+        parser.add_argument("--output", help="Write the results as JSON to this path.")
+        parser.add_argument(
+            "--compare",
+            nargs="+",
+            metavar="RUN",
+            help="BASELINE.json to compare this run against, or BASELINE.json "
+            "CANDIDATE.json to compare two saved runs without benchmarking.",
+        )
+        parser.add_argument(
+            "--tolerance",
+            type=float,
+            default=0.10,
+            help="Relative change that counts as a regression (default 10%%).",
+        )
+        parser.add_argument("--fail-on-regression", action="store_true")
+
+    def handle(self, *args, **opts):
+        compare = opts["compare"] or []
+        if len(compare) > 2:
+            raise CommandError("--compare takes one or two JSON files")
+        if len(compare) == 2:
+            self._compare(_read(compare[0]), _read(compare[1]), opts)
+            return
+
+        results = self._run(opts)
+        self._report(results)
+        if opts["output"]:
+            os.makedirs(os.path.dirname(os.path.abspath(opts["output"])), exist_ok=True)
+            with open(opts["output"], "w") as f:
+                json.dump(results, f, indent=2)
+            self.stdout.write(f"Saved {opts['output']}")
+        if compare:
+            self._compare(_read(compare[0]), results, opts)
+
+    # === Benchmark ===
+    def _run(self, opts):
+        rows = load_content_filtering(opts["datasets_dir"], opts["limit"], opts["seed"])
+        docs = [c for c, _ in rows]
+        labels = [y for _, y in rows]
+
+        t0 = time.perf_counter()
+        self.models = ml_model.load_models()
+        load_s = time.perf_counter() - t0
+        rss_loaded = _peak_rss_mb()
+
+        # Cold: first request after load, with an empty sentence embedding cache
+        if ml_model._EMB_CACHE is not None:
+            ml_model._EMB_CACHE.clear()
+        t0 = time.perf_counter()
+        self._decide(docs[0])
+        first_ms = (time.perf_counter() - t0) * 1000
+
+        if ml_model._EMB_CACHE is not None:
+            ml_model._EMB_CACHE.clear()
+        cold_times, verdicts = self._pass(docs)
+        warm_times, _ = self._pass(docs)
+
+        throughput = {str(n): self._throughput(docs, n) for n in opts["concurrency"]}
+
+        return {
+            "created_at": datetime.utcnow().isoformat() + "Z",
+            "model": model_fingerprint(),
+            "config": {
+                "backend": ml_model.INFERENCE_BACKEND,
+                "sbert_quantized": ml_model.SBERT_QUANTIZED,
+                "compiled_predict": ml_model.COMPILED_PREDICT,
+                "tta_batched": ml_model.TTA_BATCHED,
+                "window_mode": ml_model.WINDOW_MODE,
+                "preprocessor": ml_model.PREPROCESSOR,
+                "batcher": ml_model._BATCHER is not None,
+                "embed_cache_bytes": ml_model._EMB_CACHE_BYTES,
+            },
+            "documents": len(docs),
+            "load_s": round(load_s, 3),
+            "first_request_ms": round(first_ms, 2),
+            "latency": {"cold": _summaries(cold_times), "warm": _summaries(warm_times)},
+            "throughput": throughput,
+            "peak_rss_mb": {"after_load": rss_loaded, "end": _peak_rss_mb()},
+            "accuracy": {
+                vote: _classification([v[vote] for v in verdicts], labels)
+                for vote in VOTES
+            },
+        }
+
+    def _pass(self, docs):
+        times = {stage: [] for stage in STAGES + ("total",)}
+        verdicts = []
+        for html in docs:
+            timings, verdict = self._decide(html)
+            for stage, t in timings.items():
+                times[stage].append(t)
+            verdicts.append(verdict)
+        return times, verdicts
+
+    def _decide(self, html):
+        """
+        ml_model.moderate() split into timed stages. The base document is scored
+        on its own so encode/predict are not mixed with the TTA variants; the
+        classifier scores rows independently, so the verdict is unchanged.
+        """
+        t0 = time.perf_counter()
+
+        sents = ml_model.clean_html(html)
+        spans = ml_model.window_spans(len(sents))
+        t1 = time.perf_counter()
+        embs = ml_model.encode_sentences(sents[: spans[-1][1]])
+        t2 = time.perf_counter()
+        rows = np.stack([ml_model.pad_embeds(embs[s:e]) for s, e in spans])
+        conf = ml_model.combine_windows(ml_model.classify(rows)[:, 1])
+        t3 = time.perf_counter()
+        tta_pass = ml_model.tta_pass_from_scores(
+            ml_model.score_batch(ml_model.tta_variants(html))
+        )
+        t4 = time.perf_counter()
+        over_pass = ml_model.keyword_override(html)
+        t5 = time.perf_counter()
+
+        timings = {
+            "clean": t1 - t0,
+            "encode": t2 - t1,
+            "predict": t3 - t2,
+            "tta": t4 - t3,
+            "keyword": t5 - t4,
+            "total": t5 - t0,
+        }
+        return timings, ml_model._full_result(
+            conf, tta_pass, over_pass, self.models.version
+        )
+
+    def _throughput(self, docs, workers):
+        latencies = []
+
+        def one(html):
+            t0 = time.perf_counter()
+            ml_model.moderate(html)
+            latencies.append(time.perf_counter() - t0)
+
+        t0 = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(one, docs))
+        elapsed = time.perf_counter() - t0
+        return {
+            "requests_per_s": round(len(docs) / elapsed, 2),
+            "latency": _summary(latencies),
+        }
+
+    # === Output ===
+    def _report(self, r):
+        self.stdout.write(
+            f"Documents: {r['documents']}  model {r['model']}  "
+            f"load {r['load_s']:.2f} s  first request {r['first_request_ms']:.1f} ms"
+        )
+        for phase in ("cold", "warm"):
+            self.stdout.write(f"\n{phase.capitalize()} latency (ms)")
+            for stage, s in r["latency"][phase].items():
+                self.stdout.write(
+                    f"  {stage:<8} p50 {s['p50_ms']:8.2f}  p95 {s['p95_ms']:8.2f}  "
+                    f"p99 {s['p99_ms']:8.2f}"
+                )
+        self.stdout.write("\nThroughput")
+        for workers, t in r["throughput"].items():
+            self.stdout.write(
+                f"  concurrency={workers:>3}  {t['requests_per_s']:7.2f} req/s  "
+                f"p95 {t['latency']['p95_ms']:.1f} ms"
+            )
+        self.stdout.write(
+            f"\nPeak RSS: {r['peak_rss_mb']['after_load']:.0f} MB after load, "
+            f"{r['peak_rss_mb']['end']:.0f} MB at end"
+        )
+        self.stdout.write("\nAccuracy")
+        for vote, m in r["accuracy"].items():
+            self.stdout.write(
+                f"  {vote:<16} acc {m['accuracy']:.3f}  precision {m['precision']:.3f}  "
+                f"recall {m['recall']:.3f}  f1 {m['f1']:.3f}"
+            )
+
+    def _compare(self, base, new, opts):
+        if base.get("model") != new.get("model"):
+            self.stdout.write(
+                self.style.WARNING(f"Models differ: {base.get('model')} -> {new.get('model')}")
+            )
+        if base.get("documents") != new.get("documents"):
+            self.stdout.write(
+                self.style.WARNING(
+                    f"Document counts differ: {base.get('documents')} -> {new.get('documents')}"
+                )
+            )
+
+        regressions = []
+        self.stdout.write("\nComparison (baseline -> this run)")
+        for path, old in _flatten(base):
+            value = _lookup(new, path)
+            if not isinstance(old, (int, float)) or isinstance(old, bool):
+                continue
+            if not isinstance(value, (int, float)) or isinstance(value, bool):
+                continue
+            change = (value - old) / old if old else 0.0
+            worse = change > 0 if _lower_is_better(path) else change < 0
+            flag = ""
+            if worse and abs(change) > opts["tolerance"]:
+                flag = "  REGRESSION"
+                regressions.append(".".join(path))
+            self.stdout.write(f"  {'.'.join(path):<45} {old:>10} -> {value:<10} {change:+.1%}{flag}")
+
+        if not regressions:
+            self.stdout.write(self.style.SUCCESS("No regressions."))
+            return
+        msg = f"{len(regressions)} regressions beyond {opts['tolerance']:.0%}"
+        if opts["fail_on_regression"]:
+            raise CommandError(msg)
+        self.stdout.write(self.style.ERROR(msg))
+
+
+def _summary(ts):
+    ms = np.asarray(ts) * 1000
+    return {
+        "p50_ms": round(float(np.percentile(ms, 50)), 3),
+        "p95_ms": round(float(np.percentile(ms, 95)), 3),
+        "p99_ms": round(float(np.percentile(ms, 99)), 3),
+        "mean_ms": round(float(np.mean(ms)), 3),
+    }
+
+
+def _summaries(times):
+    return {stage: _summary(ts) for stage, ts in times.items()}
+
+
+def _classification(pred, labels):
+    tp = sum(p and y for p, y in zip(pred, labels))
+    fp = sum(p and not y for p, y in zip(pred, labels))
+    fn = sum(not p and y for p, y in zip(pred, labels))
+    correct = sum(bool(p) == y for p, y in zip(pred, labels))
+    precision = tp / (tp + fp) if tp + fp else 0.0
+    recall = tp / (tp + fn) if tp + fn else 0.0
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+    return {
+        "accuracy": round(correct / len(labels), 4) if labels else 0.0,
+        "precision": round(precision, 4),
+        "recall": round(recall, 4),
+        "f1": round(f1, 4),
+    }
+
+
+def _peak_rss_mb():
+    # ru_maxrss is in kilobytes on Linux
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def _read(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def _flatten(d, prefix=()):
+    for k, v in d.items():
+        if k in ("config", "documents"):
+            continue
+        if isinstance(v, dict):
+            yield from _flatten(v, prefix + (k,))
+        else:
+            yield prefix + (k,), v
+
+
+def _lookup(d, path):
+    for k in path:
+        if not isinstance(d, dict) or k not in d:
+            return None
+        d = d[k]
+    return d
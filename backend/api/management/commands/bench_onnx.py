@@ -0,0 +1,75 @@
+import os
+import json
+import time
+
+import numpy as np
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from utils import ml_model
+from utils import onnx_backend as ob
+from ._datasets import DATASETS_DIR, load_content_filtering
+
+
+class Command(BaseCommand):
+    help = "Parity and latency of the onnx backend against the tf backend on the Content Filtering datasets."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", type=int, default=300)
+        parser.add_argument("--threads", type=int, default=settings.ML_ONNX_INTRA_THREADS)
+        parser.add_argument("--datasets-dir", default=DATASETS_DIR)
+
+    def handle(self, *args, **opts):
+        import tensorflow as tf
+        from sentence_transformers import SentenceTransformer
+
+        base = settings.ML_MODELS_DIR
+        ml_model.ensure_nltk_data()
+        with open(os.path.join(base, "model_config.json")) as f:
+            cfg = json.load(f)
+        sbert_dir = os.path.join(base, "final_fine_tuned_sbert_model")
+
+        tf_encoder = SentenceTransformer(sbert_dir).eval()
+        tf_clf = tf.keras.models.load_model(os.path.join(base, "final_mh_classifier.h5"))
+        tf_predict = ml_model.build_predict_fn(tf_clf, cfg["MAX_SEQ_LEN"], cfg["EMBED_DIM"])
+        sess = ob.session_options(opts["threads"])
+        onnx_encoder = ob.OnnxEncoder(
+            os.path.join(base, ob.ONNX_DIR, ob.ENCODER_FILE), sbert_dir, sess
+        )
+        onnx_clf = ob.OnnxClassifier(os.path.join(base, ob.ONNX_DIR, ob.CLASSIFIER_FILE), sess)
+
+        rows = load_content_filtering(opts["datasets_dir"], opts["limit"])
+        results = {"tf": [], "onnx": []}
+        times = {"tf": 0.0, "onnx": 0.0}
+        cos = []
+        for html, _ in rows:
+            sents = ml_model.clean_html(html) or [""]
+            embs = {}
+            for name, enc, clf in (
+                ("tf", tf_encoder, lambda b: np.asarray(tf_predict(b))),
+                ("onnx", onnx_encoder, onnx_clf),
+            ):
+                t0 = time.perf_counter()
+                embs[name] = np.asarray(enc.encode(sents, convert_to_tensor=False))
+                prob = float(clf(ml_model.pad_embeds(embs[name], cfg)[np.newaxis])[0][1])
+                times[name] += time.perf_counter() - t0
+                results[name].append(prob)
+            cos.append(float(np.mean(np.sum(embs["tf"] * embs["onnx"], axis=1))))
+
+        p_tf, p_onnx = np.array(results["tf"]), np.array(results["onnx"])
+        labels = np.array([label for _, label in rows])
+        n = len(rows)
+        self.stdout.write(f"Documents:                {n}")
+        self.stdout.write(f"Mean embedding cosine:    {np.mean(cos):.6f} (min {np.min(cos):.6f})")
+        self.stdout.write(f"Max |p_tf - p_onnx|:      {np.abs(p_tf - p_onnx).max():.2e}")
+        for t in (0.75, ml_model.TTA_THRESHOLD):
+            agree = np.mean((p_tf >= t) == (p_onnx >= t))
+            self.stdout.write(f"Decision agreement @ {t}: {agree:.2%}")
+        self.stdout.write(
+            f"Accuracy @ 0.75:          tf {np.mean((p_tf >= 0.75) == labels):.2%}  "
+            f"onnx {np.mean((p_onnx >= 0.75) == labels):.2%}"
+        )
+        self.stdout.write(
+            f"Mean latency per doc:     tf {times['tf'] / n * 1000:.1f} ms  "
+            f"onnx {times['onnx'] / n * 1000:.1f} ms"
+        )
@@ -0,0 +1,129 @@
+import os
+import time
+import random
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+from google.cloud import firestore
+
+from theramind_backend.config import db
+from utils import pagination
+
+TAGS = ["anxiety", "depression", "sleep", "stress", "mindfulness", "therapy"]
+
+
+def full_scan_page(collection, page, page_size, tag=None):
+    """The original get_articles: stream everything, slice in Python."""
+    ref = db.collection(collection).order_by(
+        "date_time", direction=firestore.Query.DESCENDING
+    )
+    if tag:
+        ref = ref.where("tags", "array_contains", tag)
+    docs = [doc.to_dict() | {"id": doc.id} for doc in ref.stream()]
+    start = (page - 1) * page_size
+    return docs[start : start + page_size]
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a scratch collection in the Firestore emulator and compare per-page "
+        "latency of cursor pagination with the old full-collection scan."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--collection", default="bench_articles")
+        parser.add_argument("--docs", type=int, default=3000)
+        parser.add_argument("--page-size", type=int, default=10)
+        parser.add_argument("--tag", default=None)
+        parser.add_argument(
+            "--scan-pages",
+            type=int,
+            default=5,
+            help="Pages timed with the full scan (it is slow; first, middle and last are spread over these).",
+        )
+        parser.add_argument("--keep", action="store_true", help="Leave the seeded documents.")
+
+    def handle(self, *args, **opts):
+        if not os.getenv("FIRESTORE_EMULATOR_HOST"):
+            raise CommandError(
+                "Set FIRESTORE_EMULATOR_HOST; this command writes and deletes documents."
+            )
+        name, page_size, tag = opts["collection"], opts["page_size"], opts["tag"]
+        self._seed(name, opts["docs"])
+        try:
+            cursor_ms = self._walk(name, page_size, tag)
+            pages = len(cursor_ms)
+            self._report("cursor", cursor_ms)
+
+            picks = sorted(
+                set(np.linspace(1, pages, max(1, opts["scan_pages"])).astype(int))
+            )
+            scan_ms = {}
+            for page in picks:
+                t0 = time.perf_counter()
+                full_scan_page(name, page, page_size, tag)
+                scan_ms[page] = (time.perf_counter() - t0) * 1000
+            for page in picks:
+                self.stdout.write(
+                    f"page {page:>5}: cursor {cursor_ms[page - 1]:8.1f} ms   "
+                    f"full scan {scan_ms[page]:8.1f} ms"
+                )
+        finally:
+            if not opts["keep"]:
+                self._clear(name)
+
+    def _seed(self, name, n):
+        self._clear(name)
+        rng = random.Random(42)
+        start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        t0 = time.perf_counter()
+        batch, pending = db.batch(), 0
+        for i in range(n):
+            batch.set(
+                db.collection(name).document(),
+                {
+                    "title": f"Benchmark article {i}",
+                    "content": "<p>" + " ".join(["lorem ipsum"] * 200) + "</p>",
+                    "tags": rng.sample(TAGS, 2),
+                    "date_time": start + timedelta(minutes=rng.randrange(500000)),
+                },
+            )
+            pending += 1
+            if pending == 500:
+                batch.commit()
+                batch, pending = db.batch(), 0
+        if pending:
+            batch.commit()
+        self.stdout.write(f"Seeded {n} documents in {time.perf_counter() - t0:.1f} s")
+
+    def _clear(self, name):
+        while True:
+            docs = list(db.collection(name).select([]).limit(500).stream())
+            if not docs:
+                break
+            batch = db.batch()
+            for d in docs:
+                batch.delete(d.reference)
+            batch.commit()
+        pagination.invalidate_counts(name)
+
+    def _walk(self, name, page_size, tag):
+        """Follow next_page_token to the end, timing every page."""
+        times, token = [], None
+        while True:
+            t0 = time.perf_counter()
+            page = pagination.fetch_page(db, name, page_size, tag=tag, token=token)
+            times.append((time.perf_counter() - t0) * 1000)
+            token = page["next_page_token"]
+            if token is None:
+                return times
+
+    def _report(self, label, ms):
+        ms = np.asarray(ms)
+        head, tail = ms[: max(1, len(ms) // 10)], ms[-max(1, len(ms) // 10) :]
+        self.stdout.write(
+            f"{label}: {len(ms)} pages  p50 {np.percentile(ms, 50):.1f} ms  "
+            f"p95 {np.percentile(ms, 95):.1f} ms  first 10% {head.mean():.1f} ms  "
+            f"last 10% {tail.mean():.1f} ms"
+        )
@@ -0,0 +1,56 @@
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from utils import ml_model
+from ._datasets import DATASETS_DIR, load_content_filtering
+
+
+class Command(BaseCommand):
+    help = "Micro-benchmark clf.predict against the pre-traced predict_fn, with a parity check."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 8, 32])
+        parser.add_argument("--iterations", type=int, default=50)
+        parser.add_argument("--limit", type=int, default=200)
+        parser.add_argument("--datasets-dir", default=DATASETS_DIR)
+
+    def handle(self, *args, **opts):
+        models = ml_model.load_models()
+        clf, cfg = models.clf, models.cfg
+        fn = models.predict_fn or ml_model.build_predict_fn(
+            clf, cfg["MAX_SEQ_LEN"], cfg["EMBED_DIM"]
+        )
+        L, D = cfg["MAX_SEQ_LEN"], cfg["EMBED_DIM"]
+        rng = np.random.default_rng(0)
+
+        for n in opts["batch_sizes"]:
+            x = rng.standard_normal((n, L, D)).astype(np.float32)
+            clf.predict(x, verbose=0)
+            fn(x)
+            t_predict = self._time(lambda: clf.predict(x, verbose=0), opts["iterations"])
+            t_fn = self._time(lambda: fn(x).numpy(), opts["iterations"])
+            self.stdout.write(
+                f"batch={n:>3}  clf.predict {t_predict * 1000:7.2f} ms  "
+                f"predict_fn {t_fn * 1000:7.2f} ms  speedup {t_predict / t_fn:5.1f}x"
+            )
+
+        # Parity on real documents: same probabilities, same threshold decisions
+        docs = [c for c, _ in load_content_filtering(opts["datasets_dir"], opts["limit"])]
+        batch = np.stack([ml_model.get_embed(d)[0] for d in docs])
+        p_old = clf.predict(batch, verbose=0)[:, 1]
+        p_new = fn(batch).numpy()[:, 1]
+        flips = sum(
+            ((p_old >= t) != (p_new >= t)).sum()
+            for t in (0.75, ml_model.TTA_THRESHOLD)
+        )
+        self.stdout.write(f"Max |p_old - p_new|: {np.abs(p_old - p_new).max():.2e}")
+        style = self.style.SUCCESS if flips == 0 else self.style.ERROR
+        self.stdout.write(style(f"Decision flips over {len(docs)} documents: {flips}"))
+
+    def _time(self, f, iterations):
+        t0 = time.perf_counter()
+        for _ in range(iterations):
+            f()
+        return (time.perf_counter() - t0) / iterations
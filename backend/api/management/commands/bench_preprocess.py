@@ -0,0 +1,99 @@
+import re
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from utils import html_text, ml_model
+from ._datasets import DATASETS_DIR, load_content_filtering
+
+ENTITY = re.compile(r"&(#\d+|#x[0-9a-fA-F]+|[a-zA-Z]+);")
+
+
+def regex_sentences(html):
+    """The original clean_html: tag strip, then punkt over the whole text."""
+    import nltk
+
+    return nltk.tokenize.sent_tokenize(re.sub(r"<[^>]+>", "", html))
+
+
+def stream_sentences(html):
+    return list(html_text.iter_sentences(html))
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the regex clean_html with the streaming HTML preprocessor on real "
+        "article HTML: time per document and how the sentences differ."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--source",
+            choices=["firestore", "dataset"],
+            default="firestore",
+            help="Article HTML from Firestore, or the Content Filtering datasets.",
+        )
+        parser.add_argument("--collections", nargs="+", default=["articles", "patient_stories"])
+        parser.add_argument("--limit", type=int, default=200)
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument("--datasets-dir", default=DATASETS_DIR)
+
+    def handle(self, *args, **opts):
+        ml_model.ensure_nltk_data()
+        docs = self._docs(opts)
+        self.stdout.write(
+            f"Documents: {len(docs)}  ({sum(map(len, docs)) / 2**10:.0f} KB of HTML)"
+        )
+        # Load punkt once so neither side pays for it
+        regex_sentences(docs[0])
+
+        results = {}
+        for name, fn in (("regex", regex_sentences), ("stream", stream_sentences)):
+            times = []
+            for html in docs:
+                t0 = time.perf_counter()
+                for _ in range(opts["repeat"]):
+                    fn(html)
+                times.append((time.perf_counter() - t0) / opts["repeat"])
+            results[name] = times
+            ms = np.asarray(times) * 1000
+            self.stdout.write(
+                f"{name:<7} mean {ms.mean():.3f} ms  p50 {np.percentile(ms, 50):.3f} ms  "
+                f"p95 {np.percentile(ms, 95):.3f} ms"
+            )
+        self.stdout.write(
+            f"Speedup: {np.mean(results['regex']) / np.mean(results['stream']):.2f}x"
+        )
+
+        # How often do the two disagree, and how often did the regex leave entities in?
+        same = leaked = 0
+        regex_n = stream_n = 0
+        for html in docs:
+            old, new = regex_sentences(html), stream_sentences(html)
+            regex_n += len(old)
+            stream_n += len(new)
+            same += old == new
+            leaked += bool(ENTITY.search(" ".join(old)))
+        self.stdout.write(
+            f"Identical sentences: {same}/{len(docs)} documents  "
+            f"(regex {regex_n} sentences, stream {stream_n})"
+        )
+        self.stdout.write(f"Regex output kept HTML entities in {leaked} documents")
+
+    def _docs(self, opts):
+        if opts["source"] == "dataset":
+            rows = load_content_filtering(opts["datasets_dir"], opts["limit"])
+            return [content for content, _ in rows]
+        # Only this path needs Firestore; the benchmark itself is pure CPU
+        from theramind_backend.config import db
+
+        docs = []
+        for name in opts["collections"]:
+            query = db.collection(name).select(["content"]).limit(opts["limit"])
+            docs.extend(
+                d.to_dict()["content"]
+                for d in query.stream()
+                if (d.to_dict() or {}).get("content")
+            )
+        return docs[: opts["limit"]]
@@ -0,0 +1,102 @@
+import io
+import os
+import sys
+import json
+import time
+import tempfile
+import subprocess
+
+import numpy as np
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from utils import ml_model
+from ._datasets import DATASETS_DIR, load_content_filtering
+
+# Resident memory one pickled encoder adds to a fresh process. Loading the int8
+# model directly keeps the fp32 weights it was quantized from out of the number.
+RSS_SCRIPT = """
+import sys, psutil, torch, sentence_transformers
+proc = psutil.Process()
+before = proc.memory_info().rss
+model = torch.load(sys.argv[1], weights_only=False)
+print(proc.memory_info().rss - before)
+"""
+
+
+def _state_dict_mb(model):
+    import torch
+
+    buf = io.BytesIO()
+    torch.save(model.state_dict(), buf)
+    return buf.tell() / (1024 * 1024)
+
+
+def _fresh_rss_mb(model):
+    import torch
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "encoder.pt")
+        torch.save(model, path)
+        out = subprocess.run(
+            [sys.executable, "-c", RSS_SCRIPT, path],
+            cwd=settings.BASE_DIR, capture_output=True, text=True, check=True,
+        ).stdout
+    return int(out.split()[-1]) / (1024 * 1024)
+
+
+class Command(BaseCommand):
+    help = "Compare the fp32 and dynamic-int8 SBERT encoders: latency, memory, MH/Non-MH agreement."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", type=int, default=None)
+        parser.add_argument("--datasets-dir", default=DATASETS_DIR)
+        parser.add_argument("--json-out", default=None)
+
+    def handle(self, *args, **opts):
+        from sentence_transformers import SentenceTransformer
+
+        models = ml_model.load_models()
+        sbert_dir = os.path.join(settings.ML_MODELS_DIR, "final_fine_tuned_sbert_model")
+
+        fp32 = SentenceTransformer(sbert_dir).eval()
+        int8 = ml_model.quantize_encoder(SentenceTransformer(sbert_dir).eval())
+
+        rows = load_content_filtering(opts["datasets_dir"], opts["limit"])
+        labels = np.array([label for _, label in rows])
+        report = {"documents": len(rows)}
+        decisions = {}
+        for name, encoder in (("fp32", fp32), ("int8", int8)):
+            models.sbert = encoder
+            # Cached embeddings are keyed by model version, not by encoder object
+            if ml_model._EMB_CACHE is not None:
+                ml_model._EMB_CACHE.clear()
+            t0 = time.perf_counter()
+            results = [ml_model.moderate(html, batcher=False) for html, _ in rows]
+            elapsed = time.perf_counter() - t0
+            valid = np.array([r["valid"] for r in results])
+            decisions[name] = {
+                "valid": valid,
+                "confidence_pass": np.array([r["confidence_pass"] for r in results]),
+                "tta_pass": np.array([r["tta_pass"] for r in results]),
+                "confidence": np.array([r["confidence_score"] for r in results]),
+            }
+            report[name] = {
+                "ms_per_doc": round(elapsed / len(rows) * 1000, 2),
+                "state_dict_mb": round(_state_dict_mb(encoder), 1),
+                "rss_delta_mb": round(_fresh_rss_mb(encoder), 1),
+                "accuracy": round(float(np.mean(valid == labels)), 4),
+            }
+        report["agreement"] = {
+            key: round(float(np.mean(decisions["fp32"][key] == decisions["int8"][key])), 4)
+            for key in ("valid", "confidence_pass", "tta_pass")
+        }
+        report["max_confidence_delta"] = round(
+            float(np.abs(decisions["fp32"]["confidence"] - decisions["int8"]["confidence"]).max()), 4
+        )
+        report["speedup"] = round(report["fp32"]["ms_per_doc"] / report["int8"]["ms_per_doc"], 2)
+
+        self.stdout.write(json.dumps(report, indent=2))
+        if opts["json_out"]:
+            with open(opts["json_out"], "w") as f:
+                json.dump(report, f, indent=2)
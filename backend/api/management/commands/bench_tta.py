@@ -0,0 +1,53 @@
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from utils import ml_model
+from ._datasets import DATASETS_DIR, load_content_filtering
+
+
+def _clear_embedding_cache():
+    if ml_model._EMB_CACHE is not None:
+        ml_model._EMB_CACHE.clear()
+
+
+class Command(BaseCommand):
+    help = "Compare sequential vs batched TTA scoring: latency and decision parity."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", type=int, default=50)
+        parser.add_argument("--datasets-dir", default=DATASETS_DIR)
+
+    def handle(self, *args, **opts):
+        docs = [c for c, _ in load_content_filtering(opts["datasets_dir"], opts["limit"])]
+        ml_model.load_models()
+        ml_model.score_batch([docs[0]])  # warm up encoder + classifier
+
+        seq_times, bat_times, mismatches = [], [], 0
+        for html in docs:
+            # Both runs start cold, or the second would mostly hit cached embeddings
+            _clear_embedding_cache()
+            t0 = time.perf_counter()
+            conf = ml_model.confidence_score(html)
+            seq = (conf >= 0.75, ml_model.tta_vote(html, batched=False))
+            seq_times.append(time.perf_counter() - t0)
+
+            _clear_embedding_cache()
+            t0 = time.perf_counter()
+            scores = ml_model.score_batch([html] + ml_model.tta_variants(html))
+            bat = (scores[0] >= 0.75, ml_model.tta_pass_from_scores(scores[1:]))
+            bat_times.append(time.perf_counter() - t0)
+            mismatches += seq != bat
+
+        def fmt(ts):
+            return f"mean {np.mean(ts) * 1000:.1f} ms, p95 {np.percentile(ts, 95) * 1000:.1f} ms"
+
+        self.stdout.write(f"Documents:  {len(docs)}")
+        self.stdout.write(f"Sequential: {fmt(seq_times)}")
+        self.stdout.write(f"Batched:    {fmt(bat_times)}")
+        self.stdout.write(f"Speedup:    {np.mean(seq_times) / np.mean(bat_times):.2f}x")
+        if mismatches:
+            self.stdout.write(self.style.ERROR(f"Decision mismatches: {mismatches}"))
+        else:
+            self.stdout.write(self.style.SUCCESS("Decisions match on every document."))
@@ -0,0 +1,97 @@
+import os
+import sys
+import tempfile
+import subprocess
+
+import psutil
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+# Stand-in for one web worker: import the moderation entry point, score one
+# document, report readiness and idle so its resident memory can be sampled.
+WORKER_SCRIPT = """
+import os, sys, django
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "theramind_backend.settings")
+django.setup()
+from utils.moderation import final_mh_decision
+# mode="full": in fast mode the keywords here would settle it before any model loads
+final_mh_decision(
+    "I have been struggling with anxiety and panic attacks. Therapy helps.", mode="full"
+)
+print("ready", flush=True)
+sys.stdin.read()
+"""
+
+
+def _rss_mb(pids):
+    total = 0
+    for pid in pids:
+        try:
+            total += psutil.Process(pid).memory_info().rss
+        except psutil.NoSuchProcess:
+            pass
+    return total / (1024 * 1024)
+
+
+class Command(BaseCommand):
+    help = "Total RSS of N simulated web workers, in-process models vs the model server."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, nargs="+", default=[2, 4, 8])
+        parser.add_argument("--server-processes", type=int, default=1)
+
+    def handle(self, *args, **opts):
+        self.stdout.write(f"{'workers':>8} {'in-process MB':>15} {'model server MB':>16}")
+        for n in opts["workers"]:
+            inproc = self._measure(n, socket_path=None, server_procs=0)
+            with tempfile.TemporaryDirectory() as tmp:
+                served = self._measure(
+                    n, os.path.join(tmp, "model.sock"), opts["server_processes"]
+                )
+            self.stdout.write(f"{n:>8} {inproc:>15.0f} {served:>16.0f}")
+
+    def _measure(self, n, socket_path, server_procs):
+        env = os.environ.copy()
+        # Disable the shared cache tier so every worker really scores its document
+        env["ML_CACHE_BACKEND"] = "none"
+        env["ML_SERVER_SOCKET"] = socket_path or ""
+        env["ML_SERVER_FALLBACK"] = "False"
+        env["PYTHONUNBUFFERED"] = "1"
+        procs = []
+        try:
+            if socket_path:
+                server = subprocess.Popen(
+                    [sys.executable, "manage.py", "run_model_server",
+                     "--socket", socket_path, "--processes", str(server_procs)],
+                    cwd=settings.BASE_DIR, env=env,
+                    stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True,
+                )
+                procs.append(server)
+                ready = 0
+                while ready < server_procs:
+                    line = server.stdout.readline()
+                    if not line:
+                        raise RuntimeError("Model server exited during startup")
+                    ready += "Model server ready" in line
+            workers = [
+                subprocess.Popen(
+                    [sys.executable, "-c", WORKER_SCRIPT],
+                    cwd=settings.BASE_DIR, env=env, stdin=subprocess.PIPE,
+                    stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True,
+                )
+                for _ in range(n)
+            ]
+            procs.extend(workers)
+            for w in workers:
+                w.stdout.readline()
+
+            pids = [p.pid for p in procs]
+            if socket_path:
+                pids += [c.pid for c in psutil.Process(server.pid).children()]
+            return _rss_mb(pids)
+        finally:
+            for p in procs:
+                p.terminate()
+            for p in procs:
+                p.wait()
+
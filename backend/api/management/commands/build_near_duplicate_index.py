@@ -0,0 +1,49 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from theramind_backend.config import db
+from utils import near_duplicates
+from utils.pagination import iter_pages
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream every article and patient story from Firestore into the "
+        "near-duplicate index, one page at a time."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--collections", nargs="+", default=["articles", "patient_stories"]
+        )
+        parser.add_argument("--page-size", type=int, default=200)
+        parser.add_argument(
+            "--reset",
+            action="store_true",
+            help="Drop the indexed documents first (moderated texts are kept).",
+        )
+
+    def handle(self, *args, **opts):
+        index = near_duplicates.INDEX
+        started = time.perf_counter()
+        total = 0
+        for name in opts["collections"]:
+            if opts["reset"]:
+                index.clear(prefix=f"{name}/")
+            for page in iter_pages(db, name, ["content"], opts["page_size"]):
+                items = [
+                    (
+                        f"{name}/{d.id}",
+                        near_duplicates.signature((d.to_dict() or {}).get("content") or ""),
+                        None,
+                    )
+                    for d in page
+                ]
+                index.add_many(items)
+                total += sum(1 for _, sig, _ in items if sig is not None)
+                rate = total / (time.perf_counter() - started)
+                self.stdout.write(f"{name}: {total} documents signed ({rate:.1f} docs/s)")
+
+        index.evict()
+        self.stdout.write(self.style.SUCCESS(f"Index: {len(index)} entries"))
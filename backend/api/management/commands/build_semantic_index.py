@@ -0,0 +1,55 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from theramind_backend.config import db
+from utils import semantic_search
+from utils.pagination import iter_pages
+
+
+class Command(BaseCommand):
+    help = (
+        "Embed every article and patient story into the semantic search index, "
+        "optionally training IVF partitions afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--collections", nargs="+", default=list(semantic_search.COLLECTIONS)
+        )
+        parser.add_argument("--batch-size", type=int, default=32)
+        parser.add_argument("--page-size", type=int, default=200)
+        parser.add_argument(
+            "--reset", action="store_true", help="Empty the index before building."
+        )
+        parser.add_argument(
+            "--ivf",
+            type=int,
+            metavar="NLIST",
+            help="Train NLIST partitions for ML_SEARCH_MODE=ivf (about sqrt(documents)).",
+        )
+
+    def handle(self, *args, **opts):
+        index = semantic_search.INDEX
+        if opts["reset"]:
+            index.clear()
+
+        started = time.perf_counter()
+        total = 0
+        for name in opts["collections"]:
+            for page in iter_pages(db, name, ["title", "content"], opts["page_size"]):
+                docs = [(d.id, d.to_dict() or {}) for d in page]
+                for i in range(0, len(docs), opts["batch_size"]):
+                    total += semantic_search.index_documents(
+                        name, docs[i : i + opts["batch_size"]]
+                    )
+                rate = total / (time.perf_counter() - started)
+                self.stdout.write(f"{name}: {total} documents indexed ({rate:.1f} docs/s)")
+
+        if opts["ivf"]:
+            t0 = time.perf_counter()
+            nlist = index.train_ivf(opts["ivf"])
+            self.stdout.write(
+                f"Trained {nlist} IVF partitions in {time.perf_counter() - t0:.1f} s"
+            )
+        self.stdout.write(self.style.SUCCESS(f"Index: {index.stats()}"))
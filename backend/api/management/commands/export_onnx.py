@@ -0,0 +1,87 @@
+import os
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from utils import onnx_backend as ob
+
+
+class Command(BaseCommand):
+    help = "Export the SBERT encoder and MH classifier to ONNX for the onnx inference backend."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--opset", type=int, default=17)
+        parser.add_argument(
+            "--quantize",
+            action="store_true",
+            help="Also write a dynamically int8-quantized copy of the encoder.",
+        )
+        parser.add_argument(
+            "--out-dir", default=os.path.join(settings.ML_MODELS_DIR, ob.ONNX_DIR)
+        )
+
+    def handle(self, *args, **opts):
+        try:
+            import onnx  # noqa: F401
+            import tf2onnx  # noqa: F401
+        except ImportError as e:
+            raise CommandError(
+                f"{e}. The exporters are not in requirements.txt; "
+                "run `pip install -r requirements-export.txt` first."
+            )
+        os.makedirs(opts["out_dir"], exist_ok=True)
+        with open(os.path.join(settings.ML_MODELS_DIR, "model_config.json")) as f:
+            cfg = json.load(f)
+
+        encoder_path = os.path.join(opts["out_dir"], ob.ENCODER_FILE)
+        self.export_encoder(encoder_path, opts["opset"])
+        self.stdout.write(self.style.SUCCESS(f"Encoder    -> {encoder_path}"))
+
+        if opts["quantize"]:
+            from onnxruntime.quantization import QuantType, quantize_dynamic
+
+            int8_path = os.path.join(opts["out_dir"], ob.ENCODER_INT8_FILE)
+            quantize_dynamic(encoder_path, int8_path, weight_type=QuantType.QInt8)
+            self.stdout.write(self.style.SUCCESS(f"Int8 enc.  -> {int8_path}"))
+
+        clf_path = os.path.join(opts["out_dir"], ob.CLASSIFIER_FILE)
+        self.export_classifier(clf_path, cfg, opts["opset"])
+        self.stdout.write(self.style.SUCCESS(f"Classifier -> {clf_path}"))
+
+    def export_encoder(self, path, opset):
+        # Only the transformer is exported; pooling + normalize run in numpy at serve time
+        import torch
+        from transformers import AutoModel, AutoTokenizer
+
+        model_dir = os.path.join(settings.ML_MODELS_DIR, "final_fine_tuned_sbert_model")
+        tokenizer = AutoTokenizer.from_pretrained(model_dir)
+        model = AutoModel.from_pretrained(model_dir).eval()
+        sample = tokenizer(["Exporting the encoder."], return_tensors="pt")
+        names = ["input_ids", "attention_mask", "token_type_ids"]
+        dynamic = {"batch": 0, "tokens": 1}
+
+        with torch.no_grad():
+            torch.onnx.export(
+                model,
+                tuple(sample[n] for n in names),
+                path,
+                input_names=names,
+                output_names=["last_hidden_state"],
+                dynamic_axes={n: dynamic for n in names + ["last_hidden_state"]},
+                opset_version=opset,
+            )
+
+    def export_classifier(self, path, cfg, opset):
+        import tensorflow as tf
+        import tf2onnx
+
+        clf = tf.keras.models.load_model(
+            os.path.join(settings.ML_MODELS_DIR, "final_mh_classifier.h5")
+        )
+        spec = [
+            tf.TensorSpec(
+                [None, cfg["MAX_SEQ_LEN"], cfg["EMBED_DIM"]], tf.float32, name="embeddings"
+            )
+        ]
+        tf2onnx.convert.from_keras(clf, input_signature=spec, opset=opset, output_path=path)
@@ -0,0 +1,56 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from utils import ml_model
+from utils.moderation_batcher import ModerationBatcher
+from ._datasets import DATASETS_DIR, load_content_filtering
+
+
+class Command(BaseCommand):
+    help = "Throughput of concurrent moderation calls with and without micro-batching."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--concurrency", type=int, nargs="+", default=[8, 16, 32])
+        parser.add_argument("--requests", type=int, default=64)
+        parser.add_argument("--max-batch-docs", type=int, default=settings.ML_BATCH_MAX_DOCS)
+        parser.add_argument("--max-wait-ms", type=float, default=settings.ML_BATCH_MAX_WAIT_MS)
+        parser.add_argument("--datasets-dir", default=DATASETS_DIR)
+
+    def handle(self, *args, **opts):
+        docs = [
+            c for c, _ in load_content_filtering(opts["datasets_dir"], opts["requests"])
+        ]
+        ml_model.load_models()
+        ml_model.score_batch([docs[0]])  # warm up
+
+        for workers in opts["concurrency"]:
+            base = self._run(docs, workers, batcher=False)
+            batcher = ModerationBatcher(
+                ml_model.score_batch,
+                opts["max_batch_docs"],
+                opts["max_wait_ms"],
+                registry=ml_model.REGISTRY,
+            )
+            batched = self._run(docs, workers, batcher=batcher)
+            stats = batcher.stats()
+            self.stdout.write(
+                f"concurrency={workers:>3}  "
+                f"unbatched {len(docs) / base:6.2f} req/s  "
+                f"batched {len(docs) / batched:6.2f} req/s  "
+                f"gain {base / batched:.2f}x  "
+                f"avg batch {stats['avg_batch_docs']} docs  "
+                f"max queue {stats['max_queue_depth']}  "
+                f"avg wait {stats['avg_wait_ms']} ms"
+            )
+
+    def _run(self, docs, workers, batcher):
+        # Each run starts cold, or the second would mostly hit cached embeddings
+        if ml_model._EMB_CACHE is not None:
+            ml_model._EMB_CACHE.clear()
+        t0 = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(lambda html: ml_model.moderate(html, batcher=batcher), docs))
+        return time.perf_counter() - t0
@@ -0,0 +1,47 @@
+import time
+from collections import Counter
+
+from django.core.management.base import BaseCommand
+
+from theramind_backend.config import db
+from utils import tag_counts
+from utils.pagination import iter_pages
+
+
+class Command(BaseCommand):
+    help = (
+        "Recount tags over every article and patient story and overwrite the "
+        "tag_counts aggregate documents."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--collections", nargs="+", default=list(tag_counts.COLLECTIONS)
+        )
+        parser.add_argument("--page-size", type=int, default=500)
+        parser.add_argument("--dry-run", action="store_true")
+
+    def handle(self, *args, **opts):
+        for name in opts["collections"]:
+            t0 = time.perf_counter()
+            counts = Counter()
+            scanned = 0
+            for page in iter_pages(db, name, ["tags", "date_time"], opts["page_size"]):
+                scanned += len(page)
+                for doc in page:
+                    counts.update(
+                        tag_counts.deltas(new_tags=tag_counts.counted_tags(doc.to_dict() or {}))
+                    )
+
+            self.stdout.write(
+                f"{name}: {len(counts)} tags over {scanned} documents "
+                f"({time.perf_counter() - t0:.1f} s)"
+            )
+            for tag, n in counts.most_common(10):
+                self.stdout.write(f"  {n:>6}  {tag}")
+            if not opts["dry_run"]:
+                db.collection(tag_counts.TAG_COUNTS).document(name).set(
+                    {"counts": dict(counts)}
+                )
+                tag_counts.invalidate(name)
+        self.stdout.write(self.style.SUCCESS("Done"))
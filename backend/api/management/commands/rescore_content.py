@@ -0,0 +1,116 @@
+import os
+import json
+import time
+from datetime import datetime
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from theramind_backend.config import db
+from utils.moderation import final_mh_decisions
+from utils.moderation_cache import model_fingerprint
+from utils.pagination import iter_pages
+
+COLLECTIONS = ("articles", "patient_stories")
+DEFAULT_CHECKPOINT = os.path.join(
+    settings.ML_MODELS_DIR, "cache", "rescore_checkpoint.json"
+)
+MAX_BATCH_WRITES = 500  # Firestore limit per batched write
+
+
+class Command(BaseCommand):
+    help = (
+        "Re-score every article and patient story with the current model and write "
+        "the verdicts back. Streams page by page and resumes from a checkpoint."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--collections", nargs="+", default=list(COLLECTIONS))
+        parser.add_argument("--page-size", type=int, default=200)
+        parser.add_argument("--batch-size", type=int, default=32)
+        parser.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT)
+        parser.add_argument(
+            "--restart", action="store_true", help="Ignore the checkpoint."
+        )
+        parser.add_argument(
+            "--dry-run", action="store_true", help="Score but do not write."
+        )
+
+    def handle(self, *args, **opts):
+        fingerprint = model_fingerprint()
+        checkpoint = {} if opts["restart"] else self._load(opts["checkpoint"])
+        if checkpoint.get("model") != fingerprint:
+            # A different model means every verdict is stale again
+            checkpoint = {"model": fingerprint}
+
+        for name in opts["collections"]:
+            state = checkpoint.setdefault(name, {"last_id": None, "done": False, "scored": 0})
+            if state["done"]:
+                self.stdout.write(f"{name}: already done ({state['scored']} documents)")
+                continue
+            self._rescore(name, state, checkpoint, fingerprint, opts)
+
+    def _rescore(self, name, state, checkpoint, fingerprint, opts):
+        started = time.perf_counter()
+        run_scored = 0
+        # Only the content field is needed; the checkpoint is the last id handled
+        pages = iter_pages(db, name, ["content"], opts["page_size"], state["last_id"])
+        for page in pages:
+            for i in range(0, len(page), opts["batch_size"]):
+                chunk = page[i : i + opts["batch_size"]]
+                docs = [d for d in chunk if (d.to_dict() or {}).get("content")]
+                verdicts = final_mh_decisions(
+                    [d.to_dict()["content"] for d in docs]
+                )
+                if not opts["dry_run"]:
+                    self._write(name, docs, verdicts, fingerprint)
+
+            state["last_id"] = page[-1].id
+            state["scored"] += len(page)
+            run_scored += len(page)
+            self._save(opts["checkpoint"], checkpoint)
+
+            rate = run_scored / (time.perf_counter() - started)
+            self.stdout.write(
+                f"{name}: {state['scored']} documents ({rate:.1f} docs/s)"
+            )
+
+        state["done"] = True
+        self._save(opts["checkpoint"], checkpoint)
+        self.stdout.write(self.style.SUCCESS(f"{name}: done, {state['scored']} documents"))
+
+    def _write(self, name, docs, verdicts, fingerprint):
+        now = datetime.utcnow()
+        for i in range(0, len(docs), MAX_BATCH_WRITES):
+            batch = db.batch()
+            chunk = zip(
+                docs[i : i + MAX_BATCH_WRITES], verdicts[i : i + MAX_BATCH_WRITES]
+            )
+            for doc, verdict in chunk:
+                batch.update(
+                    db.collection(name).document(doc.id),
+                    {
+                        "moderation": {
+                            "valid": verdict["valid"],
+                            "confidence_score": verdict["confidence_score"],
+                            "votes": verdict["votes"],
+                            "note": verdict["note"],
+                            "model": fingerprint,
+                            "scored_at": now,
+                        }
+                    },
+                )
+            batch.commit()
+
+    def _load(self, path):
+        if not os.path.exists(path):
+            return {}
+        with open(path) as f:
+            return json.load(f)
+
+    def _save(self, path, checkpoint):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(checkpoint, f, indent=2)
+        os.replace(tmp, path)
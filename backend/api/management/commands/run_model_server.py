@@ -0,0 +1,22 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from utils.model_server import serve
+
+
+class Command(BaseCommand):
+    help = "Run the local inference server that owns the moderation models."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--socket", default=settings.ML_SERVER_SOCKET)
+        parser.add_argument(
+            "--processes", type=int, default=settings.ML_SERVER_PROCESSES
+        )
+
+    def handle(self, *args, **opts):
+        if not opts["socket"]:
+            raise CommandError("Set ML_SERVER_SOCKET or pass --socket.")
+        self.stdout.write(
+            f"Serving moderation on {opts['socket']} with {opts['processes']} process(es)"
+        )
+        serve(opts["socket"], processes=opts["processes"])
@@ -25,6 +25,7 @@ class PatientStory(models.Model):
     tags = models.JSONField()
 
 
+# Tag popularity itself lives in Firestore (tag_counts/<collection>, see utils.tag_counts)
 class Tag(models.Model):
     name = models.CharField(
         max_length=255, unique=True
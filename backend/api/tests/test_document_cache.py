@@ -0,0 +1,125 @@
+import threading
+import time
+
+from django.test import SimpleTestCase
+
+from utils.document_cache import DocumentCache
+
+PATH = "articles/a"
+
+
+class _Firestore:
+    """Fake DocumentCache._fetch: returns the current value, optionally blocking or failing."""
+
+    def __init__(self, value=({"title": "v1"}, 1)):
+        self.value = value
+        self.calls = 0
+        self.error = None
+        self.gate = None  # threading.Event the fetch waits on
+        self.started = threading.Event()
+
+    def __call__(self, path, timeout):
+        self.calls += 1
+        value = self.value  # read before blocking, like a Firestore read in flight
+        self.started.set()
+        if self.gate is not None:
+            self.gate.wait(5)
+        if self.error is not None:
+            raise self.error
+        return value
+
+
+class DocumentCacheTests(SimpleTestCase):
+    def _cache(self, **kwargs):
+        cache = DocumentCache(**kwargs)
+        cache._fetch = self.firestore = _Firestore()
+        return cache
+
+    def test_hits_within_the_ttl(self):
+        cache = self._cache(ttl=60)
+        self.assertEqual(cache.get(PATH), {"title": "v1"})
+        self.assertEqual(cache.get_versioned(PATH), ({"title": "v1"}, 1))
+        self.assertEqual(self.firestore.calls, 1)
+
+    def test_missing_documents_are_cached(self):
+        cache = self._cache(ttl=60)
+        self.firestore.value = (None, None)
+        self.assertIsNone(cache.get(PATH))
+        self.assertIsNone(cache.get(PATH))
+        self.assertEqual(self.firestore.calls, 1)
+
+    def test_concurrent_misses_share_one_read(self):
+        cache = self._cache(ttl=60)
+        self.firestore.gate = threading.Event()
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(cache.get(PATH)))
+            for _ in range(8)
+        ]
+        for t in threads:
+            t.start()
+        self.assertTrue(self.firestore.started.wait(5))
+        time.sleep(0.05)  # let the others queue up behind the leader
+        self.firestore.gate.set()
+        for t in threads:
+            t.join(5)
+        self.assertEqual(self.firestore.calls, 1)
+        self.assertEqual(results, [{"title": "v1"}] * 8)
+
+    def test_serves_stale_when_a_refresh_fails(self):
+        cache = self._cache(ttl=0.01, stale_for=60)
+        cache.get(PATH)
+        time.sleep(0.02)
+        self.firestore.error = TimeoutError("deadline exceeded")
+        self.assertEqual(cache.get(PATH), {"title": "v1"})
+        self.assertEqual(self.firestore.calls, 2)
+
+    def test_raises_when_nothing_usable_is_cached(self):
+        cache = self._cache(ttl=0.01, stale_for=0.01)
+        self.firestore.error = TimeoutError("deadline exceeded")
+        with self.assertRaises(TimeoutError):
+            cache.get(PATH)
+        self.firestore.error = None
+        cache.get(PATH)
+        time.sleep(0.03)  # past ttl + stale_for
+        self.firestore.error = TimeoutError("deadline exceeded")
+        with self.assertRaises(TimeoutError):
+            cache.get(PATH)
+
+    def test_invalidate_during_a_fetch_does_not_store_the_old_value(self):
+        cache = self._cache(ttl=60)
+        self.firestore.gate = threading.Event()
+        results = []
+        reader = threading.Thread(target=lambda: results.append(cache.get(PATH)))
+        reader.start()
+        self.assertTrue(self.firestore.started.wait(5))
+
+        # A write lands while the read is in flight
+        self.firestore.value = ({"title": "v2"}, 2)
+        cache.invalidate(PATH)
+        self.firestore.gate.set()
+        reader.join(5)
+
+        self.assertEqual(results, [{"title": "v1"}])  # that reader saw the old version
+        self.assertEqual(cache.get(PATH), {"title": "v2"})
+        self.assertEqual(self.firestore.calls, 2)
+
+    def test_invalidate_forces_a_fresh_read(self):
+        cache = self._cache(ttl=60)
+        cache.get(PATH)
+        self.firestore.value = ({"title": "v2"}, 2)
+        cache.invalidate(PATH)
+        self.assertEqual(cache.get(PATH), {"title": "v2"})
+
+    def test_least_recently_used_entries_are_evicted(self):
+        cache = self._cache(ttl=60, max_entries=2)
+        cache.get("articles/a")
+        cache.get("articles/b")
+        cache.get("articles/a")
+        cache.get("articles/c")
+        self.assertEqual(cache.stats()["entries"], 2)
+        calls = self.firestore.calls
+        cache.get("articles/a")
+        self.assertEqual(self.firestore.calls, calls)
+        cache.get("articles/b")
+        self.assertEqual(self.firestore.calls, calls + 1)
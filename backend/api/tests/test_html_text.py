@@ -0,0 +1,46 @@
+from django.test import SimpleTestCase
+
+from utils import html_text
+from utils.html_text import iter_blocks, normalized_text
+
+
+class HtmlTextTests(SimpleTestCase):
+    def test_block_tags_separate_text(self):
+        html = "<h1>Coping</h1><p>First  paragraph</p><ul><li>one</li><li>two</li></ul>end"
+        self.assertEqual(
+            list(iter_blocks(html)), ["Coping", "First paragraph", "one", "two", "end"]
+        )
+
+    def test_inline_tags_do_not_split_words(self):
+        self.assertEqual(
+            normalized_text("<p>I feel <b>much</b> bet<i>ter</i> now</p>"),
+            "I feel much better now",
+        )
+
+    def test_entities_are_decoded(self):
+        self.assertEqual(
+            normalized_text("<p>Tom&nbsp;&amp;&nbsp;Jerry&#8217;s &lt;3</p>"),
+            "Tom & Jerry’s <3",
+        )
+
+    def test_non_rendered_contents_are_dropped(self):
+        html = (
+            "<head><title>t</title></head><p>Visible</p>"
+            "<script>var x = '<p>hidden</p>';</script>"
+            "<style>p { color: red }</style><p>Also visible</p>"
+        )
+        self.assertEqual(normalized_text(html), "Visible\nAlso visible")
+
+    def test_whitespace_only_blocks_are_skipped(self):
+        self.assertEqual(list(iter_blocks("<p> \n\t</p><br><p>x</p>")), ["x"])
+
+    def test_chunked_input_matches_whole_input(self):
+        html = "<p>" + "word &amp; " * 50 + "</p><div>tail<br/>end</div>"
+        chunks = [html[i : i + 7] for i in range(0, len(html), 7)]
+        self.assertEqual(list(iter_blocks(chunks)), list(iter_blocks(html)))
+
+    def test_long_strings_are_fed_in_chunks(self):
+        html = "<p>" + "a " * html_text.CHUNK_SIZE + "</p><p>b</p>"
+        blocks = list(iter_blocks(html))
+        self.assertEqual(len(blocks), 2)
+        self.assertEqual(blocks[1], "b")
@@ -0,0 +1,95 @@
+from datetime import datetime, timedelta, timezone
+
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from django.utils.http import http_date
+
+from utils import http_cache
+
+PATH = "articles/abc"
+UPDATED = datetime(2024, 5, 1, 12, 0, 0, 500000, tzinfo=timezone.utc)
+
+
+class ConditionalTests(SimpleTestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.builds = 0
+
+    def _build(self, status=200):
+        def build():
+            self.builds += 1
+            return HttpResponse("body", status=status)
+
+        return build
+
+    def _get(self, update_time=UPDATED, policy=None, status=200, **headers):
+        request = self.factory.get("/api/articles/abc/", **headers)
+        return http_cache.conditional(
+            request, PATH, update_time, self._build(status), policy or http_cache.public_policy()
+        )
+
+    def test_validators_change_with_every_write(self):
+        etag, last_modified = http_cache.validators(PATH, UPDATED)
+        self.assertEqual(http_cache.validators(PATH, UPDATED), (etag, last_modified))
+        self.assertNotEqual(
+            http_cache.validators(PATH, UPDATED + timedelta(microseconds=1))[0], etag
+        )
+        self.assertNotEqual(http_cache.validators("articles/other", UPDATED)[0], etag)
+        self.assertEqual(http_cache.validators(PATH, None), (None, None))
+
+    @override_settings(CONTENT_CACHE_MAX_AGE=60, CONTENT_CACHE_STALE_SECONDS=300)
+    def test_first_read_gets_validators_and_cache_control(self):
+        response = self._get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["ETag"], http_cache.validators(PATH, UPDATED)[0])
+        # Rounded up, never before the write itself
+        self.assertEqual(response["Last-Modified"], http_date(UPDATED.timestamp() + 0.5))
+        cache_control = {d.strip() for d in response["Cache-Control"].split(",")}
+        self.assertEqual(
+            cache_control, {"public", "max-age=60", "stale-while-revalidate=300"}
+        )
+
+    def test_matching_etag_is_answered_with_304_without_building(self):
+        etag = self._get()["ETag"]
+        response = self._get(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+        self.assertEqual(self.builds, 1)
+
+    def test_stale_etag_gets_the_new_body(self):
+        etag = self._get()["ETag"]
+        response = self._get(UPDATED + timedelta(seconds=1), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_if_modified_since_alone_is_not_trusted(self):
+        since = self._get()["Last-Modified"]
+        # Written again within the same second: the dates match, the versions do not
+        later = UPDATED + timedelta(milliseconds=300)
+        response = self._get(later, HTTP_IF_MODIFIED_SINCE=since)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Last-Modified"], since)
+
+    def test_etag_decides_when_both_validators_are_sent(self):
+        first = self._get()
+        response = self._get(
+            HTTP_IF_NONE_MATCH=first["ETag"], HTTP_IF_MODIFIED_SINCE=first["Last-Modified"]
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_private_policy(self):
+        response = self._get(policy=http_cache.private_policy())
+        cache_control = {d.strip() for d in response["Cache-Control"].split(",")}
+        self.assertEqual(cache_control, {"private", "no-cache"})
+
+    def test_errors_are_left_alone(self):
+        response = self._get(status=404)
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(response.has_header("ETag"))
+        self.assertFalse(response.has_header("Cache-Control"))
+
+    def test_without_update_time_there_are_no_validators(self):
+        response = self._get(None, HTTP_IF_NONE_MATCH="*")
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header("ETag"))
+        self.assertTrue(response.has_header("Cache-Control"))
@@ -0,0 +1,37 @@
+from unittest import mock
+
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from theramind_backend import views
+
+
+@override_settings(METRICS_TOKEN="s3cret", METRICS_ALLOWED_IPS=["127.0.0.1", "10.0.0.0/8"])
+class MetricsViewTests(SimpleTestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+        patcher = mock.patch.object(
+            views.prometheus, "render", lambda: (b"up 1\n", "text/plain")
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _get(self, remote_addr="203.0.113.7", **headers):
+        request = self.factory.get("/metrics", REMOTE_ADDR=remote_addr, **headers)
+        return views.metrics(request)
+
+    def test_allowed_addresses_and_networks(self):
+        self.assertEqual(self._get("127.0.0.1").status_code, 200)
+        self.assertEqual(self._get("10.1.2.3").content, b"up 1\n")
+
+    def test_other_addresses_are_refused(self):
+        self.assertEqual(self._get().status_code, 403)
+        self.assertEqual(self._get("not an address").status_code, 403)
+
+    def test_bearer_token(self):
+        self.assertEqual(self._get(HTTP_AUTHORIZATION="Bearer s3cret").status_code, 200)
+        self.assertEqual(self._get(HTTP_AUTHORIZATION="Bearer wrong").status_code, 403)
+        self.assertEqual(self._get(HTTP_AUTHORIZATION="s3cret").status_code, 403)
+
+    @override_settings(METRICS_TOKEN="")
+    def test_no_token_configured_means_no_token_access(self):
+        self.assertEqual(self._get(HTTP_AUTHORIZATION="Bearer ").status_code, 403)
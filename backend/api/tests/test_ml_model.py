@@ -0,0 +1,192 @@
+from contextlib import contextmanager
+from types import SimpleNamespace
+from unittest import mock
+
+import numpy as np
+from django.test import SimpleTestCase
+
+from utils import ml_model
+from utils.moderation_cache import LRUCache
+
+
+class _FakeRegistry:
+    def __init__(self, version="v1"):
+        self.models = SimpleNamespace(version=version)
+
+    @contextmanager
+    def use(self):
+        yield self.models
+
+
+class FastModeTests(SimpleTestCase):
+    """moderate_fast must reach moderate()'s verdict with fewer scored texts."""
+
+    # html -> (base score, [score of variant 0..TTA_N-1])
+    CASES = {
+        "confident": (0.9, [0.1] * ml_model.TTA_N),
+        "tta majority": (0.5, [0.7, 0.2, 0.8, 0.9, 0.7, 0.66, 0.1]),
+        "tta majority at the end": (0.5, [0.1, 0.1, 0.7, 0.7, 0.7, 0.7, 0.7]),
+        "tta one short": (0.5, [0.7, 0.7, 0.7, 0.7, 0.1, 0.1, 0.1]),
+        "nothing": (0.2, [0.1] * ml_model.TTA_N),
+        "i manage my anxiety with therapy": (0.1, [0.1] * ml_model.TTA_N),
+    }
+
+    def setUp(self):
+        self.scored = []
+
+        def score_batch(texts):
+            self.scored.extend(texts)
+            out = []
+            for text in texts:
+                html, _, variant = text.partition("#v")
+                base, variants = self.CASES[html]
+                out.append(variants[int(variant)] if variant else base)
+            return out
+
+        def tta_variants(html, n=ml_model.TTA_N, start=0):
+            return [f"{html}#v{i}" for i in range(start, n)]
+
+        for name, value in {
+            "score_batch": score_batch,
+            "tta_variants": tta_variants,
+            "REGISTRY": _FakeRegistry(),
+            "model_fingerprint": lambda: "v1",
+            "TTA_BATCHED": True,
+        }.items():
+            patcher = mock.patch.object(ml_model, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_fast_and_full_paths_agree(self):
+        for html in self.CASES:
+            with self.subTest(html=html):
+                full = ml_model.moderate(html, batcher=False)
+                full_scored = len(self.scored)
+                self.scored.clear()
+                fast = ml_model.moderate_fast(html, batcher=False)
+                self.assertEqual(fast["valid"], full["valid"])
+                self.assertLessEqual(len(self.scored), full_scored)
+                for field in ("confidence_pass", "tta_pass", "override_pass"):
+                    if fast[field] is not None:
+                        self.assertEqual(fast[field], full[field])
+                self.assertEqual(
+                    set(fast["stages"]) | set(fast["skipped"]),
+                    {"keyword", "confidence", "tta"},
+                )
+                self.scored.clear()
+
+    def test_exhausted_budget_reuses_scored_stages(self):
+        for html in self.CASES:
+            with self.subTest(html=html):
+                full = ml_model.moderate(html, batcher=False)
+                self.scored.clear()
+                fast = ml_model.moderate_fast(html, budget_ms=0, batcher=False)
+                self.assertEqual(fast["valid"], full["valid"])
+                # Nothing is scored twice, and never more than the full path scores
+                self.assertEqual(len(self.scored), len(set(self.scored)))
+                self.assertLessEqual(len(self.scored), 1 + ml_model.TTA_N)
+                self.scored.clear()
+
+    def test_exhausted_budget_scores_the_remaining_variants_at_once(self):
+        fast = ml_model.moderate_fast("tta majority at the end", budget_ms=0, batcher=False)
+        self.assertTrue(fast["budget_exhausted"])
+        self.assertTrue(fast["tta_pass"])
+        self.assertEqual(fast["tta_variants_scored"], ml_model.TTA_N)
+        self.assertEqual(fast["mode"], "fast")
+
+
+class _FakeEncoder:
+    def __init__(self):
+        self.calls = []
+
+    def encode(self, sents, convert_to_tensor=False):
+        self.calls.append(list(sents))
+        return [np.full(4, len(s), dtype=np.float32) for s in sents]
+
+
+class EncodeSentencesTests(SimpleTestCase):
+    def setUp(self):
+        self.models = SimpleNamespace(version="v1", sbert=_FakeEncoder())
+        for name, value in {
+            "active": lambda: self.models,
+            "_EMB_CACHE": LRUCache(1024 * 1024),
+        }.items():
+            patcher = mock.patch.object(ml_model, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_encodes_each_distinct_sentence_once(self):
+        embs = ml_model.encode_sentences(["a", "bb", "a", "ccc", "bb"])
+        self.assertEqual(self.models.sbert.calls, [["a", "bb", "ccc"]])
+        self.assertEqual(embs.shape, (5, 4))
+        self.assertEqual(list(embs[:, 0]), [1, 2, 1, 3, 2])
+
+    def test_reuses_cached_embeddings(self):
+        ml_model.encode_sentences(["a", "bb"])
+        embs = ml_model.encode_sentences(["bb", "dddd", "a"])
+        self.assertEqual(self.models.sbert.calls, [["a", "bb"], ["dddd"]])
+        self.assertEqual(list(embs[:, 0]), [2, 4, 1])
+
+    def test_keys_change_with_the_model_version(self):
+        self.assertNotEqual(ml_model._embed_key("a", "v1"), ml_model._embed_key("a", "v2"))
+        ml_model.encode_sentences(["a"])
+        self.models = SimpleNamespace(version="v2", sbert=_FakeEncoder())
+        ml_model.encode_sentences(["a"])
+        self.assertEqual(self.models.sbert.calls, [["a"]])
+
+    def test_empty_input(self):
+        self.assertEqual(len(ml_model.encode_sentences([])), 0)
+        self.assertEqual(self.models.sbert.calls, [])
+
+
+class SlidingWindowTests(SimpleTestCase):
+    L, STRIDE, MAX = 10, 4, 3
+
+    def setUp(self):
+        self.parsed = 0
+
+        def iter_sentences(html):
+            for i in range(int(html)):
+                self.parsed += 1
+                yield f"s{i}."
+
+        for target, name, value in [
+            (ml_model, "active", lambda: SimpleNamespace(cfg={"MAX_SEQ_LEN": self.L})),
+            (ml_model, "WINDOW_MODE", "sliding"),
+            (ml_model, "WINDOW_STRIDE", self.STRIDE),
+            (ml_model, "WINDOW_MAX", self.MAX),
+            (ml_model, "PREPROCESSOR", "stream"),
+            (ml_model.html_text, "iter_sentences", iter_sentences),
+        ]:
+            patcher = mock.patch.object(target, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_limit_covers_every_window(self):
+        limit = ml_model.sentence_limit()
+        self.assertEqual(limit, (self.MAX - 1) * self.STRIDE + self.L)
+        for n in range(1, 3 * limit):
+            with self.subTest(n=n):
+                self.assertEqual(
+                    ml_model.window_spans(min(n, limit)), ml_model.window_spans(n)
+                )
+
+    def test_long_documents_are_parsed_only_up_to_the_limit(self):
+        scored = []
+
+        def classify(batch):
+            scored.append(len(batch))
+            return np.tile([0.5, 0.5], (len(batch), 1))
+
+        for name, value in {
+            "classify": classify,
+            "encode_sentences": lambda sents: np.ones((len(sents), 4), np.float32),
+            "pad_embeds": lambda embs: np.zeros((self.L, 4), np.float32),
+        }.items():
+            patcher = mock.patch.object(ml_model, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        ml_model.score_batch(["1000"])
+        self.assertEqual(self.parsed, ml_model.sentence_limit())
+        self.assertEqual(scored, [self.MAX])
@@ -0,0 +1,167 @@
+import threading
+import time
+from types import SimpleNamespace
+
+from django.test import SimpleTestCase
+
+from utils.model_registry import ModelRegistry
+
+
+class _Loader:
+    """Fake loader: each call returns a new bundle v1, v2, ... after a delay."""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        time.sleep(self.delay)
+        with self._lock:
+            self.calls += 1
+            return SimpleNamespace(version=f"v{self.calls}")
+
+
+def _start(target, *args):
+    thread = threading.Thread(target=target, args=args, daemon=True)
+    thread.start()
+    return thread
+
+
+class ModelRegistryTests(SimpleTestCase):
+    def test_concurrent_first_gets_load_once(self):
+        loader = _Loader(delay=0.05)
+        registry = ModelRegistry(loader)
+        barrier = threading.Barrier(8)
+        bundles = []
+
+        def get():
+            barrier.wait()
+            bundles.append(registry.get())
+
+        threads = [_start(get) for _ in range(8)]
+        for t in threads:
+            t.join(5)
+        self.assertEqual(loader.calls, 1)
+        self.assertEqual(len(bundles), 8)
+        self.assertTrue(all(b is bundles[0] for b in bundles))
+
+    def test_concurrent_use_is_capped(self):
+        registry = ModelRegistry(_Loader(), max_concurrent=2)
+        lock = threading.Lock()
+        active, peak, done = [0], [0], []
+
+        def work():
+            with registry.use():
+                with lock:
+                    active[0] += 1
+                    peak[0] = max(peak[0], active[0])
+                time.sleep(0.05)
+                with lock:
+                    active[0] -= 1
+            done.append(True)
+
+        threads = [_start(work) for _ in range(6)]
+        for t in threads:
+            t.join(5)
+        self.assertEqual(len(done), 6)
+        self.assertEqual(peak[0], 2)
+
+    def test_nested_use_keeps_its_bundle_and_slot(self):
+        registry = ModelRegistry(_Loader(), max_concurrent=1)
+        with registry.use() as outer:
+            with registry.use() as inner:  # would deadlock if it took a second slot
+                self.assertIs(inner, outer)
+                self.assertIs(registry.bound(), outer)
+
+    def test_swap_waits_for_in_flight_requests(self):
+        registry = ModelRegistry(_Loader())
+        entered, release = threading.Event(), threading.Event()
+        seen = {}
+
+        def request():
+            with registry.use() as models:
+                entered.set()
+                release.wait(5)
+                seen["pinned"] = registry.bound()
+                seen["held"] = models
+
+        holder = _start(request)
+        entered.wait(5)
+        v1 = registry.current
+        v2 = SimpleNamespace(version="v2")
+        swapped = []
+        swapper = _start(lambda: swapped.append(registry.swap(v2)))
+
+        time.sleep(0.05)
+        self.assertEqual(swapped, [])  # still draining v1
+        with registry.use() as models:
+            self.assertIs(models, v2)  # new requests get the new bundle at once
+        release.set()
+        holder.join(5)
+        swapper.join(5)
+        self.assertEqual(swapped, [True])
+        self.assertIs(seen["pinned"], v1)
+        self.assertIs(seen["held"], v1)
+        self.assertEqual(registry.swaps, 1)
+
+    def test_swap_gives_up_after_the_drain_timeout(self):
+        registry = ModelRegistry(_Loader(), drain_timeout=0.05)
+        entered, release = threading.Event(), threading.Event()
+
+        def request():
+            with registry.use():
+                entered.set()
+                release.wait(5)
+
+        holder = _start(request)
+        entered.wait(5)
+        self.assertFalse(registry.swap(SimpleNamespace(version="v2")))
+        release.set()
+        holder.join(5)
+
+    def test_borrow_pins_without_a_slot_and_delays_swap(self):
+        registry = ModelRegistry(_Loader(), max_concurrent=1)
+        borrowed, release = threading.Event(), threading.Event()
+        seen = {}
+
+        with registry.use() as v1:
+
+            def helper():
+                # The request holds the only slot; borrowing must not need one
+                with registry.borrow(v1) as models:
+                    seen["models"] = models
+                    borrowed.set()
+                    release.wait(5)
+                    seen["bound"] = registry.bound()
+                seen["after"] = getattr(registry._local, "models", None)
+
+            thread = _start(helper)
+            self.assertTrue(borrowed.wait(5))
+
+        swapped = []
+        swapper = _start(lambda: swapped.append(registry.swap(SimpleNamespace(version="v2"))))
+        time.sleep(0.05)
+        self.assertEqual(swapped, [])  # the borrower still uses v1
+        release.set()
+        thread.join(5)
+        swapper.join(5)
+        self.assertEqual(swapped, [True])
+        self.assertIs(seen["models"], v1)
+        self.assertIs(seen["bound"], v1)
+        self.assertIsNone(seen["after"])
+        self.assertEqual(registry._inflight, {})
+
+    def test_version_change_reloads_in_the_background(self):
+        loader = _Loader()
+        on_disk = ["v1"]
+        registry = ModelRegistry(loader, version_fn=lambda: on_disk[0])
+        self.assertEqual(registry.get().version, "v1")
+        on_disk[0] = "v2"
+        with registry.use() as models:
+            self.assertEqual(models.version, "v1")  # the request is not held up
+        deadline = time.monotonic() + 5
+        while registry.current.version != "v2" and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(registry.current.version, "v2")
+        self.assertEqual(loader.calls, 2)
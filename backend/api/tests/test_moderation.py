@@ -0,0 +1,37 @@
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from utils import moderation
+from utils.moderation_cache import LRUCache
+
+
+class FinalDecisionsTests(SimpleTestCase):
+    def setUp(self):
+        self.scored = []
+
+        def moderate_batch(htmls):
+            self.scored.extend(htmls)
+            return [{"valid": "ok" in html} for html in htmls]
+
+        for name, value in {
+            "_CACHE": LRUCache(),
+            "_moderate_batch": moderate_batch,
+            # Markup aside, equal texts share a key, as with the stream preprocessor
+            "cache_key": lambda html: "v1:" + html.replace("<p>", "").replace("</p>", ""),
+        }.items():
+            patcher = mock.patch.object(moderation, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_duplicates_in_one_request_are_scored_once(self):
+        results = moderation.final_mh_decisions(["ok", "bad", "<p>ok</p>", "ok", "bad"])
+        self.assertEqual(self.scored, ["ok", "bad"])
+        self.assertEqual([r["valid"] for r in results], [True, False, True, True, False])
+
+    def test_cached_verdicts_are_not_rescored(self):
+        moderation.final_mh_decisions(["ok"])
+        self.scored.clear()
+        results = moderation.final_mh_decisions(["bad", "ok", "bad"])
+        self.assertEqual(self.scored, ["bad"])
+        self.assertEqual([r["valid"] for r in results], [False, True, False])
@@ -0,0 +1,114 @@
+import threading
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+from django.test import SimpleTestCase
+
+from utils.moderation_batcher import ModerationBatcher
+
+
+class _Registry:
+    """Fake ModelRegistry: bound() is the bundle pinned by the calling thread."""
+
+    def __init__(self):
+        self._local = threading.local()
+        self.borrowed = []
+
+    def bound(self):
+        return getattr(self._local, "models", None)
+
+    @contextmanager
+    def borrow(self, models):
+        self.borrowed.append(models)
+        self._local.models = models
+        try:
+            yield models
+        finally:
+            self._local.models = None
+
+
+def _score_concurrently(batcher, requests, registry=None):
+    """Call batcher.score from one thread per request; requests are texts, or
+    (models, texts) pairs to pin in registry. Returns scores or errors in order."""
+    results = [None] * len(requests)
+
+    def call(i, request):
+        if registry is not None:
+            registry._local.models, request = request
+        try:
+            results[i] = batcher.score(request, timeout=5)
+        except Exception as e:
+            results[i] = e
+
+    threads = [threading.Thread(target=call, args=item) for item in enumerate(requests)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(5)
+    return results
+
+
+class ModerationBatcherTests(SimpleTestCase):
+    def setUp(self):
+        self.calls = []
+
+    def _score_fn(self, texts):
+        self.calls.append(list(texts))
+        return [len(t) for t in texts]
+
+    def test_scores_go_back_to_their_callers(self):
+        batcher = ModerationBatcher(self._score_fn, max_batch_docs=3, max_wait_ms=1000)
+        results = _score_concurrently(batcher, [["a", "bb"], ["ccc"], ["dddd", "e"]])
+        self.assertEqual(results, [[1, 2], [3], [4, 1]])
+        self.assertEqual(len(self.calls), 1)  # one score call for all three
+        self.assertEqual(sorted(self.calls[0]), ["a", "bb", "ccc", "dddd", "e"])
+
+    def test_flushes_when_the_batch_is_full(self):
+        # The deadline is far away, so only the size can trigger the flush
+        batcher = ModerationBatcher(self._score_fn, max_batch_docs=2, max_wait_ms=60_000)
+        self.assertEqual(_score_concurrently(batcher, [["a"], ["bb"]]), [[1], [2]])
+        stats = batcher.stats()
+        self.assertEqual((stats["flush_full"], stats["flush_deadline"]), (1, 0))
+
+    def test_flushes_when_the_oldest_caller_has_waited_long_enough(self):
+        batcher = ModerationBatcher(self._score_fn, max_batch_docs=16, max_wait_ms=20)
+        self.assertEqual(batcher.score(["abc"], timeout=5), [3])
+        stats = batcher.stats()
+        self.assertEqual((stats["flush_full"], stats["flush_deadline"]), (0, 1))
+        self.assertEqual(stats["docs"], 1)
+
+    def test_errors_reach_every_waiter_of_the_batch(self):
+        def fail(texts):
+            raise RuntimeError("model crashed")
+
+        batcher = ModerationBatcher(fail, max_batch_docs=2, max_wait_ms=60_000)
+        results = _score_concurrently(batcher, [["a"], ["b"]])
+        for result in results:
+            self.assertIsInstance(result, RuntimeError)
+            self.assertEqual(str(result), "model crashed")
+        # The worker survives and serves the next batch
+        batcher.score_fn = self._score_fn
+        batcher.max_wait = 0.01
+        self.assertEqual(batcher.score(["abc"], timeout=5), [3])
+
+    def test_callers_are_grouped_by_pinned_model(self):
+        registry = _Registry()
+        v1, v2 = SimpleNamespace(version="v1"), SimpleNamespace(version="v2")
+        seen = []
+
+        def score_fn(texts):
+            seen.append((registry.bound(), sorted(texts)))
+            return [len(t) for t in texts]
+
+        batcher = ModerationBatcher(
+            score_fn, max_batch_docs=3, max_wait_ms=60_000, registry=registry
+        )
+        results = _score_concurrently(
+            batcher, [(v1, ["a"]), (v2, ["bb"]), (v1, ["ccc"])], registry=registry
+        )
+        self.assertEqual(results, [[1], [2], [3]])
+        # Each bundle scores only its own callers' texts, under that bundle
+        self.assertEqual(
+            sorted(seen, key=lambda s: s[0].version), [(v1, ["a", "ccc"]), (v2, ["bb"])]
+        )
+        self.assertEqual(sorted(m.version for m in registry.borrowed), ["v1", "v2"])
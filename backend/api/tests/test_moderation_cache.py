@@ -0,0 +1,175 @@
+import os
+import tempfile
+
+from django.test import SimpleTestCase, override_settings
+from prometheus_client import REGISTRY
+
+from utils import moderation_cache
+from utils.moderation_cache import LRUCache, ModerationCache, SQLiteStore
+
+
+class LRUCacheTests(SimpleTestCase):
+    def test_evicts_least_recently_used_over_byte_budget(self):
+        cache = LRUCache(max_bytes=30)
+        cache.set("a", 1, size=10)
+        cache.set("b", 2, size=10)
+        cache.set("c", 3, size=10)
+        self.assertEqual(cache.get("a"), 1)  # b is now the oldest
+        cache.set("d", 4, size=10)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual([cache.get(k) for k in "acd"], [1, 3, 4])
+        self.assertEqual(cache.stats()["bytes"], 30)
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+    def test_replacing_a_key_keeps_the_byte_count(self):
+        cache = LRUCache(max_bytes=100)
+        cache.set("a", 1, size=40)
+        cache.set("a", 2, size=50)
+        self.assertEqual(cache.get("a"), 2)
+        self.assertEqual(cache.stats()["bytes"], 50)
+
+    def test_oversized_values_are_not_stored(self):
+        cache = LRUCache(max_bytes=10)
+        cache.set("a", "x" * 100)
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.stats()["entries"], 0)
+
+    def test_removals_are_exported(self):
+        def removals(reason):
+            return REGISTRY.get_sample_value(
+                "lru_cache_removals_total", {"cache": "test", "reason": reason}
+            ) or 0
+
+        evicted, expired = removals("evicted"), removals("expired")
+        cache = LRUCache(max_bytes=10, ttl=60, name="test")
+        cache.set("a", 1, size=10)
+        cache.set("b", 2, size=10)
+        expires_at, size, value = cache._data["b"]
+        cache._data["b"] = (expires_at - 120, size, value)
+        cache.get("b")
+        self.assertEqual(removals("evicted"), evicted + 1)
+        self.assertEqual(removals("expired"), expired + 1)
+
+    def test_expired_entries_miss(self):
+        cache = LRUCache(ttl=60)
+        cache.set("a", 1)
+        expires_at, size, value = cache._data["a"]
+        cache._data["a"] = (expires_at - 120, size, value)
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.stats()["expirations"], 1)
+
+
+class SQLiteStoreTests(SimpleTestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = os.path.join(self.tmp.name, "cache", "moderation.sqlite3")
+
+    def _age(self, store, key, seconds):
+        store._connection().execute(
+            "UPDATE moderation_cache SET created_at = created_at - ? WHERE key = ?",
+            (seconds, key),
+        )
+
+    def test_round_trip_is_shared_between_instances(self):
+        SQLiteStore(self.path).set("k", {"valid": True, "votes": [1, 0]})
+        self.assertEqual(SQLiteStore(self.path).get("k"), {"valid": True, "votes": [1, 0]})
+        self.assertIsNone(SQLiteStore(self.path).get("missing"))
+
+    def test_expired_rows_miss_and_are_purged(self):
+        store = SQLiteStore(self.path, ttl=60)
+        store.set("old", 1)
+        store.set("new", 2)
+        self._age(store, "old", 120)
+        self.assertIsNone(store.get("old"))
+        store.set("old2", 3)
+        self._age(store, "old2", 120)
+        self.assertEqual(store.purge_expired(), 1)
+        self.assertEqual(store.get("new"), 2)
+
+    def test_writes_purge_periodically(self):
+        store = SQLiteStore(self.path, ttl=60, purge_every=2)
+        store.set("old", 1)
+        self._age(store, "old", 120)
+        store.set("new", 2)  # second write triggers the purge
+        (n,) = store._connection().execute("SELECT COUNT(*) FROM moderation_cache").fetchone()
+        self.assertEqual(n, 1)
+
+
+class _FailingStore:
+    def get(self, key):
+        raise OSError("unavailable")
+
+    def set(self, key, value):
+        raise OSError("unavailable")
+
+
+class ModerationCacheTests(SimpleTestCase):
+    def test_shared_hits_are_promoted_to_the_local_tier(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            shared = SQLiteStore(os.path.join(tmp, "m.sqlite3"))
+            shared.set("k", {"valid": False})
+            cache = ModerationCache(LRUCache(), shared)
+            self.assertEqual(cache.get("k"), {"valid": False})
+            self.assertEqual(cache.local.get("k"), {"valid": False})
+            self.assertEqual(cache.stats()["shared_hits"], 1)
+
+    def test_shared_tier_failures_are_not_fatal(self):
+        cache = ModerationCache(LRUCache(), _FailingStore())
+        cache.set("k", 1)
+        self.assertEqual(cache.get("k"), 1)
+        self.assertIsNone(cache.get("other"))
+        self.assertEqual(cache.stats()["shared_errors"], 2)
+
+
+class FingerprintTests(SimpleTestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self._write("model_config.json", '{"threshold": 0.5}')
+        moderation_cache._fingerprint = None
+        self.addCleanup(setattr, moderation_cache, "_fingerprint", None)
+
+    def _write(self, rel, content):
+        with open(os.path.join(self.tmp.name, rel), "w") as f:
+            f.write(content)
+
+    def test_changes_with_model_files(self):
+        before = moderation_cache.model_fingerprint(self.tmp.name)
+        self.assertEqual(moderation_cache.model_fingerprint(self.tmp.name), before)
+        self._write("model_config.json", '{"threshold": 0.75}')
+        self.assertNotEqual(moderation_cache.model_fingerprint(self.tmp.name), before)
+
+    def test_changes_with_inference_settings(self):
+        with override_settings(ML_INFERENCE_BACKEND="tf"):
+            tf = moderation_cache.model_fingerprint(self.tmp.name)
+        with override_settings(ML_INFERENCE_BACKEND="onnx"):
+            onnx = moderation_cache.model_fingerprint(self.tmp.name)
+        self.assertNotEqual(tf, onnx)
+
+    def test_hot_reload_invalidates_cache_keys(self):
+        with override_settings(
+            ML_MODELS_DIR=self.tmp.name,
+            ML_MODEL_HOT_RELOAD=True,
+            ML_MODEL_RELOAD_CHECK_SECONDS=0,
+        ):
+            before = moderation_cache.cache_key("<p>Some text</p>")
+            self._write("model_config.json", '{"threshold": 0.75, "retrained": true}')
+            after = moderation_cache.cache_key("<p>Some text</p>")
+        self.assertNotEqual(before.split(":")[0], after.split(":")[0])
+        self.assertEqual(before.split(":")[1], after.split(":")[1])
+
+    @override_settings(ML_PREPROCESSOR="regex")
+    def test_regex_mode_keys_on_the_exact_text(self):
+        # keyword_override reads the raw html in regex mode and matches "mental health"
+        self.assertNotEqual(
+            moderation_cache.text_digest("mental\nhealth"),
+            moderation_cache.text_digest("mental health"),
+        )
+
+    @override_settings(ML_PREPROCESSOR="stream")
+    def test_markup_only_edits_share_a_key(self):
+        self.assertEqual(
+            moderation_cache.text_digest("<p>I feel  better today.</p>"),
+            moderation_cache.text_digest("<div><b>I feel better</b> today.</div>"),
+        )
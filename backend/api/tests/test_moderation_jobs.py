@@ -0,0 +1,136 @@
+import os
+import tempfile
+import time
+from unittest import mock
+
+from django.test import SimpleTestCase
+from django.urls import reverse
+
+from utils.moderation_jobs import ModerationJobs, QueueFull
+
+
+class ModerationJobsTests(SimpleTestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = os.path.join(tmp.name, "jobs", "moderation_jobs.sqlite3")
+
+    def _jobs(self, **kwargs):
+        # workers=0: nothing claims jobs unless the test does
+        kwargs.setdefault("workers", 0)
+        return ModerationJobs(self.path, lambda html, mode, budget_ms: {"valid": True}, **kwargs)
+
+    def _shift(self, jobs, column, job_id, seconds):
+        jobs._connection().execute(
+            f"UPDATE moderation_jobs SET {column} = {column} - ? WHERE id = ?",
+            (seconds, job_id),
+        )
+
+    def test_claims_highest_priority_then_oldest(self):
+        jobs = self._jobs()
+        for html, priority in [
+            ("low", "low"),
+            ("normal 1", "normal"),
+            ("high", "high"),
+            ("normal 2", "normal"),
+        ]:
+            jobs.submit(html, priority=priority)
+            time.sleep(0.002)  # distinct created_at
+        order = []
+        while (job := jobs._claim()) is not None:
+            order.append(job[1])
+        self.assertEqual(order, ["high", "normal 1", "normal 2", "low"])
+
+    def test_rejects_unknown_priorities(self):
+        with self.assertRaises(ValueError):
+            self._jobs().submit("x", priority="urgent")
+
+    def test_queue_bound_counts_only_waiting_jobs(self):
+        jobs = self._jobs(max_queued=2)
+        jobs.submit("a")
+        jobs.submit("b")
+        with self.assertRaises(QueueFull):
+            jobs.submit("c")
+        jobs._claim()  # a running job no longer counts
+        jobs.submit("c")
+        self.assertEqual(jobs.stats(), {"queued": 2, "running": 1, "max_queued": 2})
+
+    def test_workers_run_jobs_and_store_the_verdict(self):
+        jobs = self._jobs(workers=1, poll_interval=0.01)
+        # No check of the status submit returns: the worker may already have finished
+        job = jobs.submit("<p>text</p>", mode="fast", budget_ms=50)
+        deadline = time.monotonic() + 5
+        while jobs.get(job["job_id"])["status"] != "done" and time.monotonic() < deadline:
+            time.sleep(0.01)
+        done = jobs.get(job["job_id"])
+        self.assertEqual(done["status"], "done")
+        self.assertEqual(done["result"], {"valid": True})
+        (html,) = jobs._connection().execute(
+            "SELECT html FROM moderation_jobs WHERE id = ?", (job["job_id"],)
+        ).fetchone()
+        self.assertIsNone(html)  # content is dropped once the verdict is stored
+
+    def test_failures_are_recorded(self):
+        jobs = self._jobs()
+        job_id = jobs.submit("x")["job_id"]
+        jobs._claim()
+        jobs._finish(job_id, error="boom")
+        self.assertEqual(jobs.get(job_id)["status"], "failed")
+        self.assertEqual(jobs.get(job_id)["error"], "boom")
+
+    def test_finished_jobs_expire(self):
+        jobs = self._jobs(result_ttl=60)
+        job_id = jobs.submit("x")["job_id"]
+        jobs._claim()
+        jobs._finish(job_id, result={"valid": False})
+        self.assertIsNotNone(jobs.get(job_id))
+        self._shift(jobs, "finished_at", job_id, 120)
+        self.assertIsNone(jobs.get(job_id))
+        jobs.purge()
+        (n,) = jobs._connection().execute("SELECT COUNT(*) FROM moderation_jobs").fetchone()
+        self.assertEqual(n, 0)
+
+    def test_jobs_of_dead_workers_fail(self):
+        jobs = self._jobs(stale_after=60)
+        job_id = jobs.submit("x")["job_id"]
+        jobs._claim()
+        self._shift(jobs, "started_at", job_id, 120)
+        jobs.purge()
+        job = jobs.get(job_id)
+        self.assertEqual(job["status"], "failed")
+        self.assertEqual(job["error"], "Worker exited before finishing")
+
+
+class CreateValidationJobViewTests(SimpleTestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        jobs = ModerationJobs(
+            os.path.join(tmp.name, "moderation_jobs.sqlite3"),
+            lambda html, mode, budget_ms: {"valid": True},
+            workers=0,
+            max_queued=1,
+        )
+        patcher = mock.patch("api.views.JOBS", jobs)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _post(self, **body):
+        return self.client.post(
+            reverse("validation-jobs"), body, content_type="application/json"
+        )
+
+    def test_full_queue_answers_429(self):
+        first = self._post(content="<p>one</p>", priority="high")
+        self.assertEqual(first.status_code, 202)
+        self.assertEqual(first.json()["priority"], "high")
+        self.assertIn(first.json()["job_id"], first.json()["status_url"])
+
+        full = self._post(content="<p>two</p>")
+        self.assertEqual(full.status_code, 429)
+        self.assertEqual(full["Retry-After"], "5")
+
+    def test_invalid_requests_answer_400(self):
+        self.assertEqual(self._post(content="").status_code, 400)
+        self.assertEqual(self._post(content="x", priority="urgent").status_code, 400)
+        self.assertEqual(self._post(content="x", budget_ms="soon").status_code, 400)
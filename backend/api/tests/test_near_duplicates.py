@@ -0,0 +1,136 @@
+import os
+import random
+import sqlite3
+import tempfile
+
+from django.test import SimpleTestCase
+
+from utils import near_duplicates
+from utils.near_duplicates import NearDuplicateIndex, signature
+
+_rng = random.Random(3)
+VOCAB = [f"word{i}" for i in range(2000)]
+
+
+def _text(n=200):
+    return " ".join(_rng.choice(VOCAB) for _ in range(n))
+
+
+class SignatureTests(SimpleTestCase):
+    def test_markup_does_not_change_the_signature(self):
+        words = _text().split()
+        plain = "<p>" + " ".join(words) + "</p>"
+        styled = (
+            "<div><h2>" + " ".join(words[:5]) + "</h2><script>track()</script><p><b>"
+            + " ".join(words[5:50]) + "</b> " + " ".join(words[50:]) + "</p></div>"
+        )
+        self.assertEqual(near_duplicates.similarity(signature(plain), signature(styled)), 1.0)
+
+    def test_similarity_estimates_jaccard(self):
+        words = _text().split()
+        edited = list(words)
+        edited[100] = "changed"
+        near = near_duplicates.similarity(signature(" ".join(words)), signature(" ".join(edited)))
+        self.assertGreater(near, 0.8)
+        far = near_duplicates.similarity(signature(" ".join(words)), signature(_text()))
+        self.assertLess(far, 0.2)
+
+    def test_texts_without_words_have_no_signature(self):
+        self.assertIsNone(signature(""))
+        self.assertIsNone(signature("<p> &nbsp; </p><script>x = 1</script>"))
+        self.assertIsNotNone(signature("Short"))
+
+
+class _FailingConnection:
+    """Wraps a sqlite3 connection; raises on the first statement removing entries."""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def execute(self, sql, *args):
+        if sql.startswith("DELETE FROM entries"):
+            raise sqlite3.OperationalError("disk I/O error")
+        return self.conn.execute(sql, *args)
+
+
+class NearDuplicateIndexTests(SimpleTestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.index = NearDuplicateIndex(
+            os.path.join(tmp.name, "cache", "near_duplicates.sqlite3"), threshold=0.8
+        )
+
+    def test_finds_near_duplicates_only(self):
+        words = _text().split()
+        self.index.add("articles/a", signature(" ".join(words)))
+        self.index.add("articles/b", signature(_text()))
+        words[10] = "edited"
+        matches = self.index.lookup(signature(" ".join(words)))
+        self.assertEqual([m[0] for m in matches], ["articles/a"])
+        self.assertGreater(matches[0][2], 0.8)
+        self.assertEqual(self.index.lookup(signature(_text())), [])
+        self.assertEqual(self.index.lookup(None), [])
+
+    def test_exclude_skips_the_document_itself(self):
+        sig = signature(_text())
+        self.index.add("articles/a", sig)
+        self.assertEqual(self.index.lookup(sig, exclude="articles/a"), [])
+
+    def test_add_replaces_and_remove_deletes(self):
+        first, second = signature(_text()), signature(_text())
+        self.index.add("articles/a", first, digest="d1")
+        self.index.add("articles/a", second, digest="d2")
+        self.assertEqual(len(self.index), 1)
+        self.assertEqual(self.index.lookup(first), [])
+        self.assertEqual(self.index.lookup(second)[0][:2], ("articles/a", "d2"))
+        self.index.remove("articles/a")
+        self.assertEqual(len(self.index), 0)
+        self.assertEqual(self.index.lookup(second), [])
+
+    def test_evicts_moderated_texts_before_documents(self):
+        self.index.max_entries = 3
+        docs = [signature(_text()) for _ in range(3)]
+        self.index.add_many([(f"articles/{i}", sig, None) for i, sig in enumerate(docs)])
+        self.index.add("text:abc", signature(_text()), digest="abc")
+        self.assertEqual(self.index.evict(), 1)
+        self.assertEqual(len(self.index), 3)
+        for i, sig in enumerate(docs):
+            self.assertEqual(self.index.lookup(sig)[0][0], f"articles/{i}")
+
+        self.index.add("articles/3", signature(_text()))
+        self.index.evict()
+        self.assertEqual(self.index.lookup(docs[0]), [])  # the oldest document goes next
+
+    def test_clear_by_prefix(self):
+        story, article = signature(_text()), signature(_text())
+        self.index.add("patient_stories/s", story)
+        self.index.add("articles/a", article)
+        self.index.clear(prefix="articles/")
+        self.assertEqual(self.index.lookup(article), [])
+        self.assertEqual(self.index.lookup(story)[0][0], "patient_stories/s")
+        self.index.clear()
+        self.assertEqual(len(self.index), 0)
+
+    def test_failed_writes_roll_back(self):
+        sig = signature(_text())
+        self.index.add("articles/a", sig)
+        self.index.add("text:abc", signature(_text()))
+        self.index.max_entries = 1
+        conn = self.index._connection()
+        self.index._local.conn = _FailingConnection(conn)
+        for write in (
+            lambda: self.index.remove("articles/a"),
+            lambda: self.index.clear(),
+            lambda: self.index.clear(prefix="articles/"),
+            self.index.evict,
+        ):
+            with self.assertRaises(sqlite3.OperationalError):
+                write()
+            self.assertFalse(conn.in_transaction)
+        self.index._local.conn = conn
+        # Nothing was half-deleted, and the connection takes new transactions
+        self.assertEqual(len(self.index), 2)
+        self.assertEqual(self.index.lookup(sig)[0][0], "articles/a")
+        self.index.remove("articles/a")
+        self.assertEqual(len(self.index), 1)
@@ -0,0 +1,53 @@
+import base64
+import json
+from datetime import datetime, timezone
+
+from django.test import SimpleTestCase
+
+from utils.pagination import InvalidPageToken, decode_token, encode_token
+
+
+class _Doc:
+    def __init__(self, doc_id, date_time):
+        self.id = doc_id
+        self._data = {"date_time": date_time}
+
+    def get(self, field):
+        return self._data[field]
+
+
+class PageTokenTests(SimpleTestCase):
+    def setUp(self):
+        self.when = datetime(2024, 5, 1, 12, 30, 15, 123456, tzinfo=timezone.utc)
+        self.doc = _Doc("abc123", self.when)
+
+    def test_round_trip(self):
+        token = encode_token("articles", "sleep", 3, self.doc)
+        cursor, page = decode_token(token, "articles", "sleep")
+        self.assertEqual(cursor, {"date_time": self.when, "__name__": "abc123"})
+        self.assertEqual(page, 3)
+
+    def test_tokens_are_url_safe(self):
+        token = encode_token("articles", "ängste/ü?", 1, _Doc("a/b+c", self.when))
+        self.assertRegex(token, r"^[A-Za-z0-9_-]+$")
+        self.assertEqual(decode_token(token, "articles", "ängste/ü?")[0]["__name__"], "a/b+c")
+
+    def test_token_is_bound_to_its_listing(self):
+        token = encode_token("articles", None, 1, self.doc)
+        self.assertEqual(decode_token(token, "articles", None)[1], 1)
+        with self.assertRaises(InvalidPageToken):
+            decode_token(token, "patient_stories", None)
+        with self.assertRaises(InvalidPageToken):
+            decode_token(token, "articles", "sleep")
+
+    def test_malformed_tokens_are_rejected(self):
+        missing_page = base64.urlsafe_b64encode(
+            json.dumps({"c": "articles", "t": None, "d": self.when.isoformat(), "id": "x"}).encode()
+        ).decode()
+        bad_date = base64.urlsafe_b64encode(
+            json.dumps({"c": "articles", "t": None, "p": 1, "d": "yesterday", "id": "x"}).encode()
+        ).decode()
+        for token in ["", "not a token", "%%%", "bnVsbA", missing_page, bad_date]:
+            with self.subTest(token=token):
+                with self.assertRaises(InvalidPageToken):
+                    decode_token(token, "articles", None)
@@ -0,0 +1,24 @@
+from django.test import SimpleTestCase
+
+from utils.semantic_search import document_text
+
+
+class DocumentTextTests(SimpleTestCase):
+    def test_title_is_its_own_sentence(self):
+        self.assertEqual(
+            document_text({"title": "Coping", "content": "<p>Anxiety is common.</p>"}),
+            "Coping. Anxiety is common.",
+        )
+
+    def test_entities_are_decoded_and_blocks_end_sentences(self):
+        text = document_text(
+            {
+                "title": "Sleep & Stress?",
+                "content": "<h2>Why it matters</h2><p>Rest&nbsp;&amp; recovery</p>",
+            }
+        )
+        self.assertEqual(text, "Sleep & Stress? Why it matters. Rest & recovery.")
+
+    def test_missing_fields(self):
+        self.assertEqual(document_text({"content": "<p>Body</p>"}), "Body.")
+        self.assertEqual(document_text({"title": "Only title"}), "Only title.")
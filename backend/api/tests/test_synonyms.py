@@ -0,0 +1,56 @@
+import os
+import random
+import tempfile
+import unittest
+
+from django.test import SimpleTestCase
+
+from utils import synonyms
+
+try:
+    from nltk.corpus import wordnet as wn
+
+    wn.ensure_loaded()
+except (ImportError, LookupError):
+    wn = None
+
+# Regular and irregular inflections of every part of speech, and words WordNet does not know
+SAMPLE = [
+    "cat", "cats", "buses", "wolves", "boxes", "waltzes", "churches", "wishes",
+    "men", "women", "firemen", "studies", "flies", "countries", "geese", "mice",
+    "running", "ran", "worried", "hoped", "hopping", "makes", "goes", "went",
+    "happier", "happiest", "larger", "largest", "better", "best", "quickly",
+    "sadness", "anxieties", "therapies", "coping", "panicked", "ies", "xyzzy",
+]
+
+
+@unittest.skipIf(wn is None, "WordNet is not installed")
+class SynonymTableTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.forms = synonyms._surface_forms(wn)
+
+    def test_every_word_wordnet_resolves_is_a_key(self):
+        rng = random.Random(7)
+        lemmas = rng.sample(sorted(wn.all_lemma_names()), 300)
+        words = set(SAMPLE)
+        for lemma in lemmas:
+            for suffix in ("", "s", "es", "ies", "ed", "d", "ing", "er", "est", "men"):
+                words.add(lemma + suffix)
+                words.add(lemma[:-1] + suffix)
+        for word in sorted(words):
+            if wn.synsets(word):
+                with self.subTest(word=word):
+                    self.assertIn(word, self.forms)
+
+    def test_lookups_match_wordnet(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "synonyms.bin")
+            synonyms.write_table(path, synonyms.lookup_table(wn, self.forms & set(SAMPLE)))
+            table = synonyms.SynonymTable(path)
+            for word in SAMPLE + [w.upper() for w in SAMPLE]:
+                with self.subTest(word=word):
+                    self.assertEqual(
+                        table.lemma_names(word), synonyms.wordnet_lemma_names(word)
+                    )
@@ -0,0 +1,92 @@
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from utils import tag_counts
+
+
+class _Documents:
+    """Fake DOCUMENTS holding the tag_counts documents."""
+
+    def __init__(self, **collections):
+        self.docs = {
+            tag_counts.counts_path(name): {"counts": counts}
+            for name, counts in collections.items()
+        }
+
+    def get(self, path):
+        return self.docs.get(path)
+
+
+class DeltasTests(SimpleTestCase):
+    def test_edit_counts_only_added_and_removed_tags(self):
+        self.assertEqual(
+            tag_counts.deltas(["anxiety", "sleep"], ["sleep", "therapy"]),
+            {"anxiety": -1, "therapy": 1},
+        )
+
+    def test_create_and_delete(self):
+        self.assertEqual(tag_counts.deltas(new_tags=["a", "b"]), {"a": 1, "b": 1})
+        self.assertEqual(tag_counts.deltas(old_tags=["a"]), {"a": -1})
+        self.assertEqual(tag_counts.deltas(["a"], ["a"]), {})
+
+    def test_duplicates_and_junk_are_ignored(self):
+        self.assertEqual(tag_counts.deltas(new_tags=["a", "a", "", None, 3]), {"a": 1})
+        self.assertEqual(tag_counts.deltas(["a", "a"], ["a"]), {})
+
+    def test_only_listed_documents_count(self):
+        self.assertEqual(tag_counts.counted_tags({"tags": ["a"], "date_time": 1}), ["a"])
+        # submit_content stores no date_time, so the listings never show it
+        self.assertIsNone(tag_counts.counted_tags({"tags": ["a"]}))
+        self.assertEqual(
+            tag_counts.deltas(
+                tag_counts.counted_tags({"tags": ["a"]}),
+                tag_counts.counted_tags({"tags": ["a"], "date_time": 1}),
+            ),
+            {"a": 1},
+        )
+
+
+class FacetsTests(SimpleTestCase):
+    def setUp(self):
+        documents = _Documents(
+            articles={"Anxiety": 3, "anger": 1, "Sleep": 5, "ant": 0, "apathy": -2},
+            patient_stories={"Anxiety": 2, "sleep": 1},
+        )
+        for name, value in {"DOCUMENTS": documents, "_SORTED": {}}.items():
+            patcher = mock.patch.object(tag_counts, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_most_used_first(self):
+        self.assertEqual(
+            tag_counts.facets("articles"),
+            [
+                {"tag": "Sleep", "count": 5},
+                {"tag": "Anxiety", "count": 3},
+                {"tag": "anger", "count": 1},
+            ],
+        )
+
+    def test_prefix_is_case_insensitive(self):
+        for prefix in ("an", "AN", "An"):
+            with self.subTest(prefix=prefix):
+                self.assertEqual(
+                    [f["tag"] for f in tag_counts.facets("articles", prefix=prefix)],
+                    ["Anxiety", "anger"],
+                )
+        self.assertEqual(tag_counts.facets("articles", prefix="x"), [])
+
+    def test_zero_and_negative_counts_are_hidden(self):
+        names = [f["tag"] for f in tag_counts.facets("articles", prefix="a")]
+        self.assertNotIn("ant", names)
+        self.assertNotIn("apathy", names)
+
+    def test_collections_are_summed(self):
+        self.assertEqual(tag_counts.counts()["Anxiety"], 5)
+        self.assertEqual(
+            tag_counts.facets(prefix="anx"), [{"tag": "Anxiety", "count": 5}]
+        )
+
+    def test_limit(self):
+        self.assertEqual(len(tag_counts.facets("articles", limit=2)), 2)
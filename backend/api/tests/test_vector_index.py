@@ -0,0 +1,113 @@
+import tempfile
+
+import numpy as np
+from django.test import SimpleTestCase
+
+from utils.vector_index import VectorIndex
+
+DIM = 8
+
+
+def _vec(axis, noise=0.0, rng=None):
+    v = np.zeros(DIM, dtype=np.float32)
+    v[axis] = 1.0
+    if noise:
+        v += rng.normal(0, noise, DIM).astype(np.float32)
+    return v
+
+
+class VectorIndexTests(SimpleTestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = tmp.name
+        self.index = VectorIndex(self.path)
+        self.rng = np.random.default_rng(0)
+
+    def _keys(self, results):
+        return [r[0] for r in results]
+
+    def test_brute_search_ranks_by_cosine(self):
+        self.index.upsert("articles/x", _vec(0) * 5, "articles", "X")
+        self.index.upsert("articles/xy", _vec(0) + _vec(1), "articles", "XY")
+        self.index.upsert("articles/y", _vec(1), "articles", "Y")
+        results = self.index.search(_vec(0), k=2)
+        self.assertEqual(self._keys(results), ["articles/x", "articles/xy"])
+        self.assertAlmostEqual(results[0][1], 1.0, places=3)
+        self.assertAlmostEqual(results[1][1], 2 ** -0.5, places=3)
+        self.assertEqual(results[0][2:], ("articles", "X"))
+
+    def test_collection_filter(self):
+        self.index.upsert("articles/a", _vec(0), "articles")
+        self.index.upsert("patient_stories/s", _vec(0), "patient_stories")
+        results = self.index.search(_vec(0), k=5, collection="patient_stories")
+        self.assertEqual(self._keys(results), ["patient_stories/s"])
+
+    def test_upsert_replaces_and_delete_reuses_rows(self):
+        row = self.index.upsert("articles/a", _vec(0))
+        self.assertEqual(self.index.upsert("articles/a", _vec(1)), row)
+        self.assertEqual(self._keys(self.index.search(_vec(1), k=1)), ["articles/a"])
+        self.index.upsert("articles/b", _vec(2))
+        self.assertTrue(self.index.delete("articles/a"))
+        self.assertFalse(self.index.delete("articles/a"))
+        self.assertEqual(self.index.upsert("articles/c", _vec(3)), row)
+        self.assertEqual(len(self.index), 2)
+
+    def test_dimension_mismatch_is_rejected(self):
+        self.index.upsert("articles/a", _vec(0))
+        with self.assertRaises(ValueError):
+            self.index.upsert("articles/b", np.ones(DIM + 1))
+        self.assertEqual(len(self.index), 1)
+
+    def test_grows_past_the_initial_capacity(self):
+        vectors = self.rng.normal(size=(1100, DIM)).astype(np.float32)
+        for i, v in enumerate(vectors):
+            self.index.upsert(f"articles/{i}", v)
+        self.assertGreaterEqual(self.index.stats()["capacity"], 1100)
+        self.assertEqual(self._keys(self.index.search(vectors[1099], k=1)), ["articles/1099"])
+
+    def test_other_instances_see_writes(self):
+        other = VectorIndex(self.path)
+        self.index.upsert("articles/a", _vec(0))
+        self.assertEqual(self._keys(other.search(_vec(0), k=1)), ["articles/a"])
+        self.index.delete("articles/a")
+        self.assertEqual(other.search(_vec(0), k=1), [])
+
+    def test_ivf_scores_only_probed_partitions(self):
+        for i in range(20):
+            self.index.upsert(f"articles/x{i}", _vec(0, 0.05, self.rng))
+            self.index.upsert(f"articles/y{i}", _vec(1, 0.05, self.rng))
+        self.assertEqual(self.index.train_ivf(2), 2)
+        # Added after training: assigned to its nearest partition
+        self.index.upsert("articles/x-late", _vec(0, 0.05, self.rng))
+
+        ivf = VectorIndex(self.path, mode="ivf", nprobe=1)
+        keys = self._keys(ivf.search(_vec(0), k=100))
+        self.assertEqual(len(keys), 21)
+        self.assertTrue(all(k.startswith("articles/x") for k in keys))
+        self.assertNotIn("articles/x-late", self._keys(ivf.search(_vec(1), k=100)))
+
+        ivf.nprobe = 2
+        self.assertEqual(len(ivf.search(_vec(0), k=100)), 41)
+        self.assertEqual(ivf.stats()["partitions"], 2)
+
+    def test_rows_without_a_partition_are_always_scored(self):
+        for i in range(10):
+            self.index.upsert(f"articles/x{i}", _vec(0, 0.05, self.rng))
+            self.index.upsert(f"articles/y{i}", _vec(1, 0.05, self.rng))
+        self.index.train_ivf(2)
+        self.index._connection().execute(
+            "UPDATE entries SET cluster = -1 WHERE key = 'articles/y0'"
+        )
+        self.index._bump(self.index._connection())
+
+        ivf = VectorIndex(self.path, mode="ivf", nprobe=1)
+        self.assertIn("articles/y0", self._keys(ivf.search(_vec(0), k=100)))
+
+    def test_clear(self):
+        self.index.upsert("articles/a", _vec(0))
+        self.index.train_ivf(1)
+        self.index.clear()
+        self.assertEqual(len(self.index), 0)
+        self.assertEqual(self.index.search(_vec(0)), [])
+        self.assertEqual(self.index.stats()["partitions"], 0)
@@ -36,6 +36,11 @@ from .views import (
     mark_action_complete,
     get_treatment_plan,
     validate_content,
+    validate_content_batch,
+    create_validation_job,
+    validation_job_status,
+    search_semantic,
+    get_tags,
     TheraChatView,
     health_check,
     dummy_test,
@@ -61,9 +66,22 @@ urlpatterns = [
         delete_patient_story,
         name="delete_patient_story",
     ),
+    path("search/semantic/", search_semantic, name="search_semantic"),
+    path("tags/", get_tags, name="get_tags"),
     path("test-cors/", test_cors, name="test-cors"),
     # -------ML Model-----------------
     path("validate-content/", validate_content, name="validate-content"),
+    path(
+        "validate-content/batch/",
+        validate_content_batch,
+        name="validate-content-batch",
+    ),
+    path("validate-content/jobs/", create_validation_job, name="validation-jobs"),
+    path(
+        "validate-content/jobs/<str:job_id>/",
+        validation_job_status,
+        name="validation-job-status",
+    ),
     # ------ TREATMENT PLAN ----------
     # Create and manage treatment plans
     path("treatment/create/", create_treatment_plan, name="create_treatment_plan"),
@@ -9,6 +9,8 @@ from rest_framework.pagination import PageNumberPagination
 from rest_framework.permissions import IsAuthenticated
 
 from django.http import JsonResponse
+from django.urls import reverse
+from django.utils.cache import patch_cache_control
 from django.views.decorators.csrf import csrf_exempt
 
 from theramind_backend.config import db, initialize_firebase
@@ -34,7 +36,13 @@ from django.views.decorators.csrf import csrf_exempt
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
-from utils.ml_model import final_mh_decision
+from utils.moderation import JOBS, final_mh_decision, final_mh_decisions
+from utils.moderation_jobs import PRIORITIES, QueueFull
+from utils import near_duplicates, pagination, semantic_search
+from utils.content_summary import LISTING_FIELDS, summary_fields
+from utils import document_cache
+from utils.document_cache import DOCUMENTS
+from utils import http_cache, tag_counts
 
 import traceback
 from google.oauth2 import service_account
@@ -54,8 +62,6 @@ from google.auth import default as google_auth_default
 
 from dotenv import load_dotenv
 
-import google.generativeai as genai
-from google.generativeai import types
 import base64  # Not explicitly used in your snippet, but keep if needed elsewhere
 
 from dotenv import load_dotenv
@@ -116,18 +122,28 @@ def health_check(request):
 
 
 from django.views.decorators.http import require_http_methods
+from django.conf import settings
 
 
 @require_http_methods(["OPTIONS", "POST"])
 @api_view(["POST"])
 def validate_content(request):
     html = request.data.get("content", "").strip()
+    # "full" (default) runs every stage; "fast" stops once the verdict is settled
+    mode = request.data.get("mode")
+    budget_ms = request.data.get("budget_ms")
 
     if not html:
         return Response({"error": "No content."}, status=400)
+    if mode not in (None, "fast", "full"):
+        return Response({"error": "mode must be 'fast' or 'full'."}, status=400)
+    try:
+        budget_ms = _parse_budget(budget_ms)
+    except ValueError as e:
+        return Response({"error": str(e)}, status=400)
 
     try:
-        res = final_mh_decision(html)
+        res = final_mh_decision(html, mode=mode, budget_ms=budget_ms)
         if not isinstance(res, dict):
             raise ValueError("Model response is not a dictionary")
 
@@ -153,6 +169,105 @@ def validate_content(request):
         return JsonResponse({"error": str(e)}, status=500)
 
 
+def _parse_budget(value):
+    """budget_ms from a request body: None when absent, else a positive number of milliseconds."""
+    if value in (None, ""):
+        return None
+    try:
+        budget = float(value)
+    except (TypeError, ValueError):
+        raise ValueError("budget_ms must be a number of milliseconds.")
+    if not budget > 0:
+        raise ValueError("budget_ms must be positive.")
+    return budget
+
+
+@api_view(["POST"])
+def validate_content_batch(request):
+    """
+    Score many documents in one call. Body: {"documents": [{"id": ..., "content": ...}]}
+    (plain strings are accepted too). Returns full-mode verdicts in the same order.
+    """
+    documents = request.data.get("documents")
+    if not isinstance(documents, list) or not documents:
+        return Response({"error": "documents must be a non-empty list."}, status=400)
+    if len(documents) > settings.ML_BULK_MAX_DOCS:
+        return Response(
+            {"error": f"At most {settings.ML_BULK_MAX_DOCS} documents per call."},
+            status=400,
+        )
+
+    items = [d if isinstance(d, dict) else {"content": d} for d in documents]
+    htmls = [str(item.get("content") or "").strip() for item in items]
+    if not all(htmls):
+        return Response({"error": "Every document needs content."}, status=400)
+
+    try:
+        verdicts = final_mh_decisions(htmls)
+        results = [
+            {"id": item.get("id"), **verdict} for item, verdict in zip(items, verdicts)
+        ]
+        return Response({"results": results})
+    except Exception as e:
+        print("❌ AI batch validation error:", str(e))
+        traceback.print_exc()
+        return JsonResponse({"error": str(e)}, status=500)
+
+
+@api_view(["POST"])
+def create_validation_job(request):
+    """
+    Queue content for moderation and return a job id immediately; poll
+    validation_job_status for the verdict. Body as validate_content, plus an
+    optional "priority" of "high", "normal" (default) or "low".
+    """
+    html = request.data.get("content", "").strip()
+    mode = request.data.get("mode")
+    budget_ms = request.data.get("budget_ms")
+    priority = request.data.get("priority", "normal")
+
+    if not html:
+        return Response({"error": "No content."}, status=400)
+    if mode not in (None, "fast", "full"):
+        return Response({"error": "mode must be 'fast' or 'full'."}, status=400)
+    if priority not in PRIORITIES:
+        return Response(
+            {"error": f"priority must be one of {', '.join(PRIORITIES)}."}, status=400
+        )
+    try:
+        budget_ms = _parse_budget(budget_ms)
+    except ValueError as e:
+        return Response({"error": str(e)}, status=400)
+
+    try:
+        job = JOBS.submit(html, mode=mode, budget_ms=budget_ms, priority=priority)
+    except QueueFull as e:
+        response = Response({"error": f"Moderation queue is full: {e}"}, status=429)
+        response["Retry-After"] = "5"
+        return response
+    except Exception as e:
+        print("❌ AI validation job error:", str(e))
+        traceback.print_exc()
+        return Response({"error": str(e)}, status=500)
+
+    job["status_url"] = request.build_absolute_uri(
+        reverse("validation-job-status", args=[job["job_id"]])
+    )
+    return Response(job, status=202)
+
+
+@api_view(["GET"])
+def validation_job_status(request, job_id):
+    """Status of a queued moderation job; "result" holds the verdict once done."""
+    try:
+        job = JOBS.get(job_id)
+    except Exception as e:
+        return Response({"error": str(e)}, status=500)
+    if job is None:
+        return Response({"error": "Job not found or expired."}, status=404)
+    return Response(job)
+
+
 # Opens up the detail view of the specific article / patient story
 class ArticleDetailView(APIView):
     def get(self, request, pk, format=None):
@@ -216,6 +331,13 @@ def submit_content(request):
                     {"error": "User is neither a doctor nor a patient."}, status=403
                 )
 
+        duplicate, sig = near_duplicates.find_document(content)
+        if duplicate and settings.ML_NEARDUP_REJECT:
+            return Response(
+                {"error": "Near-duplicate of existing content.", "duplicate_of": duplicate},
+                status=409,
+            )
+
         # Prepare document data
         content_data = {
             "title": title,
@@ -225,12 +347,27 @@ def submit_content(request):
             "author_email": user_email,
             "created_at": datetime.utcnow(),
             "updated_at": datetime.utcnow(),
+            "duplicate_of": duplicate,
+            **summary_fields(content),
         }
 
         # Store in Firestore
-        db.collection(collection).document().set(content_data)
+        doc_ref = db.collection(collection).document()
+        batch = db.batch()
+        batch.set(doc_ref, content_data)
+        tag_counts.add_to_batch(
+            batch, db, collection, tag_counts.deltas(new_tags=tag_counts.counted_tags(content_data))
+        )
+        batch.commit()
+        tag_counts.invalidate(collection)
+        near_duplicates.add_document(collection, doc_ref.id, sig)
+        pagination.invalidate_counts(collection)
+        semantic_search.index_document_async(collection, doc_ref.id, content_data)
 
-        return Response({"message": message, "collection": collection}, status=201)
+        return Response(
+            {"message": message, "collection": collection, "duplicate_of": duplicate},
+            status=201,
+        )
 
     except Exception as e:
         return Response({"error": str(e)}, status=500)
@@ -248,31 +385,7 @@ class CustomPagination(PageNumberPagination):
 def get_articles(request):
     """Retrieve paginated articles, with optional filtering by tag."""
     print(f"Received request: {request.GET}")
-    tag = request.GET.get("tag", None)
-    page = int(request.GET.get("page", 1))
-    page_size = int(request.GET.get("page_size", 10))
-
-    articles_ref = db.collection("articles").order_by(
-        "date_time", direction=firestore.Query.DESCENDING
-    )
-
-    if tag:
-        articles_ref = articles_ref.where("tags", "array_contains", tag)
-
-    docs = articles_ref.stream()
-    articles = [doc.to_dict() | {"id": doc.id} for doc in docs]
-
-    total_pages = (len(articles) + page_size - 1) // page_size  # Manual pagination
-    start_index = (page - 1) * page_size
-    end_index = start_index + page_size
-
-    return Response(
-        {
-            "results": articles[start_index:end_index],
-            "total_pages": total_pages,
-            "current_page": page,
-        }
-    )
+    return _list_content(request, "articles")
 
 
 # # Request to get the patient stories by recency in paginated format for the list page
@@ -280,42 +393,116 @@ def get_articles(request):
 def get_patient_stories(request):
     """Retrieve paginated patient stories, with optional filtering by tag."""
     print(f"Received request: {request.GET}")
+    return _list_content(request, "patient_stories")
+
+
+def _list_content(request, collection):
+    # Follow next_page_token for the next page; ?page=N still works but reads the skipped documents.
+    # ?view=summary returns only the listing fields (snippet instead of content).
     tag = request.GET.get("tag", None)
-    page = int(request.GET.get("page", 1))
-    page_size = int(request.GET.get("page_size", 10))
+    view = request.GET.get("view", "full")
+    if view not in ("full", "summary"):
+        return Response({"error": "view must be 'full' or 'summary'."}, status=400)
+    try:
+        page = max(1, int(request.GET.get("page", 1)))
+        page_size = int(request.GET.get("page_size", CustomPagination.page_size))
+    except ValueError:
+        return Response({"error": "page and page_size must be integers."}, status=400)
+    page_size = min(max(page_size, 1), CustomPagination.max_page_size)
 
-    stories_ref = db.collection("patient_stories").order_by(
-        "date_time", direction=firestore.Query.DESCENDING
-    )
+    try:
+        response = Response(
+            pagination.fetch_page(
+                db,
+                collection,
+                page_size,
+                tag=tag,
+                token=request.GET.get("page_token"),
+                page=page,
+                fields=LISTING_FIELDS if view == "summary" else None,
+            )
+        )
+    except pagination.InvalidPageToken as e:
+        return Response({"error": str(e)}, status=400)
+    patch_cache_control(response, **http_cache.list_policy())
+    return response
 
-    if tag:
-        stories_ref = stories_ref.where("tags", "array_contains", tag)
 
-    docs = stories_ref.stream()
-    stories = [doc.to_dict() | {"id": doc.id} for doc in docs]
+# Rank articles and stories by meaning rather than exact words
+@api_view(["GET"])
+def search_semantic(request):
+    """
+    Semantic search. Query params: q (required), k (default 10), and an
+    optional collection ("articles" or "patient_stories").
+    """
+    query = request.GET.get("q", "").strip()
+    collection = request.GET.get("collection") or None
+    if not query:
+        return Response({"error": "q is required."}, status=400)
+    if collection not in (None, *semantic_search.COLLECTIONS):
+        return Response(
+            {"error": "collection must be 'articles' or 'patient_stories'."}, status=400
+        )
+    try:
+        k = min(int(request.GET.get("k", 10)), settings.ML_SEARCH_MAX_K)
+    except ValueError:
+        return Response({"error": "k must be an integer."}, status=400)
+    if k < 1:
+        return Response({"error": "k must be positive."}, status=400)
 
-    total_pages = (len(stories) + page_size - 1) // page_size  # Manual pagination
-    start_index = (page - 1) * page_size
-    end_index = start_index + page_size
+    try:
+        results = semantic_search.search(query, k=k, collection=collection)
+        return Response({"query": query, "results": results})
+    except Exception as e:
+        print("❌ Semantic search error:", str(e))
+        return Response({"error": str(e)}, status=500)
 
-    return Response(
-        {
-            "results": stories[start_index:end_index],
-            "total_pages": total_pages,
-            "current_page": page,
-        }
-    )
+
+# Tag cloud, filter dropdown and autocomplete, from the maintained tag counts
+@api_view(["GET"])
+def get_tags(request):
+    """
+    Tags by popularity. Query params: prefix (case-insensitive, for
+    autocomplete), limit (default 20), and an optional collection ("articles"
+    or "patient_stories"; both are summed without it).
+    """
+    collection = request.GET.get("collection") or None
+    if collection not in (None, *tag_counts.COLLECTIONS):
+        return Response(
+            {"error": "collection must be 'articles' or 'patient_stories'."}, status=400
+        )
+    try:
+        limit = min(max(int(request.GET.get("limit", 20)), 1), 200)
+    except ValueError:
+        return Response({"error": "limit must be an integer."}, status=400)
+
+    try:
+        results = tag_counts.facets(
+            collection, prefix=request.GET.get("prefix", "").strip(), limit=limit
+        )
+    except Exception as e:
+        print("❌ Tag facets error:", str(e))
+        return Response({"error": str(e)}, status=500)
+    response = Response({"results": results})
+    patch_cache_control(response, **http_cache.list_policy())
+    return response
 
 
 # Get an individual article requested
 @api_view(["GET"])
 def get_article(request, article_id):
     """Retrieve a single article by ID."""
-    article_ref = db.collection("articles").document(article_id)
-    article = article_ref.get()
-
-    if article.exists:
-        return Response(article.to_dict())
+    path = document_cache.article_path(article_id)
+    article, update_time = DOCUMENTS.get_versioned(path)
+
+    if article is not None:
+        return http_cache.conditional(
+            request,
+            path,
+            update_time,
+            lambda: Response(article),
+            http_cache.public_policy(),
+        )
     return Response({"error": "Article not found"}, status=404)
 
 
@@ -325,12 +512,17 @@ def get_article(request, article_id):
 def get_patient_story(request, story_id):
     """Retrieve a single patient story by ID."""
     try:
-        story_ref = db.collection("patient_stories").document(story_id)
-        story = story_ref.get()
-
-        if story.exists:
-            data = story.to_dict()
-            response = JsonResponse(data)
+        path = document_cache.story_path(story_id)
+        data, update_time = DOCUMENTS.get_versioned(path)
+
+        if data is not None:
+            response = http_cache.conditional(
+                request,
+                path,
+                update_time,
+                lambda: JsonResponse(data),
+                http_cache.public_policy(),
+            )
             response["Access-Control-Allow-Origin"] = "http://localhost:3000"
             response["Access-Control-Allow-Credentials"] = "true"
             return response
@@ -344,6 +536,12 @@ def get_patient_story(request, story_id):
 def create_article(request):
     """Create a new article."""
     data = request.data
+    duplicate, sig = near_duplicates.find_document(data.get("content"))
+    if duplicate and settings.ML_NEARDUP_REJECT:
+        return Response(
+            {"error": "Near-duplicate of existing content.", "duplicate_of": duplicate},
+            status=409,
+        )
     new_article_ref = db.collection("articles").document()
 
     article_data = {
@@ -353,11 +551,26 @@ def create_article(request):
         "author_email": data.get("author_email"),
         "date_time": firestore.SERVER_TIMESTAMP,
         "tags": data.get("tags", []),
+        "duplicate_of": duplicate,
+        **summary_fields(data.get("content")),
     }
 
-    new_article_ref.set(article_data)
+    batch = db.batch()
+    batch.set(new_article_ref, article_data)
+    tag_counts.add_to_batch(
+        batch, db, "articles", tag_counts.deltas(new_tags=tag_counts.counted_tags(article_data))
+    )
+    batch.commit()
+    tag_counts.invalidate("articles")
+    near_duplicates.add_document("articles", new_article_ref.id, sig)
+    pagination.invalidate_counts("articles")
+    semantic_search.index_document_async("articles", new_article_ref.id, article_data)
     return Response(
-        {"message": "Article created successfully", "id": new_article_ref.id}
+        {
+            "message": "Article created successfully",
+            "id": new_article_ref.id,
+            "duplicate_of": duplicate,
+        }
     )
 
 
@@ -366,6 +579,12 @@ def create_article(request):
 def create_patient_story(request):
     """Create a new patient story."""
     data = request.data
+    duplicate, sig = near_duplicates.find_document(data.get("content"))
+    if duplicate and settings.ML_NEARDUP_REJECT:
+        return Response(
+            {"error": "Near-duplicate of existing content.", "duplicate_of": duplicate},
+            status=409,
+        )
     new_story_ref = db.collection("patient_stories").document()
 
     story_data = {
@@ -375,24 +594,49 @@ def create_patient_story(request):
         "author_email": data.get("author_email"),
         "date_time": firestore.SERVER_TIMESTAMP,
         "tags": data.get("tags", []),
+        "duplicate_of": duplicate,
+        **summary_fields(data.get("content")),
     }
 
-    new_story_ref.set(story_data)
-    return Response({"message": "Story created successfully", "id": new_story_ref.id})
+    batch = db.batch()
+    batch.set(new_story_ref, story_data)
+    tag_counts.add_to_batch(
+        batch,
+        db,
+        "patient_stories",
+        tag_counts.deltas(new_tags=tag_counts.counted_tags(story_data)),
+    )
+    batch.commit()
+    tag_counts.invalidate("patient_stories")
+    near_duplicates.add_document("patient_stories", new_story_ref.id, sig)
+    pagination.invalidate_counts("patient_stories")
+    semantic_search.index_document_async("patient_stories", new_story_ref.id, story_data)
+    return Response(
+        {
+            "message": "Story created successfully",
+            "id": new_story_ref.id,
+            "duplicate_of": duplicate,
+        }
+    )
 
 
 # Update the existing article from the DB
 @api_view(["PUT"])
 def update_article(request, article_id):
     """Update an article."""
-    article_ref = db.collection("articles").document(article_id)
-    article = article_ref.get()
-
-    if not article.exists:
-        return Response({"error": "Article not found"}, status=404)
-
     updated_data = request.data
-    article_ref.update(updated_data)
+    if "content" in updated_data:
+        updated_data = {**updated_data, **summary_fields(updated_data["content"])}
+    if not tag_counts.update_document(db, "articles", article_id, updated_data):
+        return Response({"error": "Article not found"}, status=404)
+    DOCUMENTS.invalidate(document_cache.article_path(article_id))
+    if "title" in updated_data or "content" in updated_data:
+        semantic_search.index_document_async("articles", article_id)
+    if "content" in updated_data:
+        near_duplicates.update_document("articles", article_id, updated_data["content"])
+    if "tags" in updated_data or "date_time" in updated_data:
+        pagination.invalidate_counts("articles")
+        tag_counts.invalidate("articles")
 
     return Response({"message": "Article updated successfully"})
 
@@ -401,14 +645,19 @@ def update_article(request, article_id):
 @api_view(["PUT"])
 def update_patient_story(request, story_id):
     """Update a patient story."""
-    story_ref = db.collection("patient_stories").document(story_id)
-    story = story_ref.get()
-
-    if not story.exists:
-        return Response({"error": "Story not found"}, status=404)
-
     updated_data = request.data
-    story_ref.update(updated_data)
+    if "content" in updated_data:
+        updated_data = {**updated_data, **summary_fields(updated_data["content"])}
+    if not tag_counts.update_document(db, "patient_stories", story_id, updated_data):
+        return Response({"error": "Story not found"}, status=404)
+    DOCUMENTS.invalidate(document_cache.story_path(story_id))
+    if "title" in updated_data or "content" in updated_data:
+        semantic_search.index_document_async("patient_stories", story_id)
+    if "content" in updated_data:
+        near_duplicates.update_document("patient_stories", story_id, updated_data["content"])
+    if "tags" in updated_data or "date_time" in updated_data:
+        pagination.invalidate_counts("patient_stories")
+        tag_counts.invalidate("patient_stories")
 
     return Response({"message": "Story updated successfully"})
 
@@ -417,13 +666,14 @@ def update_patient_story(request, story_id):
 @api_view(["DELETE"])
 def delete_article(request, article_id):
     """Delete an article."""
-    article_ref = db.collection("articles").document(article_id)
-    article = article_ref.get()
-
-    if not article.exists:
+    if not tag_counts.delete_document(db, "articles", article_id):
         return Response({"error": "Article not found"}, status=404)
 
-    article_ref.delete()
+    tag_counts.invalidate("articles")
+    DOCUMENTS.invalidate(document_cache.article_path(article_id))
+    semantic_search.remove_document("articles", article_id)
+    near_duplicates.remove_document("articles", article_id)
+    pagination.invalidate_counts("articles")
     return Response({"message": "Article deleted successfully"})
 
 
@@ -431,13 +681,14 @@ def delete_article(request, article_id):
 @api_view(["DELETE"])
 def delete_patient_story(request, story_id):
     """Delete a patient story."""
-    story_ref = db.collection("patient_stories").document(story_id)
-    story = story_ref.get()
-
-    if not story.exists:
+    if not tag_counts.delete_document(db, "patient_stories", story_id):
         return Response({"error": "Story not found"}, status=404)
 
-    story_ref.delete()
+    tag_counts.invalidate("patient_stories")
+    DOCUMENTS.invalidate(document_cache.story_path(story_id))
+    semantic_search.remove_document("patient_stories", story_id)
+    near_duplicates.remove_document("patient_stories", story_id)
+    pagination.invalidate_counts("patient_stories")
     return Response({"message": "Story deleted successfully"})
 
 
@@ -519,6 +770,7 @@ def create_treatment_plan(request):
             now = datetime.utcnow()
             # Update end_date of last version to now, marking it as closed
             versions_ref.document(last_version_id).update({"end_date": now})
+            DOCUMENTS.invalidate(document_cache.version_path(plan_id, last_version_id))
 
             # Create new version with updated goals and start_date = now
             new_version_ref = versions_ref.document()
@@ -585,6 +837,7 @@ def terminate_treatment_plan(request, plan_id):
     try:
         plan_ref = db.collection("treatment_plans").document(plan_id)
         plan_ref.update({"is_terminated": True})
+        DOCUMENTS.invalidate(document_cache.plan_path(plan_id))
         return Response({"message": "Plan terminated successfully"})
     except Exception as e:
         return Response({"error": str(e)}, status=500)
@@ -617,15 +870,16 @@ def get_treatment_plan_version(request, plan_id, version_id):
     Return full treatment plan version including goals/actions.
     """
     try:
-        version_ref = (
-            db.collection("treatment_plans")
-            .document(plan_id)
-            .collection("versions")
-            .document(version_id)
-        )
-        version = version_ref.get()
-        if version.exists:
-            return Response(version.to_dict())
+        path = document_cache.version_path(plan_id, version_id)
+        version, update_time = DOCUMENTS.get_versioned(path)
+        if version is not None:
+            return http_cache.conditional(
+                request,
+                path,
+                update_time,
+                lambda: Response(version),
+                http_cache.private_policy(),
+            )
         return Response({"error": "Version not found"}, status=404)
     except Exception as e:
         return Response({"error": str(e)}, status=500)
@@ -638,16 +892,19 @@ def get_treatment_plan(request, plan_id):
     including doctor_name, patient info, created_at, is_terminated, etc.
     """
     try:
-        plan_ref = db.collection("treatment_plans").document(plan_id)
-        plan_doc = plan_ref.get()
-        if not plan_doc.exists:
+        path = document_cache.plan_path(plan_id)
+        plan_data, update_time = DOCUMENTS.get_versioned(path)
+        if plan_data is None:
             return Response({"error": "Plan not found"}, status=404)
 
-        plan_data = plan_doc.to_dict()
-        # Optionally add the plan_id back into the payload
-        plan_data["plan_id"] = plan_id
-
-        return Response(plan_data)
+        # Optionally add the plan_id back into the payload (copy: the cached dict is shared)
+        return http_cache.conditional(
+            request,
+            path,
+            update_time,
+            lambda: Response({**plan_data, "plan_id": plan_id}),
+            http_cache.private_policy(),
+        )
     except Exception as e:
         return Response({"error": str(e)}, status=500)
 
@@ -671,6 +928,7 @@ def update_current_week_actions(request, plan_id, version_id):
             return Response({"error": "Version not found"}, status=404)
 
         version_ref.update({"goals": updated_goals, "end_date": datetime.utcnow()})
+        DOCUMENTS.invalidate(document_cache.version_path(plan_id, version_id))
 
         return Response({"message": "Plan version updated"})
     except Exception as e:
@@ -736,6 +994,7 @@ def mark_action_complete(request, plan_id, version_id):
             return Response({"error": "Action not found or not permitted"}, status=404)
 
         version_ref.update({"goals": goals})
+        DOCUMENTS.invalidate(document_cache.version_path(plan_id, version_id))
         return Response(
             {
                 "message": f"Action marked as {'complete' if status_flag else 'incomplete'}"
@@ -778,6 +1037,7 @@ def calculate_weekly_performance(request, plan_id, version_id):
 
         score = (earned_points / total_points) * 100 if total_points > 0 else 0
         version_ref.update({"weekly_score": round(score, 2)})
+        DOCUMENTS.invalidate(document_cache.version_path(plan_id, version_id))
 
         return Response({"weekly_score": round(score, 2)})
 
@@ -826,6 +1086,7 @@ def delete_action_from_version(request, plan_id, version_id):
             updated_goals.append(goal)
 
         version_ref.update({"goals": updated_goals})
+        DOCUMENTS.invalidate(document_cache.version_path(plan_id, version_id))
         return Response({"message": "Action deleted"})
 
     except Exception as e:
@@ -854,6 +1115,7 @@ def delete_goal_from_version(request, plan_id, version_id):
         updated_goals = [g for g in data["goals"] if g["id"] != goal_id]
 
         version_ref.update({"goals": updated_goals})
+        DOCUMENTS.invalidate(document_cache.version_path(plan_id, version_id))
         return Response({"message": "Goal deleted"})
 
     except Exception as e:
@@ -861,8 +1123,7 @@ def delete_goal_from_version(request, plan_id, version_id):
 
 
 # ------ TheraChat ------
-from vertexai.preview.generative_models import GenerativeModel, Part
-from vertexai import init
+import threading
 
 # ---- Constants ----
 PROJECT_ID = "996770367618"
@@ -872,7 +1133,23 @@ VERTEX_AI_MODEL_ENDPOINT = (
 )
 
 # ---- Init Vertex AI ----
-init(project=PROJECT_ID, location=LOCATION)
+# Deferred to the first TheraChat request so other endpoints don't pay the
+# vertexai import and client setup at startup.
+_vertex_lock = threading.Lock()
+_vertex_ready = False
+
+
+def get_vertex_model():
+    global _vertex_ready
+    from vertexai import init
+    from vertexai.preview.generative_models import GenerativeModel
+
+    if not _vertex_ready:
+        with _vertex_lock:
+            if not _vertex_ready:
+                init(project=PROJECT_ID, location=LOCATION)
+                _vertex_ready = True
+    return GenerativeModel(model_name=VERTEX_AI_MODEL_ENDPOINT)
 
 
 @method_decorator(csrf_exempt, name="dispatch")
@@ -892,7 +1169,9 @@ class TheraChatView(APIView):
             )
 
         try:
-            model = GenerativeModel(model_name=VERTEX_AI_MODEL_ENDPOINT)
+            from vertexai.preview.generative_models import Part
+
+            model = get_vertex_model()
 
             stream = model.generate_content(
                 [Part.from_text(user_input)],
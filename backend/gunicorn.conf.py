@@ -0,0 +1,25 @@
+"""
+gunicorn settings, picked up automatically when gunicorn starts in this directory.
+
+Puts prometheus_client in multiprocess mode before any worker imports it, so
+/metrics reports the sum over all workers rather than whichever one answered.
+"""
+
+import os
+import shutil
+
+metrics_dir = os.environ.setdefault(
+    "PROMETHEUS_MULTIPROC_DIR", "/tmp/theramind_prometheus"
+)
+
+
+def on_starting(server):
+    # Files left by a previous master would be merged into the new counts
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+    os.makedirs(metrics_dir, exist_ok=True)
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
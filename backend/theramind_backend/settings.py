@@ -13,6 +13,7 @@ https://docs.djangoproject.com/en/5.1/ref/settings/
 from pathlib import Path
 import os
 import json
+import tempfile
 import firebase_admin
 from utils.firebase_client import db
 
@@ -54,6 +55,160 @@ PORT = os.getenv(
     "PORT", "8000"
 )  # Default to 8000 if not set (common for Django dev server)
 
+# --- ML Moderation ---
+# Decision mode: "full" always runs every stage and fills every result field;
+# "fast" runs keyword -> confidence -> TTA and stops as soon as the verdict is
+# settled (same verdict; fields of skipped stages are None, listed in "skipped").
+ML_DECISION_MODE = os.getenv("ML_DECISION_MODE", "full")
+# Models load lazily on first use. ML_WARMUP_ON_START=True loads them (and runs one
+# throwaway decision) when Django starts instead. NLTK data is read from
+# NLTK_DATA_DIR only and is never downloaded at runtime.
+ML_WARMUP_ON_START = os.getenv("ML_WARMUP_ON_START", "False").lower() == "true"
+NLTK_DATA_DIR = os.getenv("NLTK_DATA_DIR", os.path.join(ML_MODELS_DIR, "nltk_data"))
+# Precomputed TTA synonym table (python -m utils.synonyms). When the file exists,
+# WordNet is never loaded by the web/model-server processes.
+ML_SYNONYM_TABLE = os.getenv(
+    "ML_SYNONYM_TABLE", os.path.join(ML_MODELS_DIR, "synonyms.bin")
+)
+
+# Score the base text and all TTA variants in one encode + one classifier pass.
+# Set ML_TTA_BATCHED=False to fall back to the original one-pass-per-variant path.
+ML_TTA_BATCHED = os.getenv("ML_TTA_BATCHED", "True").lower() == "true"
+# HTML preprocessing: "regex" (original tag strip + sent_tokenize over the whole
+# text) or "stream" (single-pass parser, see utils.html_text). "stream" splits
+# sentences differently and so can change verdicts; switch only after
+# `manage.py bench_moderation --compare` shows accuracy parity on your data.
+ML_PREPROCESSOR = os.getenv("ML_PREPROCESSOR", "regex")
+# Long articles: "truncate" scores the first 32 sentences only; "sliding" scores up to
+# ML_WINDOW_MAX overlapping 32-sentence windows (every ML_WINDOW_STRIDE sentences) in
+# one batch and combines them with ML_WINDOW_AGG ("max" or "mean").
+ML_WINDOW_MODE = os.getenv("ML_WINDOW_MODE", "truncate")
+ML_WINDOW_STRIDE = int(os.getenv("ML_WINDOW_STRIDE", 16))
+ML_WINDOW_MAX = int(os.getenv("ML_WINDOW_MAX", 8))
+ML_WINDOW_AGG = os.getenv("ML_WINDOW_AGG", "max")
+# Per-worker LRU of sentence embeddings (keyed by sentence text + model fingerprint),
+# so re-validating an edited document only encodes the changed sentences. 0 disables.
+ML_EMBED_CACHE_MAX_BYTES = int(os.getenv("ML_EMBED_CACHE_MAX_BYTES", 32 * 1024 * 1024))
+# Run the classifier through a tf.function traced once at load instead of clf.predict.
+ML_COMPILED_PREDICT = os.getenv("ML_COMPILED_PREDICT", "True").lower() == "true"
+# Inference backend: "tf" (SentenceTransformer + Keras) or "onnx" (onnxruntime over the
+# artifacts from `manage.py export_onnx`). Thread counts of 0 let onnxruntime decide.
+ML_INFERENCE_BACKEND = os.getenv("ML_INFERENCE_BACKEND", "tf")
+ML_ONNX_INTRA_THREADS = int(os.getenv("ML_ONNX_INTRA_THREADS", 0))
+ML_ONNX_INTER_THREADS = int(os.getenv("ML_ONNX_INTER_THREADS", 0))
+# Dynamic int8 quantization of the SBERT encoder (torch for "tf", the .int8.onnx
+# artifact for "onnx"). Only enable after `manage.py bench_quantized` shows agreement holds.
+ML_SBERT_QUANTIZED = os.getenv("ML_SBERT_QUANTIZED", "False").lower() == "true"
+# Model registry. ML_MAX_CONCURRENT_INFERENCES caps in-flight inferences per process
+# (0 = no cap). With ML_MODEL_HOT_RELOAD, workers notice replaced files in
+# ml_models/ (checked every ML_MODEL_RELOAD_CHECK_SECONDS), load the new version in
+# the background and swap it in, dropping the old one once its requests drain.
+# Replace model files atomically (write elsewhere, then rename into place).
+ML_MAX_CONCURRENT_INFERENCES = int(os.getenv("ML_MAX_CONCURRENT_INFERENCES", 0))
+ML_MODEL_HOT_RELOAD = os.getenv("ML_MODEL_HOT_RELOAD", "False").lower() == "true"
+ML_MODEL_RELOAD_CHECK_SECONDS = float(os.getenv("ML_MODEL_RELOAD_CHECK_SECONDS", 5))
+ML_MODEL_DRAIN_TIMEOUT = float(os.getenv("ML_MODEL_DRAIN_TIMEOUT", 60))
+
+# Moderation result cache: an in-process LRU (byte budget) in front of a shared tier.
+# ML_CACHE_BACKEND is "sqlite" (shared by workers on this host), "firestore"
+# (shared across instances) or "none" (in-process only). The SQLite file defaults to
+# the temp directory, the only writable place on App Engine standard.
+ML_CACHE_MAX_BYTES = int(os.getenv("ML_CACHE_MAX_BYTES", 16 * 1024 * 1024))
+ML_CACHE_TTL = int(os.getenv("ML_CACHE_TTL", 7 * 24 * 3600))
+ML_CACHE_BACKEND = os.getenv("ML_CACHE_BACKEND", "sqlite")
+ML_CACHE_PATH = os.getenv(
+    "ML_CACHE_PATH", os.path.join(tempfile.gettempdir(), "theramind", "moderation.sqlite3")
+)
+
+# Micro-batching: merge concurrent moderation calls into one encode + predict.
+# Only pays off with threaded workers, e.g. gunicorn --workers 2 --threads 8.
+ML_BATCHER_ENABLED = os.getenv("ML_BATCHER_ENABLED", "False").lower() == "true"
+ML_BATCH_MAX_DOCS = int(os.getenv("ML_BATCH_MAX_DOCS", 16))
+ML_BATCH_MAX_WAIT_MS = float(os.getenv("ML_BATCH_MAX_WAIT_MS", 10))
+
+# Out-of-process model server (python manage.py run_model_server).
+# When ML_SERVER_SOCKET is set, web workers send scoring to it instead of loading
+# TensorFlow/torch themselves; with ML_SERVER_FALLBACK they score in-process if it is down.
+ML_SERVER_SOCKET = os.getenv("ML_SERVER_SOCKET", "")
+ML_SERVER_PROCESSES = int(os.getenv("ML_SERVER_PROCESSES", 1))
+ML_SERVER_TIMEOUT = float(os.getenv("ML_SERVER_TIMEOUT", 30))
+ML_SERVER_FALLBACK = os.getenv("ML_SERVER_FALLBACK", "True").lower() == "true"
+
+# Max documents per call to the bulk validate-content/batch/ endpoint.
+ML_BULK_MAX_DOCS = int(os.getenv("ML_BULK_MAX_DOCS", 64))
+
+# Async moderation jobs (validate-content/jobs/). Each web worker runs
+# ML_JOBS_WORKERS background threads; jobs and results live in a SQLite file
+# shared by all workers. Submissions beyond ML_JOBS_MAX_QUEUED waiting jobs get a
+# 429, and finished results expire after ML_JOBS_RESULT_TTL seconds.
+ML_JOBS_WORKERS = int(os.getenv("ML_JOBS_WORKERS", 1))
+ML_JOBS_MAX_QUEUED = int(os.getenv("ML_JOBS_MAX_QUEUED", 100))
+ML_JOBS_RESULT_TTL = int(os.getenv("ML_JOBS_RESULT_TTL", 3600))
+ML_JOBS_PATH = os.getenv(
+    "ML_JOBS_PATH", os.path.join(ML_MODELS_DIR, "cache", "moderation_jobs.sqlite3")
+)
+
+# Semantic search (/api/search/semantic/). Document vectors live in a float16
+# memmap + SQLite under ML_SEARCH_INDEX_DIR. ML_SEARCH_MODE is "brute" (score
+# every document) or "ivf" (score the ML_SEARCH_NPROBE nearest partitions; train
+# them with `manage.py build_semantic_index --ivf N`).
+ML_SEARCH_INDEX_DIR = os.getenv(
+    "ML_SEARCH_INDEX_DIR", os.path.join(ML_MODELS_DIR, "cache", "search")
+)
+ML_SEARCH_MODE = os.getenv("ML_SEARCH_MODE", "brute")
+ML_SEARCH_NPROBE = int(os.getenv("ML_SEARCH_NPROBE", 8))
+ML_SEARCH_MAX_K = int(os.getenv("ML_SEARCH_MAX_K", 50))
+
+# Near-duplicate detection. MinHash signatures of submitted and moderated texts
+# live in a SQLite file capped at ML_NEARDUP_MAX_ENTRIES. Submissions at or above
+# ML_NEARDUP_THRESHOLD estimated Jaccard similarity are flagged with duplicate_of
+# (or rejected with 409 when ML_NEARDUP_REJECT), and moderation reuses the
+# verdict of a near-identical text. Rebuild with `manage.py build_near_duplicate_index`.
+ML_NEARDUP_ENABLED = os.getenv("ML_NEARDUP_ENABLED", "True").lower() == "true"
+ML_NEARDUP_THRESHOLD = float(os.getenv("ML_NEARDUP_THRESHOLD", 0.9))
+ML_NEARDUP_MAX_ENTRIES = int(os.getenv("ML_NEARDUP_MAX_ENTRIES", 50000))
+ML_NEARDUP_REJECT = os.getenv("ML_NEARDUP_REJECT", "False").lower() == "true"
+ML_NEARDUP_PATH = os.getenv(
+    "ML_NEARDUP_PATH", os.path.join(ML_MODELS_DIR, "cache", "near_duplicates.sqlite3")
+)
+
+# Prometheus metrics are served on /metrics. gunicorn.conf.py sets
+# PROMETHEUS_MULTIPROC_DIR so all workers are aggregated; start the model server
+# with the same directory so its stage timings are included too.
+# /metrics answers only requests from METRICS_ALLOWED_IPS (comma-separated
+# addresses or networks) or with "Authorization: Bearer <METRICS_TOKEN>"; others get 403.
+# Behind a proxy the client address is the proxy's, so scrape with the token.
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+METRICS_ALLOWED_IPS = [
+    ip.strip() for ip in os.getenv("METRICS_ALLOWED_IPS", "127.0.0.1,::1").split(",")
+]
+METRICS_ALLOWED_IPS = [ip for ip in METRICS_ALLOWED_IPS if ip]
+
+# --- Content Listing ---
+# Article/story lists page with cursor tokens; total_pages comes from a count()
+# aggregation cached per worker for this many seconds.
+LIST_COUNT_CACHE_SECONDS = int(os.getenv("LIST_COUNT_CACHE_SECONDS", 60))
+
+# --- Document Cache ---
+# Read-through cache for single articles, stories, plans and plan versions. Each
+# worker keeps up to DOC_CACHE_MAX_ENTRIES documents for DOC_CACHE_TTL seconds and
+# serves an expired copy for up to DOC_CACHE_STALE_SECONDS more when Firestore
+# errors or takes longer than DOC_CACHE_FETCH_TIMEOUT. DOC_CACHE_LISTEN keeps
+# cached documents current with on_snapshot listeners (one per cached document).
+DOC_CACHE_TTL = int(os.getenv("DOC_CACHE_TTL", 30))
+DOC_CACHE_MAX_ENTRIES = int(os.getenv("DOC_CACHE_MAX_ENTRIES", 2000))
+DOC_CACHE_STALE_SECONDS = int(os.getenv("DOC_CACHE_STALE_SECONDS", 600))
+DOC_CACHE_FETCH_TIMEOUT = float(os.getenv("DOC_CACHE_FETCH_TIMEOUT", 2))
+DOC_CACHE_LISTEN = os.getenv("DOC_CACHE_LISTEN", "False").lower() == "true"
+
+# --- HTTP Caching ---
+# Article/story reads send ETag + Last-Modified and public Cache-Control so
+# browsers and a CDN can reuse them; lists get a shorter max-age. Treatment plans
+# are private and always revalidated.
+CONTENT_CACHE_MAX_AGE = int(os.getenv("CONTENT_CACHE_MAX_AGE", 60))
+LIST_CACHE_MAX_AGE = int(os.getenv("LIST_CACHE_MAX_AGE", 30))
+CONTENT_CACHE_STALE_SECONDS = int(os.getenv("CONTENT_CACHE_STALE_SECONDS", 300))
+
 # --- Firebase Initialization ---
 # cred = None
 
@@ -17,7 +17,7 @@ Including another URLconf
 
 from django.contrib import admin
 from django.urls import path, include
-from .views import home
+from .views import home, metrics
 from . import views
 from api.views import test_view, health_check
 
@@ -26,4 +26,5 @@ urlpatterns = [
     path("admin/", admin.site.urls),
     path("api/", include("api.urls")),
     path("health/", health_check),  # already works
+    path("metrics", metrics),  # Prometheus scrape target
 ]
@@ -1,5 +1,34 @@
-from django.http import HttpResponseRedirect
+import hmac
+import ipaddress
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden, HttpResponseRedirect
+
+from utils import metrics as prometheus
 
 
 def home(request):
     return HttpResponseRedirect("http://localhost:3000")
+
+
+def _may_scrape(request):
+    token = getattr(settings, "METRICS_TOKEN", "")
+    auth = request.headers.get("Authorization", "")
+    if token and hmac.compare_digest(auth.encode(), f"Bearer {token}".encode()):
+        return True
+    try:
+        addr = ipaddress.ip_address(request.META.get("REMOTE_ADDR", ""))
+    except ValueError:
+        return False
+    return any(
+        addr in ipaddress.ip_network(allowed, strict=False)
+        for allowed in getattr(settings, "METRICS_ALLOWED_IPS", ["127.0.0.1", "::1"])
+    )
+
+
+def metrics(request):
+    """Prometheus scrape endpoint, merged across gunicorn workers."""
+    if not _may_scrape(request):
+        return HttpResponseForbidden("Forbidden")
+    body, content_type = prometheus.render()
+    return HttpResponse(body, content_type=content_type)
@@ -14,3 +14,9 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "theramind_backend.settings")
 
 application = get_wsgi_application()
+
+# The moderation data is bundled at build time (bin/post_compile); refuse to
+# serve without it rather than failing every moderation request
+from utils import ml_model  # noqa: E402
+
+ml_model.check_data()
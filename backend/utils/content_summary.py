@@ -0,0 +1,38 @@
+"""
+Listing fields for articles and patient stories, computed once at write time.
+
+The list pages show a title, author, tags and a teaser; storing the teaser
+(snippet) and reading_time on the document lets the list endpoints read just
+those fields with a projected query instead of shipping every content body.
+"""
+
+import math
+
+from utils.html_text import iter_blocks
+
+SNIPPET_CHARS = 200
+WORDS_PER_MINUTE = 200
+
+# Fields the list endpoints return with ?view=summary
+LISTING_FIELDS = [
+    "title",
+    "author_name",
+    "tags",
+    "date_time",
+    "snippet",
+    "reading_time",
+]
+
+
+def summary_fields(html):
+    """{"snippet", "reading_time"} for a content body; reading_time is in whole minutes."""
+    text = " ".join(iter_blocks(html or ""))
+    words = len(text.split())
+    snippet = text
+    if len(text) > SNIPPET_CHARS:
+        cut = text[:SNIPPET_CHARS].rsplit(" ", 1)[0] or text[:SNIPPET_CHARS]
+        snippet = cut.rstrip(" ,;:.") + "…"
+    return {
+        "snippet": snippet,
+        "reading_time": max(1, math.ceil(words / WORDS_PER_MINUTE)) if words else 0,
+    }
@@ -0,0 +1,189 @@
+"""
+Read-through cache for single Firestore documents (articles, stories, plans).
+
+Entries are keyed by document path and kept for DOC_CACHE_TTL seconds, at most
+DOC_CACHE_MAX_ENTRIES of them (least recently used evicted first). Concurrent
+misses for the same path share one Firestore read. Missing documents are cached
+too, as None.
+
+Writers call invalidate() for the paths they touch. That keeps this worker
+exact; other workers and instances catch up within the TTL, or at once with
+DOC_CACHE_LISTEN, which attaches an on_snapshot listener to every cached
+document and refreshes the entry whenever it changes.
+
+When a refresh fails or exceeds DOC_CACHE_FETCH_TIMEOUT, an expired entry
+younger than DOC_CACHE_STALE_SECONDS is served instead (stale-if-error).
+
+Cached dicts are shared between requests: copy before modifying.
+"""
+
+import time
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+
+from django.conf import settings
+
+from utils import metrics
+
+
+class _Entry:
+    __slots__ = ("value", "fetched_at", "watch")
+
+    def __init__(self, value, fetched_at, watch=None):
+        self.value = value  # (data, update_time)
+        self.fetched_at = fetched_at
+        self.watch = watch
+
+
+class DocumentCache:
+    def __init__(
+        self, ttl=30, max_entries=2000, stale_for=600, fetch_timeout=2.0, listen=False
+    ):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.stale_for = stale_for
+        self.fetch_timeout = fetch_timeout
+        self.listen = listen
+        self._entries = OrderedDict()  # path -> _Entry
+        self._inflight = {}  # path -> Future of the fetch other callers wait on
+        self._lock = threading.Lock()
+
+    def get(self, path):
+        """The document at path as a dict, or None if it does not exist."""
+        return self.get_versioned(path)[0]
+
+    def get_versioned(self, path):
+        """(data, update_time) of the document at path; (None, None) if it does not exist."""
+        collection = path.split("/", 1)[0]
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(path)
+            # A listened-to entry is kept current by its listener
+            if entry is not None and (
+                entry.watch is not None or now - entry.fetched_at < self.ttl
+            ):
+                self._entries.move_to_end(path)
+                metrics.DOCUMENT_CACHE_LOOKUPS.labels(collection, "hit").inc()
+                return entry.value
+            future = self._inflight.get(path)
+            leader = future is None
+            if leader:
+                future = self._inflight[path] = Future()
+
+        if not leader:
+            metrics.DOCUMENT_CACHE_LOOKUPS.labels(collection, "coalesced").inc()
+            return future.result()
+
+        try:
+            # With a stale copy to fall back on, do not wait long for Firestore
+            value = self._fetch(path, self.fetch_timeout if entry is not None else None)
+        except Exception as e:
+            with self._lock:
+                if self._inflight.get(path) is future:
+                    del self._inflight[path]
+            if entry is not None and now - entry.fetched_at < self.ttl + self.stale_for:
+                print(f"⚠️ Serving stale {path}:", str(e))
+                metrics.DOCUMENT_CACHE_LOOKUPS.labels(collection, "stale").inc()
+                future.set_result(entry.value)
+                return entry.value
+            future.set_exception(e)
+            raise
+
+        metrics.DOCUMENT_CACHE_LOOKUPS.labels(collection, "miss").inc()
+        self._store(path, value, future)
+        future.set_result(value)
+        return value
+
+    def invalidate(self, path):
+        with self._lock:
+            entry = self._entries.pop(path, None)
+            self._inflight.pop(path, None)
+        if entry is not None:
+            _unwatch(entry)
+
+    def clear(self):
+        with self._lock:
+            entries, self._entries = list(self._entries.values()), OrderedDict()
+        for entry in entries:
+            _unwatch(entry)
+
+    def stats(self):
+        return {"entries": len(self._entries), "max_entries": self.max_entries}
+
+    def _fetch(self, path, timeout):
+        from theramind_backend.config import db
+
+        return _value(db.document(path).get(timeout=timeout))
+
+    def _store(self, path, value, future):
+        evicted = []
+        with self._lock:
+            if self._inflight.get(path) is not future:
+                return  # invalidated while the read was in flight; it may predate the write
+            del self._inflight[path]
+            entry = self._entries.get(path)
+            if entry is not None:
+                entry.value, entry.fetched_at = value, time.monotonic()
+                self._entries.move_to_end(path)
+            else:
+                entry = self._entries[path] = _Entry(value, time.monotonic())
+                while len(self._entries) > self.max_entries:
+                    evicted.append(self._entries.popitem(last=False)[1])
+        for old in evicted:
+            _unwatch(old)
+        if self.listen and entry.watch is None:
+            self._watch(path, entry)
+
+    def _watch(self, path, entry):
+        from theramind_backend.config import db
+
+        def on_snapshot(snapshots, changes, read_time):
+            for snap in snapshots:
+                with self._lock:
+                    if self._entries.get(path) is entry:
+                        entry.value = _value(snap)
+                        entry.fetched_at = time.monotonic()
+
+        try:
+            entry.watch = db.document(path).on_snapshot(on_snapshot)
+        except Exception as e:
+            print(f"⚠️ Could not listen to {path}:", str(e))
+
+
+def _value(snap):
+    return (snap.to_dict(), snap.update_time) if snap.exists else (None, None)
+
+
+def _unwatch(entry):
+    if entry.watch is not None:
+        try:
+            entry.watch.unsubscribe()
+        except Exception:
+            pass
+        entry.watch = None
+
+
+DOCUMENTS = DocumentCache(
+    ttl=getattr(settings, "DOC_CACHE_TTL", 30),
+    max_entries=getattr(settings, "DOC_CACHE_MAX_ENTRIES", 2000),
+    stale_for=getattr(settings, "DOC_CACHE_STALE_SECONDS", 600),
+    fetch_timeout=getattr(settings, "DOC_CACHE_FETCH_TIMEOUT", 2.0),
+    listen=getattr(settings, "DOC_CACHE_LISTEN", False),
+)
+
+
+def article_path(article_id):
+    return f"articles/{article_id}"
+
+
+def story_path(story_id):
+    return f"patient_stories/{story_id}"
+
+
+def plan_path(plan_id):
+    return f"treatment_plans/{plan_id}"
+
+
+def version_path(plan_id, version_id):
+    return f"treatment_plans/{plan_id}/versions/{version_id}"
@@ -0,0 +1,69 @@
+"""
+HTTP validators and Cache-Control for document reads.
+
+The ETag is a hash of the document path and its Firestore update_time, so it
+changes on every write and is the same in every worker. get_conditional_response
+answers If-None-Match with a 304 before the body is built.
+
+Last-Modified is sent too, rounded up to the next whole second, but
+If-Modified-Since alone never gets a 304: HTTP dates have no sub-second part, so
+a client holding an earlier version from the same second would look current.
+"""
+
+import hashlib
+import math
+
+from django.conf import settings
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+
+def public_policy():
+    # Education content is the same for every reader: browsers and a CDN may keep it
+    return {
+        "public": True,
+        "max_age": getattr(settings, "CONTENT_CACHE_MAX_AGE", 60),
+        "stale_while_revalidate": getattr(settings, "CONTENT_CACHE_STALE_SECONDS", 300),
+    }
+
+
+def list_policy():
+    return {
+        "public": True,
+        "max_age": getattr(settings, "LIST_CACHE_MAX_AGE", 30),
+        "stale_while_revalidate": getattr(settings, "CONTENT_CACHE_STALE_SECONDS", 300),
+    }
+
+
+def private_policy():
+    # Treatment plans: never shared, always revalidated (cheap with the ETag)
+    return {"private": True, "no_cache": True}
+
+
+def validators(path, update_time):
+    """(etag, last_modified timestamp) for one version of a document; (None, None) without update_time."""
+    if update_time is None:
+        return None, None
+    stamp = update_time.rfc3339() if hasattr(update_time, "rfc3339") else update_time.isoformat()
+    etag = '"%s"' % hashlib.sha256(f"{path}@{stamp}".encode("utf-8")).hexdigest()[:32]
+    return etag, math.ceil(update_time.timestamp())
+
+
+def conditional(request, path, update_time, build, policy):
+    """
+    build() the response unless the client's copy is current. Successful and 304
+    responses get the validators and Cache-Control; errors are left alone.
+    """
+    etag, last_modified = validators(path, update_time)
+    response = None
+    if etag is not None:
+        response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = build()
+    if response.status_code not in (200, 304):
+        return response
+    if etag is not None:
+        response["ETag"] = etag
+        response["Last-Modified"] = http_date(last_modified)
+    patch_cache_control(response, **policy)
+    return response
@@ -0,0 +1,111 @@
+"""
+Prometheus metrics for the moderation pipeline and document cache, served on /metrics.
+
+Each gunicorn worker (and model server process) keeps its own counters. When
+PROMETHEUS_MULTIPROC_DIR is set, prometheus_client writes them to files in that
+directory and /metrics merges every process; gunicorn.conf.py sets it up before
+the workers fork. Without it (runserver, management commands) metrics are
+per-process.
+"""
+
+import os
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+# From the sub-millisecond keyword check up to a full TTA pass on a long article
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+STAGE_SECONDS = Histogram(
+    "moderation_stage_seconds",
+    "Time spent in each moderation stage (clean, encode, predict, tta, keyword).",
+    ["stage"],
+    buckets=BUCKETS,
+)
+DECISION_SECONDS = Histogram(
+    "moderation_decision_seconds",
+    "End-to-end final_mh_decision time, by mode and what answered (cache, near_duplicate, model).",
+    ["mode", "source"],
+    buckets=BUCKETS,
+)
+MODEL_LOAD_SECONDS = Histogram(
+    "moderation_model_load_seconds",
+    "Time to load the SBERT encoder and MH classifier in a process.",
+    ["backend"],
+    buckets=(0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300),
+)
+CACHE_LOOKUPS = Counter(
+    "moderation_cache_lookups",
+    "Moderation result cache lookups.",
+    ["result"],
+)
+VOTES = Counter(
+    "moderation_votes",
+    "Ensemble vote outcomes (pass, fail, or skipped by fast mode).",
+    ["vote", "outcome"],
+)
+VERDICTS = Counter(
+    "moderation_verdicts",
+    "Final moderation verdicts served.",
+    ["valid"],
+)
+BATCH_QUEUE_DEPTH = Gauge(
+    "moderation_batcher_queue_depth",
+    "Requests waiting for the micro-batcher.",
+    multiprocess_mode="livesum",
+)
+BATCH_DOCS = Histogram(
+    "moderation_batch_docs",
+    "Requests merged into one micro-batch.",
+    buckets=(1, 2, 4, 8, 16, 32, 64),
+)
+BATCH_WAIT_SECONDS = Histogram(
+    "moderation_batch_wait_seconds",
+    "Time a request waited in the micro-batcher queue before its batch ran.",
+    buckets=BUCKETS,
+)
+LRU_REMOVALS = Counter(
+    "lru_cache_removals",
+    "Entries dropped from an in-process LRU cache (moderation, embeddings), by reason.",
+    ["cache", "reason"],
+)
+DOCUMENT_CACHE_LOOKUPS = Counter(
+    "document_cache_lookups",
+    "Read-through document cache lookups (hit, miss, coalesced, stale).",
+    ["collection", "result"],
+)
+
+
+def stage(name):
+    """Context manager / decorator timing one pipeline stage."""
+    return STAGE_SECONDS.labels(name).time()
+
+
+def record_cache(hit):
+    CACHE_LOOKUPS.labels("hit" if hit else "miss").inc()
+
+
+def record_verdict(result):
+    VERDICTS.labels("true" if result["valid"] else "false").inc()
+    for vote in ("confidence", "tta", "override"):
+        passed = result.get(f"{vote}_pass")
+        outcome = "skipped" if passed is None else ("pass" if passed else "fail")
+        VOTES.labels(vote, outcome).inc()
+
+
+def render():
+    """(body, content_type) for the /metrics response."""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -1,90 +1,479 @@
-import os, re, json, hashlib, random, numpy as np, tensorflow as tf
-from sentence_transformers import SentenceTransformer
-from nltk.corpus import wordnet as wn
-import nltk
+"""
+MH moderation models and the scoring ensemble.
+
+Nothing heavy happens at import time: TensorFlow, sentence_transformers and the
+NLTK corpora are only imported when the model registry first loads, and NLTK data is
+read from the bundled ml_models/nltk_data directory without touching the network.
+Call warmup() to pay the whole cost up front (e.g. in the model server).
+"""
+
+import os, re, json, time, random, hashlib, numpy as np
+from itertools import islice
 from django.conf import settings
 
-wn.ensure_loaded()
+from utils.model_registry import ModelRegistry
+from utils.moderation_batcher import ModerationBatcher
+from utils.moderation_cache import LRUCache, model_fingerprint
+from utils import html_text, metrics, synonyms
 
 # === Paths & NLTK ===
 BASE = settings.ML_MODELS_DIR
-for pkg in ("punkt", "wordnet", "omw-1.4"):
-    nltk.download(pkg, download_dir=os.path.join(BASE, "nltk_data"))
-os.environ["NLTK_DATA"] = os.path.join(BASE, "nltk_data")
+NLTK_DIR = getattr(settings, "NLTK_DATA_DIR", os.path.join(BASE, "nltk_data"))
+NLTK_RESOURCES = {
+    "punkt": "tokenizers/punkt",
+    "wordnet": "corpora/wordnet",
+    "omw-1.4": "corpora/omw-1.4",
+}
+os.environ["NLTK_DATA"] = NLTK_DIR
+
+# Precomputed synonym table (python -m utils.synonyms); when present, TTA never
+# touches WordNet and the wordnet/omw corpora are not needed at all
+SYNONYM_TABLE_PATH = getattr(
+    settings, "ML_SYNONYM_TABLE", os.path.join(BASE, "synonyms.bin")
+)
+synonym_table = None
+
+
+def ensure_nltk_data():
+    """Point NLTK at the bundled data directory and verify it; never downloads."""
+    import nltk
+
+    if NLTK_DIR not in nltk.data.path:
+        nltk.data.path.insert(0, NLTK_DIR)
+    missing = []
+    for pkg, resource in NLTK_RESOURCES.items():
+        if pkg != "punkt" and synonym_table is not None:
+            continue
+        try:
+            nltk.data.find(resource)
+        except LookupError:
+            missing.append(pkg)
+    if missing:
+        raise RuntimeError(
+            f"NLTK data {missing} not found in {NLTK_DIR}. Bundle it at build time "
+            f"with `sh bin/post_compile`, or: "
+            f"python -m nltk.downloader -d {NLTK_DIR} {' '.join(NLTK_RESOURCES)}"
+        )
+
+
+def check_data():
+    """Fail at startup, not on the first moderation request, if the build step was skipped."""
+    load_synonym_table()
+    ensure_nltk_data()
+
 
 # === Seeds for reproducibility ===
 SEED = 42
 random.seed(SEED)
 np.random.seed(SEED)
-tf.random.set_seed(SEED)
 os.environ["PYTHONHASHSEED"] = str(SEED)
 
+# When True, the base score and every TTA variant share one encode + one predict
+TTA_BATCHED = getattr(settings, "ML_TTA_BATCHED", True)
+
+# Long documents: "truncate" scores only the first MAX_SEQ_LEN sentences (original
+# behaviour); "sliding" scores overlapping windows and combines them with max/mean
+WINDOW_MODE = getattr(settings, "ML_WINDOW_MODE", "truncate")
+WINDOW_STRIDE = getattr(settings, "ML_WINDOW_STRIDE", 16)
+WINDOW_MAX = getattr(settings, "ML_WINDOW_MAX", 8)
+WINDOW_AGG = getattr(settings, "ML_WINDOW_AGG", "max")
+
+# Run the classifier through a pre-traced tf.function instead of clf.predict,
+# which rebuilds its data adapter and step function on every call
+COMPILED_PREDICT = getattr(settings, "ML_COMPILED_PREDICT", True)
+
+# "tf" serves the SentenceTransformer + Keras models; "onnx" serves the exported
+# ONNX artifacts with onnxruntime and never imports torch or TensorFlow
+INFERENCE_BACKEND = getattr(settings, "ML_INFERENCE_BACKEND", "tf")
+ONNX_INTRA_THREADS = getattr(settings, "ML_ONNX_INTRA_THREADS", 0)
+ONNX_INTER_THREADS = getattr(settings, "ML_ONNX_INTER_THREADS", 0)
+
+# "stream" parses HTML in one pass (entities, script/style, block-aware sentence
+# splits; see utils.html_text); "regex" is the original tag strip + sent_tokenize
+PREPROCESSOR = getattr(settings, "ML_PREPROCESSOR", "regex")
+
+# Opt-in dynamic int8 quantization of the SBERT encoder's linear layers
+SBERT_QUANTIZED = getattr(settings, "ML_SBERT_QUANTIZED", False)
+
 # === Load models once ===
-sbert = clf = cfg = None
+class Models:
+    """One loaded version of the encoder + classifier (see utils.model_registry)."""
+
+    def __init__(self, cfg, fingerprint):
+        self.cfg = cfg
+        self.version = fingerprint
+        self.sbert = self.clf = self.predict_fn = None
+
+
+def _load_bundle():
+    load_synonym_table()
+    ensure_nltk_data()
+    # Fingerprint first, so a version is never newer than the files it was loaded from
+    models = Models(
+        json.load(open(os.path.join(BASE, "model_config.json"))),
+        model_fingerprint(),
+    )
+    with metrics.MODEL_LOAD_SECONDS.labels(INFERENCE_BACKEND).time():
+        if INFERENCE_BACKEND == "onnx":
+            _load_onnx(models)
+        else:
+            _load_tf(models)
+    return models
+
+
+# Loads once per process; requests pin a version with REGISTRY.use(). When the
+# files in ml_models/ change, the next request starts a background reload and
+# the old version is dropped once its in-flight requests finish.
+REGISTRY = ModelRegistry(
+    _load_bundle,
+    max_concurrent=getattr(settings, "ML_MAX_CONCURRENT_INFERENCES", 0),
+    version_fn=(
+        model_fingerprint if getattr(settings, "ML_MODEL_HOT_RELOAD", False) else None
+    ),
+    drain_timeout=getattr(settings, "ML_MODEL_DRAIN_TIMEOUT", 60),
+)
 
 
 def load_models():
-    global sbert, clf, cfg
-    if not sbert:
-        sbert = SentenceTransformer(os.path.join(BASE, "final_fine_tuned_sbert_model"))
-        sbert.eval()
-    if not clf:
-        clf = tf.keras.models.load_model(os.path.join(BASE, "final_mh_classifier.h5"))
-    if not cfg:
-        cfg = json.load(open(os.path.join(BASE, "model_config.json")))
+    """Load the models if needed and return the bundle this thread should use."""
+    return REGISTRY.bound()
+
+
+active = load_models
+
+
+def load_synonym_table():
+    global synonym_table
+    if synonym_table is None and os.path.exists(SYNONYM_TABLE_PATH):
+        synonym_table = synonyms.SynonymTable(SYNONYM_TABLE_PATH)
+    return synonym_table
+
+
+def _load_tf(models):
+    import tensorflow as tf
+    from sentence_transformers import SentenceTransformer
+
+    tf.random.set_seed(SEED)
+    cfg = models.cfg
+    models.sbert = SentenceTransformer(
+        os.path.join(BASE, "final_fine_tuned_sbert_model")
+    )
+    models.sbert.eval()
+    if SBERT_QUANTIZED:
+        models.sbert = quantize_encoder(models.sbert)
+    models.clf = tf.keras.models.load_model(
+        os.path.join(BASE, "final_mh_classifier.h5")
+    )
+    if COMPILED_PREDICT:
+        models.predict_fn = build_predict_fn(
+            models.clf, cfg["MAX_SEQ_LEN"], cfg["EMBED_DIM"]
+        )
+
+
+def _load_onnx(models):
+    # Artifacts come from `python manage.py export_onnx`; no torch/TF import here
+    from utils import onnx_backend as ob
+
+    opts = ob.session_options(ONNX_INTRA_THREADS, ONNX_INTER_THREADS)
+    onnx_dir = os.path.join(BASE, ob.ONNX_DIR)
+    encoder_file = ob.ENCODER_INT8_FILE if SBERT_QUANTIZED else ob.ENCODER_FILE
+    models.sbert = ob.OnnxEncoder(
+        os.path.join(onnx_dir, encoder_file),
+        os.path.join(BASE, "final_fine_tuned_sbert_model"),
+        opts,
+    )
+    models.clf = models.predict_fn = ob.OnnxClassifier(
+        os.path.join(onnx_dir, ob.CLASSIFIER_FILE), opts
+    )
+
+
+def quantize_encoder(model):
+    """
+    Dynamic int8 quantization of every nn.Linear in the encoder: weights are
+    stored as int8, activations are quantized on the fly. Pooling is untouched.
+    """
+    import torch
+
+    return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def build_predict_fn(model, seq_len, embed_dim):
+    """
+    Trace model once for any batch of (seq_len, embed_dim) embedding sequences
+    and run it on a dummy batch so the first request does not pay for tracing.
+    """
+    import tensorflow as tf
+
+    @tf.function(
+        input_signature=[tf.TensorSpec([None, seq_len, embed_dim], tf.float32)]
+    )
+    def fn(x):
+        return model(x, training=False)
+
+    fn(tf.zeros((1, seq_len, embed_dim), tf.float32))
+    return fn
+
+
+def warmup():
+    """Load models and corpora and run one throwaway decision so the first request is fast."""
+    load_models()
+    if synonym_table is None:
+        from nltk.corpus import wordnet as wn
+
+        wn.ensure_loaded()
+    moderate("<p>Warming up the mental health moderation pipeline.</p>", batcher=False)
 
 
 # === Preprocessing ===
-def clean_html(html: str):
-    return nltk.tokenize.sent_tokenize(re.sub(r"<[^>]+>", "", html))
+def clean_html(html: str, limit=None):
+    """Sentences of html; with limit, parsing stops after the first limit sentences."""
+    with metrics.stage("clean"):
+        if PREPROCESSOR == "regex":
+            import nltk
 
+            sents = nltk.tokenize.sent_tokenize(re.sub(r"<[^>]+>", "", html))
+            return sents[:limit] if limit else sents
+        return list(islice(html_text.iter_sentences(html), limit))
 
-def get_embed(html):
-    sents = clean_html(html)
-    embs = sbert.encode(sents, convert_to_tensor=False)
+
+def pad_embeds(embs, cfg=None):
+    cfg = cfg or active().cfg
     L, D = cfg["MAX_SEQ_LEN"], cfg["EMBED_DIM"]
-    if len(embs) < L:
-        embs = list(embs) + [[0.0] * D] * (L - len(embs))
-    else:
-        embs = embs[:L]
-    return np.array([embs], dtype=np.float32)
+    out = np.zeros((L, D), dtype=np.float32)
+    k = min(len(embs), L)
+    if k:
+        out[:k] = np.asarray(embs[:k], dtype=np.float32)
+    return out
+
+
+# === Sentence embedding cache ===
+# Content-addressed: edited documents and TTA variants only encode sentences
+# this worker has not seen before. 0 bytes disables it.
+_EMB_CACHE_BYTES = getattr(settings, "ML_EMBED_CACHE_MAX_BYTES", 32 * 1024 * 1024)
+_EMB_CACHE = LRUCache(_EMB_CACHE_BYTES, name="embeddings") if _EMB_CACHE_BYTES else None
+
+
+def _embed_key(sentence, version):
+    digest = hashlib.blake2b(sentence.encode("utf-8"), digest_size=16).hexdigest()
+    return f"{version}:{digest}"
+
+
+def encode_sentences(sents):
+    """sbert.encode(sents) that reuses cached embeddings and encodes each new sentence once."""
+    if not sents:
+        return []
+    models = active()
+    if _EMB_CACHE is None:
+        with metrics.stage("encode"):
+            return models.sbert.encode(sents, convert_to_tensor=False)
+    out = [None] * len(sents)
+    todo = {}  # key -> positions of that sentence in sents
+    for i, sent in enumerate(sents):
+        # Keyed by the version that encodes it, so a swap never mixes embeddings
+        key = _embed_key(sent, models.version)
+        cached = _EMB_CACHE.get(key)
+        if cached is None:
+            todo.setdefault(key, []).append(i)
+        else:
+            out[i] = cached
+    if todo:
+        with metrics.stage("encode"):
+            fresh = models.sbert.encode(
+                [sents[positions[0]] for positions in todo.values()],
+                convert_to_tensor=False,
+            )
+        for (key, positions), emb in zip(todo.items(), fresh):
+            emb = np.asarray(emb, dtype=np.float32)
+            _EMB_CACHE.set(key, emb, size=emb.nbytes + len(key))
+            for i in positions:
+                out[i] = emb
+    return np.stack(out)
+
+
+def get_embed(html):
+    # Sentences past MAX_SEQ_LEN are truncated away, so don't encode them
+    sents = clean_html(html, active().cfg["MAX_SEQ_LEN"])
+    embs = encode_sentences(sents)
+    return pad_embeds(embs)[np.newaxis]
+
+
+# === Long documents ===
+def window_spans(n_sents):
+    """
+    (start, end) sentence spans the classifier scores for a document.
+    "truncate" keeps only the first MAX_SEQ_LEN sentences. "sliding" covers the
+    document with overlapping MAX_SEQ_LEN windows every WINDOW_STRIDE sentences
+    (the last window is aligned to the end), capped at WINDOW_MAX windows.
+    """
+    L = active().cfg["MAX_SEQ_LEN"]
+    if WINDOW_MODE != "sliding" or n_sents <= L:
+        return [(0, min(n_sents, L))]
+    stride = _window_stride(L)
+    starts = list(range(0, n_sents - L + 1, stride))
+    if starts[-1] + L < n_sents:
+        starts.append(n_sents - L)
+    return [(s, s + L) for s in starts[:WINDOW_MAX]]
+
+
+def _window_stride(L):
+    return max(1, min(WINDOW_STRIDE, L))
+
+
+def sentence_limit():
+    """
+    Sentences any scored window can reach: MAX_SEQ_LEN when truncating,
+    (WINDOW_MAX - 1) * stride + MAX_SEQ_LEN when sliding. Longer documents get
+    the same window_spans from their first sentence_limit() sentences.
+    """
+    L = active().cfg["MAX_SEQ_LEN"]
+    if WINDOW_MODE != "sliding":
+        return L
+    return (WINDOW_MAX - 1) * _window_stride(L) + L
+
+
+def combine_windows(scores):
+    if WINDOW_AGG == "mean":
+        return float(np.mean(scores))
+    return float(np.max(scores))
+
+
+# === Classifier ===
+def classify(batch):
+    """Class probabilities for a padded (n, MAX_SEQ_LEN, EMBED_DIM) batch."""
+    models = active()
+    with metrics.stage("predict"):
+        if models.predict_fn is not None:
+            prediction = np.asarray(models.predict_fn(batch))
+        else:
+            prediction = models.clf.predict(batch, verbose=0)
+    if not isinstance(prediction, np.ndarray) or prediction.shape != (len(batch), 2):
+        raise ValueError(f"Unexpected prediction output: {prediction}")
+    return prediction
 
 
 # === Confidence check ===
 def confidence_score(html):
+    if WINDOW_MODE == "sliding":
+        return score_batch([html])[0]
     emb = get_embed(html)
     try:
-        prediction = clf.predict(emb)
-        if not isinstance(prediction, (np.ndarray, list)) or len(prediction[0]) != 2:
-            raise ValueError(f"Unexpected prediction output: {prediction}")
-        return float(prediction[0][1])
+        return float(classify(emb)[0][1])
+    except Exception as e:
+        raise RuntimeError(f"Prediction failed: {str(e)}")
+
+
+# === Batched scoring ===
+def score_batch(texts):
+    """
+    Score several documents with a single sbert.encode call and a single
+    classifier forward pass over a (windows, MAX_SEQ_LEN, EMBED_DIM) tensor.
+    Only sentences inside a scored window are encoded. Returns the MH
+    probability for each text, in order (windows combined per WINDOW_AGG).
+    """
+    flat, docs = [], []
+    # Stop parsing once the last window that can be scored is complete
+    limit = sentence_limit()
+    for t in texts:
+        sents = clean_html(t, limit)
+        spans = window_spans(len(sents))
+        # Windows overlap or touch, so everything scored is a prefix of sents
+        docs.append((len(flat), spans))
+        flat.extend(sents[: spans[-1][1]])
+    embs = encode_sentences(flat)
+
+    rows = [
+        pad_embeds(embs[offset + start : offset + end])
+        for offset, spans in docs
+        for start, end in spans
+    ]
+
+    try:
+        probs = classify(np.stack(rows))[:, 1]
     except Exception as e:
         raise RuntimeError(f"Prediction failed: {str(e)}")
+    out, pos = [], 0
+    for _, spans in docs:
+        out.append(combine_windows(probs[pos : pos + len(spans)]))
+        pos += len(spans)
+    return out
+
+
+# === Document vectors (semantic search) ===
+def embed_documents(texts):
+    """
+    One mean-pooled, L2-normalized SBERT vector per text, over the same first
+    MAX_SEQ_LEN sentences the classifier sees, so moderated content reuses the
+    cached sentence embeddings.
+    """
+    with REGISTRY.use() as models:
+        limit = models.cfg["MAX_SEQ_LEN"]
+        per_doc = [clean_html(t, limit) for t in texts]
+        embs = encode_sentences([s for sents in per_doc for s in sents])
+        out = np.zeros((len(texts), models.cfg["EMBED_DIM"]), dtype=np.float32)
+        pos = 0
+        for i, sents in enumerate(per_doc):
+            if sents:
+                v = np.asarray(embs[pos : pos + len(sents)], dtype=np.float32).mean(axis=0)
+                out[i] = v / max(float(np.linalg.norm(v)), 1e-12)
+            pos += len(sents)
+    return out
 
 
 # === Stabilized TTA ===
-def tta_vote(html, n=7):
-    base_votes = 0
-    sents = clean_html(html)
-    for i in range(n):
-        random.seed(SEED + i)
+TTA_N = 7
+TTA_THRESHOLD = 0.65
+TTA_MAJORITY = 5
+
+
+def tta_variants(html, n=TTA_N, start=0):
+    """
+    Build the synonym-swapped variants start..n-1 of html that TTA votes over.
+    Each variant has its own RNG seeded with SEED + i, so any slice matches the
+    full list and concurrent requests never touch the shared random state.
+    """
+    lookup = (
+        synonym_table.lemma_names
+        if synonym_table is not None
+        else synonyms.wordnet_lemma_names
+    )
+    resolved = {}  # each distinct word is looked up once per document
+
+    def candidates(w):
+        if w not in resolved:
+            resolved[w] = synonyms.candidates(lookup(w), w)
+        return resolved[w]
+
+    variants = []
+    # Variants are scored like the document, so later sentences are never seen
+    sents = clean_html(html, sentence_limit())
+    for i in range(start, n):
+        rng = random.Random(SEED + i)
         aug = []
         for sent in sents:
             words = sent.split()
-            for w in random.sample(words, min(2, len(words))):
-                syns = wn.synsets(w)
-                lemmas = {
-                    l.name().replace("_", " ")
-                    for s in syns
-                    for l in s.lemmas()
-                    if l.name() != w
-                }
+            for w in rng.sample(words, min(2, len(words))):
+                lemmas = candidates(w)
                 if lemmas:
-                    words[words.index(w)] = random.choice(list(lemmas))
+                    words[words.index(w)] = rng.choice(lemmas)
             aug.append(" ".join(words))
-        if confidence_score(" ".join(aug)) >= 0.65:
-            base_votes += 1
-    return base_votes >= 5  # require majority
+        variants.append(" ".join(aug))
+    return variants
+
+
+def tta_pass_from_scores(scores):
+    return sum(s >= TTA_THRESHOLD for s in scores) >= TTA_MAJORITY  # require majority
+
+
+@metrics.stage("tta")
+def tta_vote(html, n=TTA_N, batched=None):
+    if batched is None:
+        batched = TTA_BATCHED
+    variants = tta_variants(html, n)
+    if batched:
+        scores = score_batch(variants)
+    else:
+        scores = [confidence_score(v) for v in variants]
+    return tta_pass_from_scores(scores)
 
 
 # === Keyword override ===
@@ -121,27 +510,82 @@ KEYWORDS = [
 ]
 
 
+@metrics.stage("keyword")
 def keyword_override(html):
+    # Match rendered text only, not tag attributes or script contents
+    if PREPROCESSOR != "regex":
+        html = html_text.normalized_text(html)
     text = html.lower()
     return sum(kw in text for kw in KEYWORDS) >= 2
 
 
-# === Caching (avoid reruns) ===
-_CACHE = {}
+# === Micro-batching across concurrent requests ===
+# Only useful with threaded workers (gunicorn --threads); off by default
+_BATCHER = (
+    ModerationBatcher(
+        score_batch,
+        max_batch_docs=getattr(settings, "ML_BATCH_MAX_DOCS", 16),
+        max_wait_ms=getattr(settings, "ML_BATCH_MAX_WAIT_MS", 10),
+        registry=REGISTRY,
+    )
+    if getattr(settings, "ML_BATCHER_ENABLED", False)
+    else None
+)
 
 
-def final_mh_decision(html: str):
-    h = hashlib.md5(html.encode("utf-8")).hexdigest()
-    if h in _CACHE:
-        return _CACHE[h]
+def moderate(html: str, batcher=None):
+    """
+    Run the full ensemble on html without consulting the result cache.
+    Pass batcher=False to bypass the shared micro-batcher (which always scores
+    with the current model version).
+    """
+    if batcher is None:
+        batcher = _BATCHER
+    with REGISTRY.use() as models:
+        if batcher or TTA_BATCHED:
+            # Variants are scored together with the base text, so their encode and
+            # predict time is counted under those stages rather than "tta"
+            with metrics.stage("tta"):
+                variants = tta_variants(html)
+            score = batcher.score if batcher else score_batch
+            scores = score([html] + variants)
+            conf, tta_pass = scores[0], tta_pass_from_scores(scores[1:])
+        else:
+            conf = confidence_score(html)
+            tta_pass = tta_vote(html, batched=False)
+    return _full_result(conf, tta_pass, keyword_override(html), models.version)
 
-    print("🧠 Running AI moderation pipeline...")  # Log entry
 
-    load_models()
-    conf = confidence_score(html)
+def moderate_batch(htmls):
+    """
+    Full-mode verdicts for many documents: every base text and TTA variant
+    goes through one score_batch call (one encode, one classifier pass).
+    """
+    with REGISTRY.use() as models:
+        texts, counts = [], []
+        for html in htmls:
+            with metrics.stage("tta"):
+                doc_texts = [html] + tta_variants(html)
+            texts.extend(doc_texts)
+            counts.append(len(doc_texts))
+        scores = score_batch(texts) if texts else []
+    results, pos = [], 0
+    for html, n in zip(htmls, counts):
+        doc_scores = scores[pos : pos + n]
+        pos += n
+        results.append(
+            _full_result(
+                doc_scores[0],
+                tta_pass_from_scores(doc_scores[1:]),
+                keyword_override(html),
+                models.version,
+            )
+        )
+    return results
+
+
+def _full_result(conf, tta_pass, over_pass, version):
     conf_pass = conf >= 0.75
-    tta_pass = tta_vote(html)
-    over_pass = keyword_override(html)
     votes = sum([conf_pass, tta_pass, over_pass])
     valid = votes >= 1
 
@@ -161,6 +605,95 @@ def final_mh_decision(html: str):
                 else "Blocking — insufficient MH signal"
             )
         ),
+        "mode": "full",
+        "stages": ["confidence", "tta", "keyword"],
+        "skipped": [],
+        "budget_exhausted": False,
+        "model": version,
     }
-    _CACHE[h] = result
     return result
+
+
+# === Fast mode: cost-ordered stages with early exit ===
+def moderate_fast(html: str, budget_ms=None, batcher=None):
+    """
+    Same verdict as moderate(), since a single passing vote allows the content,
+    but runs stages cheapest first and stops once the verdict is settled:
+    keyword override, then the base confidence score, then TTA variants scored
+    only until a majority is reached or can no longer be reached.
+
+    The result has the same fields as moderate(); those of stages that did not
+    run are None and the stages are listed in "skipped". With budget_ms, once
+    the budget is spent the remaining TTA variants are scored in one batch
+    instead of round by round (budget_exhausted=True): the stages already run
+    are kept, so the budget bounds round trips without redoing work, and
+    slowness never blocks content by itself.
+    """
+    t0 = time.perf_counter()
+    if batcher is None:
+        batcher = _BATCHER
+    score = batcher.score if batcher else score_batch
+    result = {
+        "valid": False,
+        "confidence_score": None,
+        "confidence_pass": None,
+        "tta_pass": None,
+        "override_pass": None,
+        "votes": 0,
+        "note": "Blocking — insufficient MH signal",
+        "mode": "fast",
+        "stages": [],
+        "skipped": [],
+        "budget_exhausted": False,
+        # The keyword stage needs no model weights
+        "model": model_fingerprint(),
+    }
+
+    def finish(note=None):
+        result["votes"] = sum(
+            bool(result[f"{vote}_pass"]) for vote in ("confidence", "tta", "override")
+        )
+        result["skipped"] = [
+            stage for stage in ("keyword", "confidence", "tta") if stage not in result["stages"]
+        ]
+        if note:
+            result["valid"] = True
+            result["note"] = note
+        return result
+
+    def out_of_budget():
+        return budget_ms is not None and (time.perf_counter() - t0) * 1000 >= budget_ms
+
+    result["stages"].append("keyword")
+    result["override_pass"] = keyword_override(html)
+    if result["override_pass"]:
+        return finish("Allowed by override")
+
+    with REGISTRY.use() as models:
+        result["model"] = models.version
+        result["stages"].append("confidence")
+        conf = score([html])[0]
+        result["confidence_score"] = round(conf, 3)
+        result["confidence_pass"] = conf >= 0.75
+        if result["confidence_pass"]:
+            return finish("Allowed by confidence")
+
+        result["stages"].append("tta")
+        passes = scored = 0
+        while TTA_MAJORITY - passes <= TTA_N - scored and passes < TTA_MAJORITY:
+            if out_of_budget():
+                # Settle it in one more batch rather than several rounds
+                result["budget_exhausted"] = True
+                need = TTA_N - scored
+            else:
+                # Score only as many variants as could still complete a majority
+                need = TTA_MAJORITY - passes
+            with metrics.stage("tta"):
+                scores = score(tta_variants(html, scored + need, start=scored))
+            passes += sum(s >= TTA_THRESHOLD for s in scores)
+            scored += need
+    result["tta_pass"] = passes >= TTA_MAJORITY
+    result["tta_variants_scored"] = scored
+    if result["tta_pass"]:
+        return finish("Allowed by TTA")
+    return finish()
@@ -0,0 +1,160 @@
+"""
+Thread-safe holder for the loaded moderation models, with hot swapping.
+
+The registry loads a model bundle once per process (concurrent first requests
+wait for the same load). Requests run inside `with registry.use() as models:`.
+This pins the bundle they started with, caps concurrent inferences, and binds
+the bundle to the thread so helpers deep in the pipeline see the same version.
+
+swap() installs a new bundle atomically. New requests get it at once, and the
+old bundle is released once its in-flight requests have drained. While the new
+bundle loads, both versions are in memory.
+"""
+
+import threading
+import contextlib
+
+
+class ModelRegistry:
+    def __init__(
+        self, loader, max_concurrent=0, version_fn=None, drain_timeout=60
+    ):
+        """
+        loader() returns a new bundle with a `version` attribute. When version_fn
+        is given, use() compares it with the current bundle's version and reloads
+        in the background when they differ.
+        """
+        self.loader = loader
+        self.version_fn = version_fn
+        self.drain_timeout = drain_timeout
+        self._current = None
+        self._inflight = {}  # id(bundle) -> requests still using it
+        self._lock = threading.Lock()
+        self._cond = threading.Condition()
+        self._local = threading.local()
+        self._slots = (
+            threading.BoundedSemaphore(max_concurrent) if max_concurrent else None
+        )
+        self._reloading = False
+        self._failed_version = None
+        self.swaps = 0
+
+    @property
+    def current(self):
+        return self._current
+
+    def get(self):
+        """The current bundle, loading it on first use."""
+        if self._current is None:
+            with self._lock:
+                if self._current is None:
+                    self._current = self.loader()
+        return self._current
+
+    def bound(self):
+        """Bundle pinned by the enclosing use() on this thread, else the current one."""
+        return getattr(self._local, "models", None) or self.get()
+
+    @contextlib.contextmanager
+    def use(self):
+        if getattr(self._local, "models", None) is not None:
+            # Re-entrant: nested calls stay on the bundle (and slot) already held
+            yield self._local.models
+            return
+        if self._slots is not None:
+            self._slots.acquire()
+        try:
+            self._maybe_reload()
+            self.get()
+            with self._cond:
+                models = self._current
+                self._hold(models)
+            self._local.models = models
+            try:
+                yield models
+            finally:
+                self._local.models = None
+                self._release(models)
+        finally:
+            if self._slots is not None:
+                self._slots.release()
+
+    @contextlib.contextmanager
+    def borrow(self, models):
+        """
+        Pin models, already held by another thread's use(), on this thread. For
+        helper threads working on a request's behalf (the micro-batcher): no slot
+        is taken, since the request holds one, but swap() still waits for them.
+        """
+        with self._cond:
+            self._hold(models)
+        previous = getattr(self._local, "models", None)
+        self._local.models = models
+        try:
+            yield models
+        finally:
+            self._local.models = previous
+            self._release(models)
+
+    def _hold(self, models):
+        # Caller holds self._cond
+        self._inflight[id(models)] = self._inflight.get(id(models), 0) + 1
+
+    def _release(self, models):
+        with self._cond:
+            self._inflight[id(models)] -= 1
+            if not self._inflight[id(models)]:
+                del self._inflight[id(models)]
+            self._cond.notify_all()
+
+    def swap(self, models):
+        """Make models current, then wait for requests on the old bundle to finish."""
+        with self._cond:
+            old, self._current = self._current, models
+            self.swaps += 1
+        if old is None or old is models:
+            return True
+        with self._cond:
+            drained = self._cond.wait_for(
+                lambda: id(old) not in self._inflight, self.drain_timeout
+            )
+        if not drained:
+            print(
+                f"⚠️ Model {old.version} still in use after {self.drain_timeout}s; "
+                "releasing it anyway"
+            )
+        return drained
+
+    def reload(self):
+        """Load a fresh bundle from disk and swap it in."""
+        models = self.loader()
+        self.swap(models)
+        print(f"🔁 Model swapped to {models.version}")
+        return models
+
+    def _maybe_reload(self):
+        if self.version_fn is None or self._current is None or self._reloading:
+            return
+        version = self.version_fn()
+        if version in (self._current.version, self._failed_version):
+            return
+        with self._lock:
+            if self._reloading:
+                return
+            self._reloading = True
+        threading.Thread(
+            target=self._background_reload,
+            args=(version,),
+            name="model-reload",
+            daemon=True,
+        ).start()
+
+    def _background_reload(self, version):
+        try:
+            self.reload()
+        except Exception as e:
+            # Keep serving the old version until the files on disk change again
+            self._failed_version = version
+            print("❌ Model reload failed:", str(e))
+        finally:
+            self._reloading = False
@@ -0,0 +1,151 @@
+"""
+Local inference server that owns the moderation models.
+
+Web workers talk to it over a Unix socket with newline-delimited JSON, so only
+the server processes pay for TensorFlow, torch, SBERT and WordNet. The server can
+prefork a small pool of processes that accept on the same socket; each loads the
+models after the fork.
+
+Request:  {"op": "moderate", "html": "...", "mode": "fast", "budget_ms": null},
+          {"op": "moderate_batch", "htmls": [...]},  {"op": "score", "texts": [...]}
+          or  {"op": "embed", "texts": [...]}
+Response: {"ok": true, "result": ...}        or  {"ok": false, "error": "..."}
+"""
+
+import os
+import sys
+import json
+import socket
+import signal
+import socketserver
+
+
+class ModelServerError(Exception):
+    """The model server could not be reached or failed to answer."""
+
+
+# === Client (used by web workers) ===
+class ModelServerClient:
+    def __init__(self, socket_path, timeout=30):
+        self.socket_path = socket_path
+        self.timeout = timeout
+
+    def _call(self, payload):
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                sock.settimeout(self.timeout)
+                sock.connect(self.socket_path)
+                sock.sendall(json.dumps(payload).encode("utf-8") + b"\n")
+                with sock.makefile("rb") as f:
+                    line = f.readline()
+        except (OSError, socket.timeout) as e:
+            raise ModelServerError(f"{type(e).__name__}: {e}") from e
+        if not line:
+            raise ModelServerError("Model server closed the connection")
+        # A truncated or garbled reply is a server failure too, so callers fall back
+        try:
+            reply = json.loads(line)
+            ok, result = reply.get("ok"), reply.get("result")
+        except (ValueError, AttributeError) as e:
+            raise ModelServerError(f"Malformed model server reply: {e}") from e
+        if not ok:
+            raise ModelServerError(reply.get("error", "Unknown model server error"))
+        return result
+
+    def moderate(self, html, mode="full", budget_ms=None):
+        return self._call(
+            {"op": "moderate", "html": html, "mode": mode, "budget_ms": budget_ms}
+        )
+
+    def moderate_batch(self, htmls):
+        return self._call({"op": "moderate_batch", "htmls": list(htmls)})
+
+    def score(self, texts):
+        return self._call({"op": "score", "texts": list(texts)})
+
+    def embed(self, texts):
+        return self._call({"op": "embed", "texts": list(texts)})
+
+    def ping(self):
+        return self._call({"op": "ping"})
+
+
+# === Server ===
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        from utils import ml_model
+
+        for line in self.rfile:
+            try:
+                req = json.loads(line)
+                op = req.get("op")
+                if op == "moderate" and req.get("mode") == "fast":
+                    result = ml_model.moderate_fast(
+                        req["html"], budget_ms=req.get("budget_ms")
+                    )
+                elif op == "moderate":
+                    result = ml_model.moderate(req["html"])
+                elif op == "moderate_batch":
+                    result = ml_model.moderate_batch(req["htmls"])
+                elif op == "score":
+                    with ml_model.REGISTRY.use():
+                        result = ml_model.score_batch(req["texts"])
+                elif op == "embed":
+                    result = ml_model.embed_documents(req["texts"]).tolist()
+                elif op == "ping":
+                    result = {"pid": os.getpid()}
+                else:
+                    raise ValueError(f"Unknown op: {op}")
+                reply = {"ok": True, "result": result}
+            except Exception as e:
+                reply = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+            self.wfile.write(json.dumps(reply).encode("utf-8") + b"\n")
+            self.wfile.flush()
+
+
+class _Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def serve(socket_path, processes=1):
+    """
+    Bind socket_path and serve until interrupted. With processes > 1 the
+    listening socket is shared by forked children; the kernel spreads
+    connections across them.
+    """
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+    server = _Server(socket_path, _Handler)
+    os.chmod(socket_path, 0o660)
+
+    children = []
+    for _ in range(processes - 1):
+        pid = os.fork()
+        if pid == 0:
+            try:
+                _serve_forever(server)
+            finally:
+                os._exit(0)
+        children.append(pid)
+
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    try:
+        _serve_forever(server)
+    finally:
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        server.server_close()
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+
+
+def _serve_forever(server):
+    # Load models in each process after the fork; TF state is not fork-safe
+    from utils import ml_model
+
+    ml_model.warmup()
+    print(f"🧠 Model server ready (pid {os.getpid()})")
+    server.serve_forever()
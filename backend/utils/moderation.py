@@ -0,0 +1,204 @@
+"""
+Entry point the views use for AI moderation.
+
+This module stays light: it never imports TensorFlow or torch itself. When
+ML_SERVER_SOCKET is set, scoring is delegated to the local model server
+(see utils.model_server) and web workers only hold the result cache. Otherwise,
+or when the server is unreachable and fallback is enabled, the models are loaded
+in-process through utils.ml_model.
+"""
+
+import os
+import time
+
+from django.conf import settings
+
+from utils import metrics, near_duplicates
+from utils.moderation_cache import build_cache, cache_key
+from utils.moderation_jobs import ModerationJobs
+from utils.model_server import ModelServerClient, ModelServerError
+
+# === Caching (avoid reruns) ===
+# In-process LRU in front of a store shared by all workers; see utils.moderation_cache
+_CACHE = build_cache()
+
+_SERVER_SOCKET = getattr(settings, "ML_SERVER_SOCKET", "")
+_CLIENT = (
+    ModelServerClient(
+        _SERVER_SOCKET, timeout=getattr(settings, "ML_SERVER_TIMEOUT", 30)
+    )
+    if _SERVER_SOCKET
+    else None
+)
+_FALLBACK = getattr(settings, "ML_SERVER_FALLBACK", True)
+
+# "fast" runs the cheapest stages first and stops once the verdict is settled;
+# "full" (the default) always runs every stage and fills every field. Verdicts are the same.
+MODES = ("fast", "full")
+DEFAULT_MODE = getattr(settings, "ML_DECISION_MODE", "full")
+
+
+def final_mh_decision(html: str, mode=None, budget_ms=None):
+    mode = mode or DEFAULT_MODE
+    if mode not in MODES:
+        raise ValueError(f"Unknown moderation mode: {mode}")
+    t0 = time.perf_counter()
+    suffix = "" if mode == "full" else f":{mode}"
+    h = cache_key(html) + suffix
+    cached = _CACHE.get(h)
+    metrics.record_cache(cached is not None)
+    if cached is not None:
+        _observe(cached, mode, "cache", t0)
+        return cached
+
+    sig = _signature(html)
+    near = _near_duplicate_verdict(h, sig, suffix)
+    if near is not None:
+        _CACHE.set(h, near)
+        _observe(near, mode, "near_duplicate", t0)
+        return near
+
+    print("🧠 Running AI moderation pipeline...")  # Log entry
+
+    result = _moderate(html, mode, budget_ms)
+    if _cacheable(h, result):
+        _CACHE.set(h, result)
+        _remember_text(h, sig, suffix)
+    _observe(result, mode, "model", t0)
+    return result
+
+
+# === Near-duplicate reuse ===
+# Texts whose verdict was cached are added to the MinHash index by digest, so a
+# later near-identical text (typo fixes, copy-paste spam) can reuse the verdict
+def _signature(html):
+    if not near_duplicates.ENABLED:
+        return None
+    try:
+        return near_duplicates.signature(html)
+    except Exception as e:
+        print("⚠️ Near-duplicate signature failed:", str(e))
+        return None
+
+
+def _near_duplicate_verdict(key, sig, suffix):
+    if sig is None:
+        return None
+    fp, digest = key[: -len(suffix) or None].split(":", 1)
+    try:
+        matches = near_duplicates.INDEX.lookup(sig, exclude=f"text:{digest}")
+    except Exception as e:
+        print("⚠️ Near-duplicate lookup failed:", str(e))
+        return None
+    for ref, match_digest, score in matches:
+        if not ref.startswith("text:"):
+            continue
+        verdict = _CACHE.get(f"{fp}:{match_digest}{suffix}")
+        if verdict is not None:
+            return {**verdict, "near_duplicate_similarity": round(score, 3)}
+    return None
+
+
+def _remember_text(key, sig, suffix):
+    if sig is None:
+        return
+    digest = key[: -len(suffix) or None].split(":", 1)[1]
+    try:
+        near_duplicates.INDEX.add(f"text:{digest}", sig, digest=digest)
+    except Exception as e:
+        print("⚠️ Near-duplicate index update failed:", str(e))
+
+
+def _cacheable(key, result):
+    # A verdict from a model version still draining after a swap belongs to the old key
+    return result.get("model") in (None, key.split(":", 1)[0])
+
+
+def _observe(result, mode, source, t0):
+    metrics.DECISION_SECONDS.labels(mode, source).observe(time.perf_counter() - t0)
+    metrics.record_verdict(result)
+
+
+def final_mh_decisions(htmls):
+    """
+    Full-mode verdicts for many documents, in order. Cached verdicts are reused;
+    the rest are scored together in one batch, each distinct cache key once.
+    """
+    keys = [cache_key(html) for html in htmls]
+    results = [_CACHE.get(k) for k in keys]
+    todo = {}  # key -> indices of the documents sharing it
+    for i, r in enumerate(results):
+        metrics.record_cache(r is not None)
+        if r is None:
+            todo.setdefault(keys[i], []).append(i)
+    if todo:
+        print(f"🧠 Running AI moderation pipeline on {len(todo)} documents...")
+        fresh = _moderate_batch([htmls[indices[0]] for indices in todo.values()])
+        for (key, indices), result in zip(todo.items(), fresh):
+            if _cacheable(key, result):
+                _CACHE.set(key, result)
+            for i in indices:
+                results[i] = result
+    for r in results:
+        metrics.record_verdict(r)
+    return results
+
+
+def _moderate_batch(htmls):
+    if _CLIENT is not None:
+        try:
+            return _CLIENT.moderate_batch(htmls)
+        except ModelServerError as e:
+            if not _FALLBACK:
+                raise
+            print("⚠️ Model server unavailable, scoring in-process:", str(e))
+
+    from utils import ml_model
+
+    return ml_model.moderate_batch(htmls)
+
+
+def embed_texts(texts):
+    """Document vectors for semantic search, from the model server when configured."""
+    if _CLIENT is not None:
+        try:
+            return _CLIENT.embed(texts)
+        except ModelServerError as e:
+            if not _FALLBACK:
+                raise
+            print("⚠️ Model server unavailable, embedding in-process:", str(e))
+
+    from utils import ml_model
+
+    return ml_model.embed_documents(texts)
+
+
+def _moderate(html, mode, budget_ms):
+    if _CLIENT is not None:
+        try:
+            return _CLIENT.moderate(html, mode, budget_ms)
+        except ModelServerError as e:
+            if not _FALLBACK:
+                raise
+            print("⚠️ Model server unavailable, scoring in-process:", str(e))
+
+    from utils import ml_model
+
+    if mode == "fast":
+        return ml_model.moderate_fast(html, budget_ms=budget_ms)
+    return ml_model.moderate(html)
+
+
+# === Async jobs ===
+# Background threads in each web worker; status is shared through SQLite
+JOBS = ModerationJobs(
+    getattr(
+        settings,
+        "ML_JOBS_PATH",
+        os.path.join(settings.ML_MODELS_DIR, "cache", "moderation_jobs.sqlite3"),
+    ),
+    run_fn=lambda html, mode, budget_ms: final_mh_decision(html, mode, budget_ms),
+    workers=getattr(settings, "ML_JOBS_WORKERS", 1),
+    max_queued=getattr(settings, "ML_JOBS_MAX_QUEUED", 100),
+    result_ttl=getattr(settings, "ML_JOBS_RESULT_TTL", 3600),
+)
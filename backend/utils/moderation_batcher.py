@@ -0,0 +1,148 @@
+"""
+Dynamic micro-batching for concurrent moderation requests.
+
+Each caller hands over the texts it needs scored (the base document plus its
+TTA variants) and blocks. A single background thread merges whatever is queued
+into one score_batch call, flushing when max_batch_docs callers are waiting or
+when the oldest caller has waited max_wait_ms, then fans the scores back out.
+
+With a model registry, each caller's pinned model bundle travels with its
+texts and the batch is scored under registry.borrow() of that bundle, so a hot
+swap never changes the model in the middle of a request. Callers on different
+bundles (during a swap) go into separate score calls.
+"""
+
+import os
+import time
+import threading
+
+from utils import metrics
+
+
+class _Pending:
+    __slots__ = ("texts", "models", "enqueued_at", "event", "scores", "error")
+
+    def __init__(self, texts, models=None):
+        self.texts = texts
+        self.models = models
+        self.enqueued_at = time.monotonic()
+        self.event = threading.Event()
+        self.scores = None
+        self.error = None
+
+
+class ModerationBatcher:
+    def __init__(self, score_fn, max_batch_docs=16, max_wait_ms=10, registry=None):
+        self.score_fn = score_fn
+        self.registry = registry
+        self.max_batch_docs = max_batch_docs
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue = []
+        self._cond = threading.Condition()
+        self._thread = None
+        self._pid = None
+        # metrics
+        self.max_queue_depth = 0
+        self.batches = self.docs = self.texts = 0
+        self.flush_full = self.flush_deadline = 0
+        self.wait_seconds = 0.0
+
+    def score(self, texts, timeout=None):
+        """Queue texts for the next batch and block until their scores are ready."""
+        self._ensure_worker()
+        models = self.registry.bound() if self.registry is not None else None
+        req = _Pending(list(texts), models)
+        with self._cond:
+            self._queue.append(req)
+            self.max_queue_depth = max(self.max_queue_depth, len(self._queue))
+            metrics.BATCH_QUEUE_DEPTH.set(len(self._queue))
+            self._cond.notify()
+        if not req.event.wait(timeout):
+            with self._cond:
+                if req in self._queue:
+                    self._queue.remove(req)
+            raise TimeoutError("Moderation batch did not complete in time")
+        if req.error is not None:
+            raise req.error
+        return req.scores
+
+    def _ensure_worker(self):
+        # Threads do not survive fork, so gunicorn workers each start their own
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._cond:
+            if self._thread is None or self._pid != os.getpid():
+                self._queue = []
+                self._pid = os.getpid()
+                self._thread = threading.Thread(
+                    target=self._run, name="moderation-batcher", daemon=True
+                )
+                self._thread.start()
+
+    def _next_batch(self):
+        with self._cond:
+            while not self._queue:
+                self._cond.wait()
+            deadline = self._queue[0].enqueued_at + self.max_wait
+            while len(self._queue) < self.max_batch_docs:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            batch = self._queue[: self.max_batch_docs]
+            del self._queue[: self.max_batch_docs]
+            metrics.BATCH_QUEUE_DEPTH.set(len(self._queue))
+        if len(batch) == self.max_batch_docs:
+            self.flush_full += 1
+        else:
+            self.flush_deadline += 1
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            now = time.monotonic()
+            groups = {}
+            for req in batch:
+                groups.setdefault(id(req.models), []).append(req)
+            for group in groups.values():
+                self._score(group)
+            self.batches += 1
+            self.docs += len(batch)
+            self.texts += sum(len(req.texts) for req in batch)
+            self.wait_seconds += sum(now - req.enqueued_at for req in batch)
+            metrics.BATCH_DOCS.observe(len(batch))
+            for req in batch:
+                metrics.BATCH_WAIT_SECONDS.observe(now - req.enqueued_at)
+                req.event.set()
+
+    def _score(self, group):
+        flat = [t for req in group for t in req.texts]
+        try:
+            if self.registry is not None:
+                with self.registry.borrow(group[0].models):
+                    scores = self.score_fn(flat)
+            else:
+                scores = self.score_fn(flat)
+            pos = 0
+            for req in group:
+                req.scores = scores[pos : pos + len(req.texts)]
+                pos += len(req.texts)
+        except Exception as e:
+            for req in group:
+                req.error = e
+
+    def stats(self):
+        return {
+            "queue_depth": len(self._queue),
+            "max_queue_depth": self.max_queue_depth,
+            "batches": self.batches,
+            "docs": self.docs,
+            "texts": self.texts,
+            "avg_batch_docs": round(self.docs / self.batches, 2) if self.batches else 0,
+            "avg_wait_ms": (
+                round(self.wait_seconds / self.docs * 1000, 2) if self.docs else 0
+            ),
+            "flush_full": self.flush_full,
+            "flush_deadline": self.flush_deadline,
+        }
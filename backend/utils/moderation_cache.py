@@ -0,0 +1,358 @@
+"""
+Two-tier cache for final_mh_decision results.
+
+Tier 1 is an in-process LRU bounded by a byte budget. Tier 2 is shared between
+gunicorn workers (and restarts): a local SQLite file by default, or Firestore
+so several instances can share verdicts. Keys combine the normalized text with
+a fingerprint of the model files, so swapping a model never serves old verdicts.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+
+from utils import metrics
+from utils.html_text import normalized_text
+
+FINGERPRINT_FILES = (
+    "model_config.json",
+    "final_mh_classifier.h5",
+    "synonyms.bin",
+    os.path.join("final_fine_tuned_sbert_model", "model.safetensors"),
+    os.path.join("final_fine_tuned_sbert_model", "pytorch_model.bin"),
+    os.path.join("final_fine_tuned_sbert_model", "config.json"),
+    os.path.join("onnx", "sbert_encoder.onnx"),
+    os.path.join("onnx", "sbert_encoder.int8.onnx"),
+    os.path.join("onnx", "mh_classifier.onnx"),
+)
+
+_fingerprint = None  # (stamp, fingerprint) for settings.ML_MODELS_DIR
+_checked_at = 0.0
+
+
+def model_stamp(base=None):
+    """Cheap (path, mtime, size) summary of the model files, to notice replacements."""
+    stamp = []
+    for rel in FINGERPRINT_FILES:
+        try:
+            st = os.stat(os.path.join(base or settings.ML_MODELS_DIR, rel))
+        except FileNotFoundError:
+            continue
+        stamp.append((rel, st.st_mtime_ns, st.st_size))
+    return tuple(stamp)
+
+
+def model_fingerprint(base=None):
+    """
+    Short sha256 over model_config.json and the weight files that exist. With
+    ML_MODEL_HOT_RELOAD the files are re-stat'ed every ML_MODEL_RELOAD_CHECK_SECONDS
+    and rehashed when they changed, so new verdicts get new cache keys.
+    """
+    global _fingerprint, _checked_at
+    if _fingerprint and base is None:
+        if not getattr(settings, "ML_MODEL_HOT_RELOAD", False):
+            return _fingerprint[1]
+        now = time.monotonic()
+        if now - _checked_at < getattr(settings, "ML_MODEL_RELOAD_CHECK_SECONDS", 5):
+            return _fingerprint[1]
+        _checked_at = now
+        if model_stamp() == _fingerprint[0]:
+            return _fingerprint[1]
+    stamp = model_stamp(base)
+    h = hashlib.sha256()
+    # Backends, int8 mode, preprocessing and window settings change scores; keep their verdicts apart
+    backend = getattr(settings, "ML_INFERENCE_BACKEND", "tf")
+    quantized = getattr(settings, "ML_SBERT_QUANTIZED", False)
+    preprocessor = getattr(settings, "ML_PREPROCESSOR", "regex")
+    h.update(f"{backend}:int8={quantized}:{preprocessor}".encode("utf-8"))
+    window = getattr(settings, "ML_WINDOW_MODE", "truncate")
+    if window != "truncate":
+        h.update(
+            f"{window}:{settings.ML_WINDOW_STRIDE}:{settings.ML_WINDOW_MAX}:"
+            f"{settings.ML_WINDOW_AGG}".encode("utf-8")
+        )
+    for rel in FINGERPRINT_FILES:
+        path = os.path.join(base or settings.ML_MODELS_DIR, rel)
+        if not os.path.exists(path):
+            continue
+        h.update(rel.encode("utf-8"))
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+    fp = h.hexdigest()[:16]
+    if base is None:
+        _fingerprint = (stamp, fp)
+        _checked_at = time.monotonic()
+    return fp
+
+
+def normalize_text(html: str) -> str:
+    """
+    The text every stage of the pipeline sees. With the stream preprocessor that
+    is the extracted text (keyword_override reads it too), so markup-only edits
+    share a verdict; with regex, keyword_override reads the raw html, so only
+    byte-identical submissions may share one.
+    """
+    if getattr(settings, "ML_PREPROCESSOR", "regex") == "stream":
+        return normalized_text(html)
+    return html
+
+
+def text_digest(html: str) -> str:
+    return hashlib.sha256(normalize_text(html).encode("utf-8")).hexdigest()
+
+
+def cache_key(html: str, fingerprint=None) -> str:
+    return f"{fingerprint or model_fingerprint()}:{text_digest(html)}"
+
+
+# === Tier 1: in-process LRU ===
+class LRUCache:
+    def __init__(self, max_bytes=16 * 1024 * 1024, ttl=None, name=None):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.name = name  # label for the removal counters in utils.metrics
+        self._data = OrderedDict()  # key -> (expires_at, size, value)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = self.expirations = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, size, value = entry
+            if expires_at and expires_at < time.time():
+                self._drop(key)
+                self.expirations += 1
+                self.misses += 1
+                self._record("expired")
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, size=None):
+        if size is None:
+            size = len(key) + len(json.dumps(value))
+        if size > self.max_bytes:
+            return
+        expires_at = time.time() + self.ttl if self.ttl else None
+        with self._lock:
+            if key in self._data:
+                self._drop(key)
+            self._data[key] = (expires_at, size, value)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                self._drop(next(iter(self._data)))
+                self.evictions += 1
+                self._record("evicted")
+
+    def delete(self, key):
+        with self._lock:
+            if key in self._data:
+                self._drop(key)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def _drop(self, key):
+        self._bytes -= self._data.pop(key)[1]
+
+    def _record(self, reason):
+        if self.name:
+            metrics.LRU_REMOVALS.labels(self.name, reason).inc()
+
+    def stats(self):
+        return {
+            "entries": len(self._data),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+# === Tier 2: shared stores ===
+class SQLiteStore:
+    """
+    Shared file store; safe across worker processes thanks to WAL mode. Every
+    purge_every writes, rows older than the TTL are deleted, so the file stays
+    bounded by the write rate over one TTL.
+    """
+
+    def __init__(self, path, ttl=None, purge_every=500):
+        self.path = path
+        self.ttl = ttl
+        self.purge_every = purge_every
+        self._writes = 0
+        self._conn = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _connection(self):
+        # Reconnect after fork: a sqlite handle must not cross process boundaries
+        if self._conn is None or self._pid != os.getpid():
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._conn = sqlite3.connect(
+                self.path, timeout=5, check_same_thread=False, isolation_level=None
+            )
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS moderation_cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS moderation_cache_created "
+                "ON moderation_cache (created_at)"
+            )
+            self._pid = os.getpid()
+        return self._conn
+
+    def get(self, key):
+        with self._lock:
+            row = (
+                self._connection()
+                .execute(
+                    "SELECT value, created_at FROM moderation_cache WHERE key = ?",
+                    (key,),
+                )
+                .fetchone()
+            )
+        if row is None:
+            return None
+        value, created_at = row
+        if self.ttl and created_at + self.ttl < time.time():
+            self.delete(key)
+            return None
+        return json.loads(value)
+
+    def set(self, key, value):
+        with self._lock:
+            self._connection().execute(
+                "INSERT OR REPLACE INTO moderation_cache VALUES (?, ?, ?)",
+                (key, json.dumps(value), time.time()),
+            )
+            self._writes += 1
+            purge = self.purge_every and self._writes % self.purge_every == 0
+        if purge:
+            self.purge_expired()
+
+    def delete(self, key):
+        with self._lock:
+            self._connection().execute(
+                "DELETE FROM moderation_cache WHERE key = ?", (key,)
+            )
+
+    def purge_expired(self):
+        if not self.ttl:
+            return 0
+        with self._lock:
+            cur = self._connection().execute(
+                "DELETE FROM moderation_cache WHERE created_at < ?",
+                (time.time() - self.ttl,),
+            )
+        return cur.rowcount
+
+
+class FirestoreStore:
+    """Shared store across instances, one document per cache key."""
+
+    def __init__(self, collection="moderation_cache", ttl=None):
+        self.collection = collection
+        self.ttl = ttl
+
+    def _ref(self, key):
+        from theramind_backend.config import db
+
+        return db.collection(self.collection).document(key.replace(":", "_"))
+
+    def get(self, key):
+        doc = self._ref(key).get()
+        if not doc.exists:
+            return None
+        data = doc.to_dict()
+        if self.ttl and data.get("created_at", 0) + self.ttl < time.time():
+            return None
+        return data.get("value")
+
+    def set(self, key, value):
+        self._ref(key).set({"value": value, "created_at": time.time()})
+
+    def delete(self, key):
+        self._ref(key).delete()
+
+
+# === Two-tier front ===
+class ModerationCache:
+    def __init__(self, local, shared=None):
+        self.local = local
+        self.shared = shared
+        self.shared_hits = self.shared_errors = 0
+
+    def get(self, key):
+        value = self.local.get(key)
+        if value is not None or self.shared is None:
+            return value
+        try:
+            value = self.shared.get(key)
+        except Exception as e:
+            # The shared tier is an optimisation; never fail moderation over it
+            self.shared_errors += 1
+            print("⚠️ Shared moderation cache read failed:", str(e))
+            return None
+        if value is not None:
+            self.shared_hits += 1
+            self.local.set(key, value)
+        return value
+
+    def set(self, key, value):
+        self.local.set(key, value)
+        if self.shared is None:
+            return
+        try:
+            self.shared.set(key, value)
+        except Exception as e:
+            self.shared_errors += 1
+            print("⚠️ Shared moderation cache write failed:", str(e))
+
+    def stats(self):
+        return self.local.stats() | {
+            "shared_backend": type(self.shared).__name__ if self.shared else None,
+            "shared_hits": self.shared_hits,
+            "shared_errors": self.shared_errors,
+        }
+
+
+def build_cache():
+    ttl = getattr(settings, "ML_CACHE_TTL", None)
+    local = LRUCache(
+        getattr(settings, "ML_CACHE_MAX_BYTES", 16 * 1024 * 1024), ttl, name="moderation"
+    )
+    backend = getattr(settings, "ML_CACHE_BACKEND", "sqlite")
+    if backend == "sqlite":
+        path = getattr(
+            settings,
+            "ML_CACHE_PATH",
+            os.path.join(tempfile.gettempdir(), "theramind", "moderation.sqlite3"),
+        )
+        shared = SQLiteStore(path, ttl)
+    elif backend == "firestore":
+        shared = FirestoreStore(ttl=ttl)
+    else:
+        shared = None
+    return ModerationCache(local, shared)
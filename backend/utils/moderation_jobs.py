@@ -0,0 +1,224 @@
+"""
+Asynchronous moderation jobs without an external broker.
+
+Jobs live in a SQLite file (WAL mode) shared by every gunicorn worker on the
+host, so any worker can answer a status poll and the queue bound is global.
+Each worker process runs a few background threads that claim the next queued
+job (highest priority first, then oldest), run it and store the verdict.
+Threads are woken immediately for jobs submitted in their own process and poll
+for jobs submitted elsewhere. Finished jobs expire after result_ttl seconds.
+"""
+
+import os
+import json
+import time
+import uuid
+import sqlite3
+import threading
+
+PRIORITIES = {"high": 0, "normal": 1, "low": 2}
+_PRIORITY_NAMES = {v: k for k, v in PRIORITIES.items()}
+
+
+class QueueFull(Exception):
+    """Too many jobs are already waiting; the client should retry later."""
+
+
+class ModerationJobs:
+    def __init__(
+        self,
+        path,
+        run_fn,
+        workers=1,
+        max_queued=100,
+        result_ttl=3600,
+        stale_after=600,
+        poll_interval=0.5,
+    ):
+        self.path = path
+        self.run_fn = run_fn
+        self.workers = workers
+        self.max_queued = max_queued
+        self.result_ttl = result_ttl
+        self.stale_after = stale_after
+        self.poll_interval = poll_interval
+        self._local = threading.local()
+        self._cond = threading.Condition()
+        self._threads = []
+        self._pid = None
+        self._start_lock = threading.Lock()
+
+    # === Storage ===
+    def _connection(self):
+        # One connection per thread, reopened after fork
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS moderation_jobs ("
+                "id TEXT PRIMARY KEY, status TEXT NOT NULL, priority INTEGER NOT NULL, "
+                "html TEXT, mode TEXT, budget_ms REAL, result TEXT, error TEXT, "
+                "created_at REAL NOT NULL, started_at REAL, finished_at REAL)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS moderation_jobs_queue "
+                "ON moderation_jobs (status, priority, created_at)"
+            )
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    # === Client side ===
+    def submit(self, html, mode=None, budget_ms=None, priority="normal"):
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unknown priority: {priority}")
+        self._ensure_workers()
+        self.purge()
+        conn = self._connection()
+        job_id = uuid.uuid4().hex
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            (queued,) = conn.execute(
+                "SELECT COUNT(*) FROM moderation_jobs WHERE status = 'queued'"
+            ).fetchone()
+            if queued >= self.max_queued:
+                raise QueueFull(f"{queued} moderation jobs already queued")
+            conn.execute(
+                "INSERT INTO moderation_jobs (id, status, priority, html, mode, "
+                "budget_ms, created_at) VALUES (?, 'queued', ?, ?, ?, ?, ?)",
+                (job_id, PRIORITIES[priority], html, mode, budget_ms, time.time()),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        with self._cond:
+            self._cond.notify()
+        return self.get(job_id)
+
+    def get(self, job_id):
+        row = (
+            self._connection()
+            .execute(
+                "SELECT id, status, priority, result, error, created_at, started_at, "
+                "finished_at FROM moderation_jobs WHERE id = ?",
+                (job_id,),
+            )
+            .fetchone()
+        )
+        if row is None:
+            return None
+        job_id, status, priority, result, error, created, started, finished = row
+        if finished and self.result_ttl and finished + self.result_ttl < time.time():
+            return None
+        return {
+            "job_id": job_id,
+            "status": status,
+            "priority": _PRIORITY_NAMES[priority],
+            "result": json.loads(result) if result else None,
+            "error": error,
+            "created_at": created,
+            "started_at": started,
+            "finished_at": finished,
+        }
+
+    def purge(self):
+        """Drop expired results and fail jobs whose worker died mid-run."""
+        now = time.time()
+        conn = self._connection()
+        if self.result_ttl:
+            conn.execute(
+                "DELETE FROM moderation_jobs WHERE finished_at < ?",
+                (now - self.result_ttl,),
+            )
+        conn.execute(
+            "UPDATE moderation_jobs SET status = 'failed', html = NULL, "
+            "error = 'Worker exited before finishing', finished_at = ? "
+            "WHERE status = 'running' AND started_at < ?",
+            (now, now - self.stale_after),
+        )
+
+    def stats(self):
+        rows = (
+            self._connection()
+            .execute("SELECT status, COUNT(*) FROM moderation_jobs GROUP BY status")
+            .fetchall()
+        )
+        return dict(rows) | {"max_queued": self.max_queued}
+
+    # === Worker side ===
+    def _ensure_workers(self):
+        # Threads do not survive fork, so gunicorn workers each start their own
+        if self._threads and self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._threads and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._threads = [
+                threading.Thread(
+                    target=self._run, name=f"moderation-job-{i}", daemon=True
+                )
+                for i in range(self.workers)
+            ]
+            for t in self._threads:
+                t.start()
+
+    def _claim(self):
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT id, html, mode, budget_ms FROM moderation_jobs "
+                "WHERE status = 'queued' ORDER BY priority, created_at LIMIT 1"
+            ).fetchone()
+            if row is not None:
+                conn.execute(
+                    "UPDATE moderation_jobs SET status = 'running', started_at = ? "
+                    "WHERE id = ?",
+                    (time.time(), row[0]),
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return row
+
+    def _finish(self, job_id, result=None, error=None):
+        # The submitted content is not kept once the verdict is stored
+        self._connection().execute(
+            "UPDATE moderation_jobs SET status = ?, result = ?, error = ?, "
+            "html = NULL, finished_at = ? WHERE id = ?",
+            (
+                "failed" if error else "done",
+                json.dumps(result) if result is not None else None,
+                error,
+                time.time(),
+                job_id,
+            ),
+        )
+
+    def _run(self):
+        while True:
+            try:
+                job = self._claim()
+            except sqlite3.Error as e:
+                print("⚠️ Moderation job queue unavailable:", str(e))
+                job = None
+            if job is None:
+                with self._cond:
+                    self._cond.wait(self.poll_interval)
+                continue
+            job_id, html, mode, budget_ms = job
+            result = error = None
+            try:
+                result = self.run_fn(html, mode, budget_ms)
+            except Exception as e:
+                print("❌ Moderation job failed:", str(e))
+                error = str(e)
+            try:
+                self._finish(job_id, result, error)
+            except sqlite3.Error as e:
+                print("⚠️ Could not store moderation job result:", str(e))
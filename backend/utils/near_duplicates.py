@@ -0,0 +1,298 @@
+"""
+MinHash near-duplicate index for submitted content.
+
+Each text is reduced to word 5-gram shingles of its rendered text (markup,
+scripts and entities removed by utils.html_text, whatever ML_PREPROCESSOR is)
+and a 64-value MinHash signature, whose
+matching fraction estimates the Jaccard similarity of two texts. Signatures are
+split into 8 LSH bands of 8 values; texts sharing any band are candidates and
+are then compared on the full signature.
+
+The index lives in SQLite so every worker shares it, and holds at most
+max_entries signatures (moderated texts are evicted before documents, oldest
+first), so its footprint is bounded on disk and nothing but the current lookup
+is held in memory. Entries are either
+Firestore documents ("articles/<id>") or texts that were moderated
+("text:<digest>"); the latter let final_mh_decision reuse the verdict of a
+near-identical text instead of running the encoder. Rebuild the document side
+from Firestore with `python manage.py build_near_duplicate_index`.
+"""
+
+import os
+import re
+import time
+import hashlib
+import sqlite3
+import threading
+
+import numpy as np
+from django.conf import settings
+
+from utils.html_text import normalized_text
+
+NUM_PERM = 64
+BANDS = 8
+ROWS = NUM_PERM // BANDS
+SHINGLE_WORDS = 5
+MAX_CANDIDATES = 64
+_PRIME = (1 << 31) - 1  # a * h + b stays below 2**64 for 32-bit h
+
+_rng = np.random.default_rng(42)
+_A = _rng.integers(1, _PRIME, NUM_PERM, dtype=np.uint64)
+_B = _rng.integers(0, _PRIME, NUM_PERM, dtype=np.uint64)
+
+_WORD = re.compile(r"\w+")
+
+
+def shingles(text):
+    words = _WORD.findall(text.lower())
+    if len(words) <= SHINGLE_WORDS:
+        return {" ".join(words)} if words else set()
+    return {
+        " ".join(words[i : i + SHINGLE_WORDS])
+        for i in range(len(words) - SHINGLE_WORDS + 1)
+    }
+
+
+def signature(html):
+    """MinHash signature (uint32[NUM_PERM]) of html's rendered text, or None if it has no words."""
+    sh = shingles(normalized_text(html))
+    if not sh:
+        return None
+    h = np.fromiter(
+        (
+            int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=4).digest(), "little")
+            for s in sh
+        ),
+        dtype=np.uint64,
+        count=len(sh),
+    )
+    return ((np.outer(_A, h) + _B[:, None]) % _PRIME).min(axis=1).astype(np.uint32)
+
+
+def similarity(a, b):
+    return float(np.mean(a == b))
+
+
+def _band_keys(sig):
+    # 63-bit ints so they fit SQLite INTEGER
+    return [
+        int.from_bytes(
+            hashlib.blake2b(sig[i * ROWS : (i + 1) * ROWS].tobytes(), digest_size=8).digest(),
+            "little",
+        )
+        >> 1
+        for i in range(BANDS)
+    ]
+
+
+class NearDuplicateIndex:
+    def __init__(self, path, threshold=0.9, max_entries=50000):
+        self.path = path
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self._inserts = 0
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries (id INTEGER PRIMARY KEY AUTOINCREMENT, "
+                "ref TEXT UNIQUE NOT NULL, digest TEXT, sig BLOB NOT NULL, "
+                "created_at REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS bands (band INTEGER NOT NULL, "
+                "bucket INTEGER NOT NULL, entry INTEGER NOT NULL)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS bands_bucket ON bands (band, bucket)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS bands_entry ON bands (entry)")
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def lookup(self, sig, exclude=None):
+        """[(ref, digest, similarity)] of stored texts at or above the threshold, best first."""
+        if sig is None:
+            return []
+        keys = _band_keys(sig)
+        clause = " OR ".join(["(band = ? AND bucket = ?)"] * BANDS)
+        params = [v for pair in enumerate(keys) for v in pair]
+        conn = self._connection()
+        rows = conn.execute(
+            f"SELECT e.ref, e.digest, e.sig FROM entries e WHERE e.id IN "
+            f"(SELECT DISTINCT entry FROM bands WHERE {clause} LIMIT {MAX_CANDIDATES})",
+            params,
+        ).fetchall()
+        matches = []
+        for ref, digest, blob in rows:
+            if ref == exclude:
+                continue
+            score = similarity(sig, np.frombuffer(blob, dtype=np.uint32))
+            if score >= self.threshold:
+                matches.append((ref, digest, score))
+        return sorted(matches, key=lambda m: -m[2])
+
+    def add(self, ref, sig, digest=None):
+        self.add_many([(ref, sig, digest)])
+
+    def add_many(self, items):
+        """Insert or replace [(ref, sig, digest)] in one transaction."""
+        items = [item for item in items if item[1] is not None]
+        if not items:
+            return
+        conn = self._connection()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for ref, sig, digest in items:
+                old = conn.execute("SELECT id FROM entries WHERE ref = ?", (ref,)).fetchone()
+                if old:
+                    conn.execute("DELETE FROM bands WHERE entry = ?", (old[0],))
+                    conn.execute("DELETE FROM entries WHERE id = ?", (old[0],))
+                cur = conn.execute(
+                    "INSERT INTO entries (ref, digest, sig, created_at) VALUES (?, ?, ?, ?)",
+                    (ref, digest, sig.astype(np.uint32).tobytes(), now),
+                )
+                conn.executemany(
+                    "INSERT INTO bands VALUES (?, ?, ?)",
+                    [(i, key, cur.lastrowid) for i, key in enumerate(_band_keys(sig))],
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        before, self._inserts = self._inserts, self._inserts + len(items)
+        if before // 100 != self._inserts // 100:
+            self.evict()
+
+    def remove(self, ref):
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "DELETE FROM bands WHERE entry IN (SELECT id FROM entries WHERE ref = ?)",
+                (ref,),
+            )
+            conn.execute("DELETE FROM entries WHERE ref = ?", (ref,))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def evict(self):
+        """Drop the entries beyond max_entries: moderated texts first, then the oldest documents."""
+        conn = self._connection()
+        (n,) = conn.execute("SELECT COUNT(*) FROM entries").fetchone()
+        extra = n - self.max_entries
+        if extra <= 0:
+            return 0
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("CREATE TEMP TABLE IF NOT EXISTS evicted (id INTEGER PRIMARY KEY)")
+            conn.execute("DELETE FROM evicted")
+            conn.execute(
+                "INSERT INTO evicted SELECT id FROM entries "
+                "ORDER BY ref LIKE 'text:%' DESC, id LIMIT ?",
+                (extra,),
+            )
+            conn.execute("DELETE FROM bands WHERE entry IN (SELECT id FROM evicted)")
+            conn.execute("DELETE FROM entries WHERE id IN (SELECT id FROM evicted)")
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return extra
+
+    def clear(self, prefix=None):
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if prefix:
+                conn.execute(
+                    "DELETE FROM bands WHERE entry IN (SELECT id FROM entries WHERE ref LIKE ?)",
+                    (prefix + "%",),
+                )
+                conn.execute("DELETE FROM entries WHERE ref LIKE ?", (prefix + "%",))
+            else:
+                conn.execute("DELETE FROM bands")
+                conn.execute("DELETE FROM entries")
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def __len__(self):
+        (n,) = self._connection().execute("SELECT COUNT(*) FROM entries").fetchone()
+        return n
+
+
+ENABLED = getattr(settings, "ML_NEARDUP_ENABLED", True)
+INDEX = NearDuplicateIndex(
+    getattr(
+        settings,
+        "ML_NEARDUP_PATH",
+        os.path.join(settings.ML_MODELS_DIR, "cache", "near_duplicates.sqlite3"),
+    ),
+    threshold=getattr(settings, "ML_NEARDUP_THRESHOLD", 0.9),
+    max_entries=getattr(settings, "ML_NEARDUP_MAX_ENTRIES", 50000),
+)
+
+
+# === Documents (articles / patient stories) ===
+def find_document(html, exclude=None):
+    """
+    (duplicate, sig) for a submission: duplicate is {"collection", "id",
+    "similarity"} of the closest stored article or story, or None. Pass sig on
+    to add_document() once the submission is stored.
+    """
+    if not ENABLED or not html:
+        return None, None
+    try:
+        sig = signature(html)
+        for ref, _, score in INDEX.lookup(sig, exclude=exclude):
+            if ref.startswith("text:"):
+                continue
+            collection, doc_id = ref.split("/", 1)
+            return {"collection": collection, "id": doc_id, "similarity": round(score, 3)}, sig
+        return None, sig
+    except Exception as e:
+        print("⚠️ Near-duplicate lookup failed:", str(e))
+        return None, None
+
+
+def add_document(collection, doc_id, sig):
+    if not ENABLED or sig is None:
+        return
+    try:
+        INDEX.add(f"{collection}/{doc_id}", sig)
+    except Exception as e:
+        print(f"⚠️ Near-duplicate index update failed for {collection}/{doc_id}:", str(e))
+
+
+def update_document(collection, doc_id, html):
+    """Re-sign a document whose content changed."""
+    if not ENABLED:
+        return
+    try:
+        sig = signature(html or "")
+        if sig is None:
+            return INDEX.remove(f"{collection}/{doc_id}")
+        INDEX.add(f"{collection}/{doc_id}", sig)
+    except Exception as e:
+        print(f"⚠️ Near-duplicate index update failed for {collection}/{doc_id}:", str(e))
+
+
+def remove_document(collection, doc_id):
+    if not ENABLED:
+        return
+    try:
+        INDEX.remove(f"{collection}/{doc_id}")
+    except Exception as e:
+        print(f"⚠️ Near-duplicate index delete failed for {collection}/{doc_id}:", str(e))
@@ -0,0 +1,87 @@
+"""
+onnxruntime inference backend for the moderation models.
+
+Serves the ONNX artifacts written by `python manage.py export_onnx` without
+importing torch or TensorFlow. OnnxEncoder mirrors the parts of
+SentenceTransformer.encode that ml_model uses (mean pooling + L2 normalize, as
+configured in final_fine_tuned_sbert_model), and OnnxClassifier maps a padded
+(n, MAX_SEQ_LEN, EMBED_DIM) batch to class probabilities.
+"""
+
+import os
+import json
+
+import numpy as np
+
+ONNX_DIR = "onnx"
+ENCODER_FILE = "sbert_encoder.onnx"
+ENCODER_INT8_FILE = "sbert_encoder.int8.onnx"
+CLASSIFIER_FILE = "mh_classifier.onnx"
+
+
+def session_options(intra_threads=0, inter_threads=0):
+    import onnxruntime as ort
+
+    opts = ort.SessionOptions()
+    opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    opts.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+    # 0 lets onnxruntime pick; set explicitly to stop workers oversubscribing cores
+    opts.intra_op_num_threads = intra_threads
+    opts.inter_op_num_threads = inter_threads
+    return opts
+
+
+def _session(path, opts):
+    import onnxruntime as ort
+
+    return ort.InferenceSession(path, opts, providers=["CPUExecutionProvider"])
+
+
+class OnnxEncoder:
+    def __init__(self, onnx_path, tokenizer_dir, opts=None, batch_size=32):
+        from tokenizers import Tokenizer
+
+        self.session = _session(onnx_path, opts or session_options())
+        self.input_names = {i.name for i in self.session.get_inputs()}
+        self.batch_size = batch_size
+
+        with open(os.path.join(tokenizer_dir, "sentence_bert_config.json")) as f:
+            max_len = json.load(f).get("max_seq_length", 256)
+        self.tokenizer = Tokenizer.from_file(
+            os.path.join(tokenizer_dir, "tokenizer.json")
+        )
+        self.tokenizer.enable_truncation(max_length=max_len)
+        self.tokenizer.enable_padding()
+
+    def encode(self, sentences, convert_to_tensor=False, batch_size=None):
+        batch_size = batch_size or self.batch_size
+        out = []
+        for i in range(0, len(sentences), batch_size):
+            out.append(self._encode_batch(sentences[i : i + batch_size]))
+        if not out:
+            return np.zeros((0, 0), dtype=np.float32)
+        return np.concatenate(out)
+
+    def _encode_batch(self, sentences):
+        enc = self.tokenizer.encode_batch(list(sentences))
+        ids = np.array([e.ids for e in enc], dtype=np.int64)
+        mask = np.array([e.attention_mask for e in enc], dtype=np.int64)
+        feeds = {"input_ids": ids, "attention_mask": mask}
+        if "token_type_ids" in self.input_names:
+            feeds["token_type_ids"] = np.array([e.type_ids for e in enc], dtype=np.int64)
+        hidden = self.session.run(None, feeds)[0]
+
+        # Mean pooling over real tokens, then L2 normalize (modules.json: Pooling + Normalize)
+        m = mask[..., np.newaxis].astype(np.float32)
+        pooled = (hidden * m).sum(axis=1) / np.clip(m.sum(axis=1), 1e-9, None)
+        norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+        return (pooled / np.clip(norms, 1e-12, None)).astype(np.float32)
+
+
+class OnnxClassifier:
+    def __init__(self, onnx_path, opts=None):
+        self.session = _session(onnx_path, opts or session_options())
+        self.input_name = self.session.get_inputs()[0].name
+
+    def __call__(self, batch):
+        return self.session.run(None, {self.input_name: np.asarray(batch, np.float32)})[0]
@@ -0,0 +1,144 @@
+"""
+Cursor pagination for the article and patient story lists.
+
+A page is one indexed query: order by date_time (newest first) and document id,
+start after the last document of the previous page, and read page_size + 1
+documents; the extra one only tells whether a next page exists. The position is
+handed to the client as an opaque page token, so reading page 50 costs the same
+as reading page 1. total_pages comes from a count() aggregation cached for
+LIST_COUNT_CACHE_SECONDS per (collection, tag).
+
+Tag-filtered listings need the composite index declared in the repository's
+firestore.indexes.json (deploy with `firebase deploy --only firestore:indexes`).
+
+iter_pages() walks a whole collection in document id order for the management
+commands that rewrite or index every document.
+"""
+
+import json
+import time
+import base64
+import threading
+from datetime import datetime
+
+from django.conf import settings
+from google.cloud import firestore
+
+
+class InvalidPageToken(ValueError):
+    pass
+
+
+_COUNTS = {}  # (collection, tag) -> (expires_at, count)
+_COUNTS_LOCK = threading.Lock()
+
+
+def encode_token(collection, tag, page, last):
+    payload = {
+        "c": collection,
+        "t": tag,
+        "p": page,
+        "d": last.get("date_time").isoformat(),
+        "id": last.id,
+    }
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_token(token, collection, tag):
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        payload = json.loads(raw)
+        cursor = {
+            "date_time": datetime.fromisoformat(payload["d"]),
+            "__name__": payload["id"],
+        }
+        page = int(payload["p"])
+    except (ValueError, KeyError, TypeError) as e:
+        raise InvalidPageToken("Invalid page token.") from e
+    if payload.get("c") != collection or payload.get("t") != tag:
+        raise InvalidPageToken("Page token belongs to a different listing.")
+    return cursor, page
+
+
+def listing_query(db, collection, tag=None):
+    query = db.collection(collection)
+    if tag:
+        query = query.where("tags", "array_contains", tag)
+    # The id tiebreak keeps cursors exact when two documents share a date_time
+    return query.order_by("date_time", direction=firestore.Query.DESCENDING).order_by(
+        "__name__", direction=firestore.Query.DESCENDING
+    )
+
+
+def count(db, collection, tag=None):
+    key = (collection, tag)
+    entry = _COUNTS.get(key)
+    if entry and entry[0] > time.monotonic():
+        return entry[1]
+    # Same query as the pages (only date_time-stamped documents are listed), so
+    # the composite index in firestore.indexes.json serves both
+    query = listing_query(db, collection, tag)
+    total = query.count(alias="total").get()[0][0].value
+    ttl = getattr(settings, "LIST_COUNT_CACHE_SECONDS", 60)
+    with _COUNTS_LOCK:
+        _COUNTS[key] = (time.monotonic() + ttl, total)
+    return total
+
+
+def invalidate_counts(collection):
+    """Forget this process's cached totals after a create or delete."""
+    with _COUNTS_LOCK:
+        for key in [k for k in _COUNTS if k[0] == collection]:
+            del _COUNTS[key]
+
+
+def iter_pages(db, collection, fields, page_size, after_id=None):
+    """
+    Yield every document of collection in pages of page_size, in id order,
+    reading only fields. after_id resumes after that document id; the document
+    itself need not exist any more.
+    """
+    query = (
+        db.collection(collection).select(list(fields)).order_by("__name__").limit(page_size)
+    )
+    while True:
+        page = list(
+            (query.start_after({"__name__": after_id}) if after_id else query).stream()
+        )
+        if not page:
+            return
+        yield page
+        after_id = page[-1].id
+
+
+def fetch_page(db, collection, page_size, tag=None, token=None, page=1, fields=None):
+    """
+    One page of a listing as {"results", "total_pages", "current_page",
+    "next_page_token"}. Without a token, pages past the first fall back to an
+    offset query (Firestore still reads the skipped documents), so old
+    page-number links keep working. With fields, only those are read.
+    """
+    query = listing_query(db, collection, tag)
+    if fields:
+        # date_time is needed for the next cursor
+        query = query.select(sorted(set(fields) | {"date_time"}))
+    if token:
+        cursor, page = decode_token(token, collection, tag)
+        query = query.start_after(cursor)
+        page += 1
+    elif page > 1:
+        query = query.offset((page - 1) * page_size)
+
+    docs = list(query.limit(page_size + 1).stream())
+    has_next = len(docs) > page_size
+    docs = docs[:page_size]
+    total = count(db, collection, tag)
+    return {
+        "results": [doc.to_dict() | {"id": doc.id} for doc in docs],
+        "total_pages": (total + page_size - 1) // page_size,
+        "current_page": page,
+        "next_page_token": (
+            encode_token(collection, tag, page, docs[-1]) if has_next else None
+        ),
+    }
@@ -0,0 +1,100 @@
+"""
+Semantic search over articles and patient stories.
+
+Each document is indexed as the mean of its SBERT sentence embeddings (title
+included) in a local VectorIndex. Views call index_document_async() after a
+create or update and remove_document() after a delete; embedding runs on a
+background thread so the write request does not wait for the encoder.
+Rebuild the whole index with `python manage.py build_semantic_index`.
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+
+from utils.html_text import normalized_text
+from utils.moderation import embed_texts
+from utils.vector_index import VectorIndex
+
+COLLECTIONS = ("articles", "patient_stories")
+
+INDEX = VectorIndex(
+    getattr(
+        settings,
+        "ML_SEARCH_INDEX_DIR",
+        os.path.join(settings.ML_MODELS_DIR, "cache", "search"),
+    ),
+    mode=getattr(settings, "ML_SEARCH_MODE", "brute"),
+    nprobe=getattr(settings, "ML_SEARCH_NPROBE", 8),
+)
+
+# One thread: indexing is a background convenience, not worth competing with requests
+_EXECUTOR = ThreadPoolExecutor(max_workers=1, thread_name_prefix="semantic-index")
+
+
+def _key(collection, doc_id):
+    return f"{collection}/{doc_id}"
+
+
+def document_text(data):
+    """
+    Plain text to embed: the title, then each rendered block of the content,
+    each ending as a sentence. Cleaning happens here, so neither preprocessor
+    can glue the title onto the first sentence or leave entities in the text.
+    """
+    parts = [" ".join((data.get("title") or "").split())]
+    parts += normalized_text(data.get("content") or "").split("\n")
+    return " ".join(p if p[-1] in ".!?" else p + "." for p in parts if p)
+
+
+def index_documents(collection, docs):
+    """Embed and upsert [(doc_id, data)] in one batch."""
+    docs = [(doc_id, data) for doc_id, data in docs if data.get("content")]
+    if not docs:
+        return 0
+    vectors = embed_texts([document_text(data) for _, data in docs])
+    for (doc_id, data), vec in zip(docs, vectors):
+        INDEX.upsert(
+            _key(collection, doc_id), vec, collection=collection, title=data.get("title")
+        )
+    return len(docs)
+
+
+def index_document_async(collection, doc_id, data=None):
+    """Queue (re)indexing of one document; without data it is read from Firestore."""
+    _EXECUTOR.submit(_index_one, collection, doc_id, data)
+
+
+def _index_one(collection, doc_id, data):
+    try:
+        if data is None:
+            from theramind_backend.config import db
+
+            snap = db.collection(collection).document(doc_id).get()
+            if not snap.exists:
+                return remove_document(collection, doc_id)
+            data = snap.to_dict()
+        index_documents(collection, [(doc_id, data)])
+    except Exception as e:
+        print(f"⚠️ Semantic index update failed for {collection}/{doc_id}:", str(e))
+
+
+def remove_document(collection, doc_id):
+    try:
+        INDEX.delete(_key(collection, doc_id))
+    except Exception as e:
+        print(f"⚠️ Semantic index delete failed for {collection}/{doc_id}:", str(e))
+
+
+def search(query, k=10, collection=None):
+    vector = embed_texts([query])[0]
+    return [
+        {
+            "id": key.split("/", 1)[1],
+            "collection": coll,
+            "title": title,
+            "score": round(score, 4),
+        }
+        for key, score, coll, title in INDEX.search(vector, k, collection)
+    ]
@@ -0,0 +1,147 @@
+"""
+Precomputed synonym table for TTA, replacing live WordNet lookups.
+
+The table maps a lowercased word to the WordNet lemma names of all its synsets,
+as wn.synsets(word) resolves them. Its keys are every string morphy can resolve:
+lemma names, WordNet's irregular forms, and each lemma inflected by inverting
+morphy's detachment rules for its part of speech (api/tests/test_synonyms.py
+checks this against WordNet). Candidates are sorted, so TTA picks are
+deterministic.
+
+File layout (native uint32, little-endian on every host we deploy to), memory-mapped at runtime:
+
+    b"SYN1" | n: uint32 | key_off: uint32[n+1] | val_off: uint32[n+1]
+    | keys blob (sorted, utf-8) | values blob (candidates joined by NUL)
+
+Build it at image build time, before any Django settings exist:
+
+    NLTK_DATA=ml_models/nltk_data python -m utils.synonyms ml_models/synonyms.bin
+"""
+
+import os
+import sys
+import mmap
+import struct
+import bisect
+from array import array
+
+MAGIC = b"SYN1"
+SEP = "\x00"
+
+
+class SynonymTable:
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mm[:4] != MAGIC:
+            raise ValueError(f"{path} is not a synonym table")
+        (n,) = struct.unpack_from("<I", self._mm, 4)
+        self.n = n
+        view = memoryview(self._mm)
+        self._key_off = view[8 : 8 + 4 * (n + 1)].cast("I")
+        self._val_off = view[8 + 4 * (n + 1) : 8 + 8 * (n + 1)].cast("I")
+        self._keys_at = 8 + 8 * (n + 1)
+        self._vals_at = self._keys_at + self._key_off[n]
+
+    def __len__(self):
+        return self.n
+
+    def _key(self, i):
+        a, b = self._key_off[i], self._key_off[i + 1]
+        return self._mm[self._keys_at + a : self._keys_at + b]
+
+    def lemma_names(self, word):
+        """Sorted WordNet lemma names for word (underscores kept), or []."""
+        target = word.lower().encode("utf-8")
+        i = bisect.bisect_left(range(self.n), target, key=self._key)
+        if i == self.n or self._key(i) != target:
+            return []
+        a, b = self._val_off[i], self._val_off[i + 1]
+        if a == b:
+            return []
+        return self._mm[self._vals_at + a : self._vals_at + b].decode("utf-8").split(SEP)
+
+
+def candidates(lemma_names, word):
+    """TTA replacement candidates for word, in a stable order."""
+    seen = []
+    for name in lemma_names:
+        if name == word:
+            continue
+        name = name.replace("_", " ")
+        if name not in seen:
+            seen.append(name)
+    return seen
+
+
+def wordnet_lemma_names(word):
+    """Live WordNet equivalent of SynonymTable.lemma_names (used when no table is built)."""
+    from nltk.corpus import wordnet as wn
+
+    return sorted({l.name() for s in wn.synsets(word) for l in s.lemmas()})
+
+
+# === Build ===
+def _surface_forms(wn):
+    """
+    Every string wn.synsets() resolves. morphy accepts a lemma of some part of
+    speech, an irregular form from the exception lists, or a word that one of
+    the part of speech's detachment rules (e.g. "ies" -> "y", "men" -> "man")
+    turns into such a lemma; the last are generated by applying each rule in
+    reverse to every lemma.
+    """
+    forms = set()
+    for pos, rules in wn.MORPHOLOGICAL_SUBSTITUTIONS.items():
+        for name in wn.all_lemma_names(pos):
+            forms.add(name)
+            for detached, base in rules:
+                if name.endswith(base):
+                    forms.add(name[: len(name) - len(base)] + detached)
+    for pos_exceptions in wn._exception_map.values():
+        forms.update(pos_exceptions)
+    return forms
+
+
+def lookup_table(wn, forms):
+    """{form: sorted lemma names} for the forms WordNet resolves."""
+    table = {}
+    for form in sorted(forms):
+        names = wordnet_lemma_names(form)
+        if names:
+            table[form.lower()] = names
+    return table
+
+
+def build(path):
+    from nltk.corpus import wordnet as wn
+
+    wn.ensure_loaded()
+    table = lookup_table(wn, _surface_forms(wn))
+    write_table(path, table)
+    return len(table)
+
+
+def write_table(path, table):
+    keys = sorted(table)
+    key_blob, val_blob = bytearray(), bytearray()
+    key_off, val_off = [0], [0]
+    for k in keys:
+        key_blob += k.encode("utf-8")
+        val_blob += SEP.join(table[k]).encode("utf-8")
+        key_off.append(len(key_blob))
+        val_off.append(len(val_blob))
+
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(MAGIC + struct.pack("<I", len(keys)))
+        f.write(array("I", key_off).tobytes())
+        f.write(array("I", val_off).tobytes())
+        f.write(key_blob)
+        f.write(val_blob)
+    os.replace(tmp, path)
+
+
+if __name__ == "__main__":
+    out = sys.argv[1] if len(sys.argv) > 1 else os.path.join("ml_models", "synonyms.bin")
+    n = build(out)
+    print(f"Wrote {n} words to {out} ({os.path.getsize(out) / 2**20:.1f} MB)")
@@ -0,0 +1,139 @@
+"""
+Tag popularity for articles and patient stories, kept up to date on write.
+
+One Firestore document per content collection, tag_counts/<collection>, holds
+{"counts": {tag: n}}. Views add increments for the tags a write adds or removes
+to the same batch as the write itself, so the counts move together with the
+content. Updates and deletes go through update_document / delete_document,
+which read the old tags inside the write's transaction; concurrent edits of one
+document are retried instead of both counting against the same old tags.
+Reading all tags of a collection is then a single document read (and
+usually a DOCUMENTS cache hit); prefix matching for autocomplete runs in memory
+over a sorted copy of the tag names.
+
+Only documents the listings can show are counted: those with a date_time field
+(the listing query orders by it, so Firestore leaves the others out). Content
+from submit_content has none, so its tags do not appear in the facets either.
+
+Rebuild the counts from the content with `python manage.py rebuild_tag_counts`.
+"""
+
+import bisect
+import threading
+from collections import Counter
+
+from google.cloud import firestore
+
+from utils.document_cache import DOCUMENTS
+
+TAG_COUNTS = "tag_counts"
+COLLECTIONS = ("articles", "patient_stories")
+
+_SORTED = {}  # path -> (counts dict it was built from, [(folded name, name)])
+_SORTED_LOCK = threading.Lock()
+
+
+def counts_path(collection):
+    return f"{TAG_COUNTS}/{collection}"
+
+
+def _tags(tags):
+    # Each tag counts once per document, however often it is listed
+    return {t for t in (tags or []) if isinstance(t, str) and t}
+
+
+def counted_tags(data):
+    """The tags of a document that count, i.e. None unless it appears in listings."""
+    return data.get("tags") if "date_time" in data else None
+
+
+def deltas(old_tags=None, new_tags=None):
+    """{tag: +1 / -1} turning old_tags into new_tags."""
+    old, new = _tags(old_tags), _tags(new_tags)
+    return {**{t: -1 for t in old - new}, **{t: 1 for t in new - old}}
+
+
+def add_to_batch(batch, db, collection, changes):
+    """Queue the count changes in batch; commit it with the content write."""
+    if not changes:
+        return
+    batch.set(
+        db.collection(TAG_COUNTS).document(collection),
+        {"counts": {tag: firestore.Increment(n) for tag, n in changes.items()}},
+        merge=True,
+    )
+
+
+def _write(db, collection, doc_id, data):
+    ref = db.collection(collection).document(doc_id)
+
+    @firestore.transactional
+    def apply(transaction):
+        snap = ref.get(field_paths=["tags", "date_time"], transaction=transaction)
+        if not snap.exists:
+            return False
+        old = snap.to_dict() or {}
+        if data is None:
+            transaction.delete(ref)
+            changes = deltas(old_tags=counted_tags(old))
+        else:
+            transaction.update(ref, data)
+            # Setting date_time first lists the document, and so counts its tags
+            changes = deltas(counted_tags(old), counted_tags({**old, **data}))
+        add_to_batch(transaction, db, collection, changes)
+        return True
+
+    return apply(db.transaction())
+
+
+def update_document(db, collection, doc_id, data):
+    """Update the document and its tag counts in one transaction; False if it does not exist."""
+    return _write(db, collection, doc_id, data)
+
+
+def delete_document(db, collection, doc_id):
+    """Delete the document and count its tags out in one transaction; False if it did not exist."""
+    return _write(db, collection, doc_id, None)
+
+
+def invalidate(collection):
+    DOCUMENTS.invalidate(counts_path(collection))
+
+
+def counts(collection=None):
+    """{tag: documents} for one collection, or summed over both."""
+    total = Counter()
+    for name in [collection] if collection else COLLECTIONS:
+        data = DOCUMENTS.get(counts_path(name)) or {}
+        total.update({t: n for t, n in (data.get("counts") or {}).items() if n > 0})
+    return total
+
+
+def _sorted_names(collection, tag_counts):
+    key = collection or "*"
+    with _SORTED_LOCK:
+        cached = _SORTED.get(key)
+        if cached is not None and cached[0] == tag_counts:
+            return cached[1]
+    names = sorted((t.casefold(), t) for t in tag_counts)
+    with _SORTED_LOCK:
+        _SORTED[key] = (tag_counts, names)
+    return names
+
+
+def facets(collection=None, prefix="", limit=20):
+    """[{"tag", "count"}] most used first, only tags starting with prefix (case-insensitive)."""
+    tag_counts = counts(collection)
+    if prefix:
+        names = _sorted_names(collection, tag_counts)
+        folded = prefix.casefold()
+        start = bisect.bisect_left(names, (folded,))
+        matches = []
+        for name_folded, name in names[start:]:
+            if not name_folded.startswith(folded):
+                break
+            matches.append(name)
+    else:
+        matches = list(tag_counts)
+    matches.sort(key=lambda t: (-tag_counts[t], t.casefold()))
+    return [{"tag": t, "count": tag_counts[t]} for t in matches[:limit]]
@@ -0,0 +1,294 @@
+"""
+Local vector index for semantic search, shared by all workers on a host.
+
+Vectors are L2-normalized and stored as float16 rows of a memory-mapped file
+(vectors.f16); cosine similarity is then a plain matmul. Which row holds which
+document lives in SQLite next to it, so upserts and deletes from any worker are
+atomic and immediately visible to the others. Deleted rows are reused.
+
+"brute" mode scores every row. "ivf" mode partitions rows around k-means
+centroids (train_ivf) and scores only the nprobe partitions closest to the
+query; rows added before training, or with no centroids yet, are always scored.
+"""
+
+import os
+import sqlite3
+import threading
+
+import numpy as np
+
+VECTORS_FILE = "vectors.f16"
+CENTROIDS_FILE = "centroids.npy"
+MIN_CAPACITY = 1024
+SCAN_CHUNK = 16384  # rows converted to float32 at a time
+
+
+class _Snapshot:
+    """Per-process view of the live rows, rebuilt when the generation changes."""
+
+    def __init__(self, generation, rows, keys, collections, titles, clusters, centroids):
+        self.generation = generation
+        self.rows = rows
+        self.keys = keys
+        self.collections = collections
+        self.titles = titles
+        self.clusters = clusters
+        self.centroids = centroids
+
+
+class VectorIndex:
+    def __init__(self, path, mode="brute", nprobe=8):
+        self.path = path
+        self.mode = mode
+        self.nprobe = nprobe
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._mm = None
+        self._mm_key = None  # (pid, capacity) of the current mapping
+
+    # === Storage ===
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            os.makedirs(self.path, exist_ok=True)
+            conn = sqlite3.connect(
+                os.path.join(self.path, "index.sqlite3"), timeout=10, isolation_level=None
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, "
+                "row INTEGER UNIQUE NOT NULL, collection TEXT, title TEXT, "
+                "cluster INTEGER NOT NULL DEFAULT -1)"
+            )
+            conn.execute("CREATE TABLE IF NOT EXISTS free_rows (row INTEGER PRIMARY KEY)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER)"
+            )
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def _meta(self, conn, name, default=0):
+        row = conn.execute("SELECT value FROM meta WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else default
+
+    def _set_meta(self, conn, name, value):
+        conn.execute("INSERT OR REPLACE INTO meta VALUES (?, ?)", (name, value))
+
+    def _bump(self, conn):
+        self._set_meta(conn, "generation", self._meta(conn, "generation") + 1)
+
+    def _matrix(self, dim, capacity):
+        """The float16 memmap, remapped after fork or when another worker grew the file."""
+        key = (os.getpid(), capacity)
+        if self._mm is None or self._mm_key != key:
+            self._mm = np.memmap(
+                os.path.join(self.path, VECTORS_FILE),
+                dtype=np.float16,
+                mode="r+",
+                shape=(capacity, dim),
+            )
+            self._mm_key = key
+        return self._mm
+
+    def _ensure_capacity(self, conn, dim, rows_needed):
+        capacity = self._meta(conn, "capacity")
+        if rows_needed <= capacity:
+            return capacity
+        capacity = max(MIN_CAPACITY, capacity * 2, rows_needed)
+        with open(os.path.join(self.path, VECTORS_FILE), "ab") as f:
+            f.truncate(capacity * dim * 2)  # new rows read as zeros
+        self._set_meta(conn, "capacity", capacity)
+        return capacity
+
+    # === Writes ===
+    def upsert(self, key, vector, collection=None, title=None):
+        vec = _normalize(np.asarray(vector, dtype=np.float32))
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            dim = self._meta(conn, "dim") or len(vec)
+            if len(vec) != dim:
+                raise ValueError(f"Vector has {len(vec)} dimensions, index has {dim}")
+            self._set_meta(conn, "dim", dim)
+
+            found = conn.execute("SELECT row FROM entries WHERE key = ?", (key,)).fetchone()
+            if found:
+                row = found[0]
+            else:
+                free = conn.execute("SELECT row FROM free_rows LIMIT 1").fetchone()
+                if free:
+                    row = free[0]
+                    conn.execute("DELETE FROM free_rows WHERE row = ?", (row,))
+                else:
+                    row = self._meta(conn, "rows")
+                    self._set_meta(conn, "rows", row + 1)
+            capacity = self._ensure_capacity(conn, dim, row + 1)
+
+            mm = self._matrix(dim, capacity)
+            mm[row] = vec
+            conn.execute(
+                "INSERT OR REPLACE INTO entries (key, row, collection, title, cluster) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, row, collection, title, self._nearest_cluster(vec)),
+            )
+            self._bump(conn)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return row
+
+    def delete(self, key):
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            found = conn.execute("SELECT row FROM entries WHERE key = ?", (key,)).fetchone()
+            if found:
+                conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                conn.execute("INSERT OR IGNORE INTO free_rows VALUES (?)", (found[0],))
+                self._bump(conn)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return bool(found)
+
+    def clear(self):
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        conn.execute("DELETE FROM entries")
+        conn.execute("DELETE FROM free_rows")
+        conn.execute("DELETE FROM meta WHERE name = 'rows'")
+        self._bump(conn)
+        conn.execute("COMMIT")
+        centroids = os.path.join(self.path, CENTROIDS_FILE)
+        if os.path.exists(centroids):
+            os.remove(centroids)
+
+    def __len__(self):
+        (n,) = self._connection().execute("SELECT COUNT(*) FROM entries").fetchone()
+        return n
+
+    # === IVF ===
+    def train_ivf(self, nlist, iterations=10, seed=42):
+        """k-means over the stored vectors, then assign every row to its partition."""
+        snap = self._load_snapshot()
+        n = len(snap.rows)
+        if n == 0:
+            return 0
+        nlist = max(1, min(nlist, n))
+        vectors = self._gather(snap.rows)
+        rng = np.random.default_rng(seed)
+        centroids = vectors[rng.choice(n, nlist, replace=False)].copy()
+        for _ in range(iterations):
+            assign = np.argmax(vectors @ centroids.T, axis=1)
+            for c in range(nlist):
+                members = vectors[assign == c]
+                if len(members):
+                    centroids[c] = _normalize(members.mean(axis=0))
+        assign = np.argmax(vectors @ centroids.T, axis=1)
+
+        tmp = os.path.join(self.path, "centroids.tmp.npy")
+        np.save(tmp, centroids.astype(np.float32))
+        os.replace(tmp, os.path.join(self.path, CENTROIDS_FILE))
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        conn.executemany(
+            "UPDATE entries SET cluster = ? WHERE key = ?",
+            [(int(c), k) for c, k in zip(assign, snap.keys)],
+        )
+        self._bump(conn)
+        conn.execute("COMMIT")
+        # The cached snapshot predates the centroids; upserts must see them
+        self._snapshot = None
+        return nlist
+
+    def _centroids(self):
+        path = os.path.join(self.path, CENTROIDS_FILE)
+        return np.load(path) if os.path.exists(path) else None
+
+    def _nearest_cluster(self, vec):
+        snap = self._snapshot
+        centroids = snap.centroids if snap is not None else self._centroids()
+        if centroids is None:
+            return -1
+        return int(np.argmax(centroids @ vec))
+
+    # === Reads ===
+    def _load_snapshot(self):
+        conn = self._connection()
+        generation = self._meta(conn, "generation")
+        snap = self._snapshot
+        if snap is not None and snap.generation == generation:
+            return snap
+        with self._lock:
+            if self._snapshot is not None and self._snapshot.generation == generation:
+                return self._snapshot
+            rows = conn.execute(
+                "SELECT row, key, collection, title, cluster FROM entries ORDER BY row"
+            ).fetchall()
+            self._snapshot = _Snapshot(
+                generation,
+                np.array([r[0] for r in rows], dtype=np.int64),
+                [r[1] for r in rows],
+                np.array([r[2] or "" for r in rows], dtype=object),
+                [r[3] for r in rows],
+                np.array([r[4] for r in rows], dtype=np.int64),
+                self._centroids(),
+            )
+            return self._snapshot
+
+    def _gather(self, rows):
+        conn = self._connection()
+        mm = self._matrix(self._meta(conn, "dim"), self._meta(conn, "capacity"))
+        return np.asarray(mm[rows], dtype=np.float32)
+
+    def search(self, vector, k=10, collection=None):
+        """[(key, score, collection, title)] of the k rows most similar to vector."""
+        snap = self._load_snapshot()
+        if not len(snap.rows):
+            return []
+        q = _normalize(np.asarray(vector, dtype=np.float32))
+        candidates = np.arange(len(snap.rows))
+        if collection:
+            candidates = candidates[snap.collections == collection]
+        if self.mode == "ivf" and snap.centroids is not None:
+            probe = np.argsort(snap.centroids @ q)[-self.nprobe :]
+            clusters = snap.clusters[candidates]
+            candidates = candidates[np.isin(clusters, probe) | (clusters < 0)]
+        if not len(candidates):
+            return []
+
+        scores = np.empty(len(candidates), dtype=np.float32)
+        for i in range(0, len(candidates), SCAN_CHUNK):
+            chunk = candidates[i : i + SCAN_CHUNK]
+            scores[i : i + len(chunk)] = self._gather(snap.rows[chunk]) @ q
+        k = min(k, len(candidates))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [
+            (
+                snap.keys[candidates[i]],
+                float(scores[i]),
+                snap.collections[candidates[i]] or None,
+                snap.titles[candidates[i]],
+            )
+            for i in top
+        ]
+
+    def stats(self):
+        conn = self._connection()
+        snap = self._load_snapshot()
+        return {
+            "documents": len(snap.rows),
+            "dim": self._meta(conn, "dim"),
+            "capacity": self._meta(conn, "capacity"),
+            "mode": self.mode,
+            "partitions": 0 if snap.centroids is None else len(snap.centroids),
+        }
+
+
+def _normalize(v):
+    return v / max(float(np.linalg.norm(v)), 1e-12)